@@ -0,0 +1,392 @@
+"""
+챗봇 답변 캐시
+"근처 갈만한 곳", 유명 스팟 운영시간처럼 같은(또는 거의 같은) 질문이 반복되므로
+AI 서버를 부르기 전에 이전 답변을 재사용합니다.
+
+- 키: 정규화한 질문 + 거친 위치 셀(geohash) + 연령대
+- 프로세스 내 LRU + TTL
+- 유사 질문 조회(선택): 같은 셀 안에서 임베딩 코사인 유사도가 임계값 이상이면 재사용
+    hashing               문자 n-gram 해싱 벡터 (기본값, 오프라인, 추가 의존성 없음)
+    sentence-transformers requirements-ai.txt의 모델 사용, faiss가 있으면 faiss 인덱스로 검색
+- 개인화된 질문(나/내/기억/아까..., 시간에 따라 답이 바뀌는 질문)은 캐시를 거치지 않음
+- 적중률 통계: stats()
+
+AI 서버의 대화 메모리(thread_id)를 거치지 않는 답변이므로,
+앞선 대화에 기대는 질문은 모두 우회 규칙에 걸리도록 보수적으로 둡니다.
+"""
+import re
+import threading
+import time
+import unicodedata
+import zlib
+from collections import Counter, OrderedDict
+
+import numpy as np
+from django.conf import settings
+
+from spots.catalog import geohash_encode
+
+HASHING_DIM = 1024
+HASHING_NGRAMS = (1, 2)
+
+# 임베더별 기본 유사도 임계값 (CHATBOT_CACHE_SIMILARITY_THRESHOLD로 덮어씀)
+# hashing은 글자만 비교하므로 장소 이름 하나만 다른 질문(0.8대)과 구분되도록 높게 둡니다.
+DEFAULT_THRESHOLDS = {
+    'hashing': 0.88,
+    'sentence-transformers': 0.93,
+}
+
+# 정규화 시 버리는 군더더기 단어
+FILLER_WORDS = {'혹시', '좀', '그냥', '한번', '저기', '음', '제발'}
+
+# 사용자 본인/앞선 대화를 가리키는 단어 -> 답이 사람마다 다름
+PERSONAL_TOKENS = {
+    '나', '내', '저', '제', '우리', '나의', '저의', '내가', '제가', '우리가', '나를', '저를',
+    '나한테', '저한테', '나에게', '저에게', '날', '절',
+}
+PERSONAL_MARKERS = ('기억', '아까', '방금', '저번', '지난번', '이전에', '그거', '그곳', '거기', '내코스', '내 코스')
+# 시간에 따라 답이 바뀌는 질문
+TIME_MARKERS = ('오늘', '지금', '현재', '내일', '어제', '요즘', '날씨', '실시간')
+
+_PUNCT_RE = re.compile(r'[^\w\s]')
+_SPACE_RE = re.compile(r'\s+')
+
+
+def normalize_question(question):
+    """
+    띄어쓰기/문장부호/대소문자/군더더기 단어/존댓말 어미 차이를 없앤 비교용 문자열
+    "혹시 근처에 갈 만한 곳 알려주세요?" -> "근처에갈만한곳알려줘"
+    """
+    text = unicodedata.normalize('NFKC', str(question)).lower()
+    text = _PUNCT_RE.sub(' ', text)
+    tokens = [t for t in _SPACE_RE.split(text) if t and t not in FILLER_WORDS]
+    text = ''.join(tokens)
+    if text.endswith('주세요'):
+        text = text[:-3] + '줘'
+    elif text.endswith('요') and len(text) > 2:
+        text = text[:-1]
+    return text
+
+
+def bypass_reason(question, user_info=None):
+    """캐시를 거치면 안 되는 질문이면 이유 문자열, 아니면 None"""
+    text = unicodedata.normalize('NFKC', str(question)).lower()
+    if len(text) > settings.CHATBOT_CACHE_MAX_QUESTION_CHARS:
+        return 'long'
+    tokens = set(_SPACE_RE.split(_PUNCT_RE.sub(' ', text)))
+    if tokens & PERSONAL_TOKENS or any(marker in text for marker in PERSONAL_MARKERS):
+        return 'personal'
+    nickname = (user_info or {}).get('nickname')
+    if nickname and len(str(nickname)) >= 2 and str(nickname).lower() in text:
+        return 'personal'
+    if any(marker in text for marker in TIME_MARKERS):
+        return 'time'
+    return None
+
+
+def location_cell(location, precision=None):
+    """위치를 geohash 셀로 (기본 5자리, 약 5km). 위치가 없으면 '-'"""
+    if not location:
+        return '-'
+    precision = precision or settings.CHATBOT_CACHE_GEOHASH_PRECISION
+    return geohash_encode(location['lat'], location['lng'], precision)
+
+
+# --- 임베더 ---
+class HashingEmbedder:
+    """문자 n-gram을 고정 차원에 해싱한 L2 정규화 벡터 (모델 없이 오프라인에서 동작)"""
+    name = 'hashing'
+
+    def __init__(self, dim=HASHING_DIM, ngrams=HASHING_NGRAMS):
+        self.dim = dim
+        self.ngrams = ngrams
+
+    def encode(self, text):
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for n in self.ngrams:
+            for i in range(len(text) - n + 1):
+                gram = text[i:i + n].encode()
+                # crc32는 프로세스마다 같은 값 (hash()는 실행마다 달라짐)
+                vector[zlib.crc32(gram) % self.dim] += 1.0
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+
+class SentenceTransformerEmbedder:
+    """sentence-transformers 문장 임베딩 (requirements-ai.txt)"""
+    name = 'sentence-transformers'
+
+    def __init__(self, model_name):
+        from sentence_transformers import SentenceTransformer
+        self._model = SentenceTransformer(model_name)
+        self.dim = self._model.get_sentence_embedding_dimension()
+
+    def encode(self, text):
+        return self._model.encode([text], normalize_embeddings=True)[0].astype(np.float32)
+
+
+# --- 셀별 벡터 인덱스 (정규화 벡터의 내적 = 코사인 유사도) ---
+class NumpyIndex:
+    def __init__(self, dim):
+        self.dim = dim
+        self._vectors = {}
+        self._matrix = None
+        self._ids = None
+
+    def __len__(self):
+        return len(self._vectors)
+
+    def add(self, vector_id, vector):
+        self._vectors[vector_id] = vector
+        self._matrix = None
+
+    def remove(self, vector_id):
+        if self._vectors.pop(vector_id, None) is not None:
+            self._matrix = None
+
+    def search(self, vector):
+        if not self._vectors:
+            return None, 0.0
+        if self._matrix is None:
+            self._ids = list(self._vectors)
+            self._matrix = np.stack([self._vectors[i] for i in self._ids])
+        scores = self._matrix @ vector
+        best = int(np.argmax(scores))
+        return self._ids[best], float(scores[best])
+
+
+class FaissIndex:
+    def __init__(self, dim):
+        import faiss
+        self._index = faiss.IndexIDMap2(faiss.IndexFlatIP(dim))
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def add(self, vector_id, vector):
+        self._index.add_with_ids(vector.reshape(1, -1), np.array([vector_id], dtype=np.int64))
+        self._size += 1
+
+    def remove(self, vector_id):
+        self._size -= self._index.remove_ids(np.array([vector_id], dtype=np.int64))
+
+    def search(self, vector):
+        if not self._size:
+            return None, 0.0
+        scores, ids = self._index.search(vector.reshape(1, -1), 1)
+        if ids[0][0] < 0:
+            return None, 0.0
+        return int(ids[0][0]), float(scores[0][0])
+
+
+def _faiss_available():
+    try:
+        import faiss  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def build_embedder(kind):
+    """
+    CHATBOT_CACHE_SIMILARITY 값으로 임베더 생성
+    sentence-transformers를 불러올 수 없으면 hashing으로 대체, 'off'면 None
+    """
+    if kind in (None, '', 'off'):
+        return None
+    if kind == 'sentence-transformers':
+        try:
+            return SentenceTransformerEmbedder(settings.CHATBOT_CACHE_EMBEDDING_MODEL)
+        except Exception as e:
+            print(f"[chatbot] sentence-transformers 임베더를 불러오지 못해 hashing으로 대체합니다: {e}")
+    return HashingEmbedder()
+
+
+class _Entry:
+    __slots__ = ('answer', 'cell', 'expires_at', 'vector_id')
+
+    def __init__(self, answer, cell, expires_at, vector_id):
+        self.answer = answer
+        self.cell = cell
+        self.expires_at = expires_at
+        self.vector_id = vector_id
+
+
+class AnswerCache:
+    HIT = 'hit'
+    SIMILAR = 'similar'
+    MISS = 'miss'
+    BYPASS = 'bypass'
+
+    def __init__(self, max_entries=2000, ttl=6 * 3600, embedder=None, threshold=None, use_faiss=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.embedder = embedder
+        self.threshold = threshold if threshold is not None else (
+            DEFAULT_THRESHOLDS.get(embedder.name, 0.9) if embedder else None
+        )
+        self._index_class = FaissIndex if (use_faiss if use_faiss is not None else _faiss_available()) else NumpyIndex
+        self._entries = OrderedDict()  # (cell, normalized) -> _Entry, 오래 안 쓴 순
+        self._indexes = {}  # cell -> 벡터 인덱스
+        self._vector_keys = {}  # vector_id -> (cell, normalized)
+        self._next_vector_id = 0
+        self._counters = Counter()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def cell_for(payload):
+        """위치 셀 + 연령대 (연령대에 따라 추천이 달라질 수 있음)"""
+        age_group = (payload.get('user_info') or {}).get('age_group') or '-'
+        return f"{location_cell(payload.get('user_location'))}|{age_group}"
+
+    def lookup(self, payload):
+        """
+        Returns:
+            tuple: (상태, 답변 또는 None) - 상태는 hit/similar/miss/bypass
+        """
+        reason = bypass_reason(payload['user_question'], payload.get('user_info'))
+        if reason:
+            with self._lock:
+                self._counters['bypass'] += 1
+                self._counters[f'bypass_{reason}'] += 1
+            return self.BYPASS, None
+
+        cell = self.cell_for(payload)
+        normalized = normalize_question(payload['user_question'])
+        key = (cell, normalized)
+        now = time.monotonic()
+
+        with self._lock:
+            self._counters['lookups'] += 1
+            entry = self._live_entry(key, now)
+            if entry is not None:
+                self._counters['exact_hits'] += 1
+                return self.HIT, entry.answer
+            has_candidates = self.embedder is not None and len(self._indexes.get(cell, ())) > 0
+
+        # 임베딩 계산은 잠금 밖에서 (sentence-transformers는 수십 ms 걸릴 수 있음)
+        if has_candidates:
+            vector = self.embedder.encode(normalized)
+            with self._lock:
+                index = self._indexes.get(cell)
+                vector_id, score = index.search(vector) if index is not None else (None, 0.0)
+                if vector_id is not None and score >= self.threshold:
+                    entry = self._live_entry(self._vector_keys.get(vector_id), now)
+                    if entry is not None:
+                        self._counters['similar_hits'] += 1
+                        return self.SIMILAR, entry.answer
+
+        with self._lock:
+            self._counters['misses'] += 1
+        return self.MISS, None
+
+    def store(self, payload, answer):
+        """
+        AI 서버의 정상 답변 저장
+        우회 대상이거나, 답변에 사용자 닉네임이 들어 있거나, 진행 중인 코스 정보를 받고 만든 답변이면 저장하지 않음
+        """
+        if not answer or bypass_reason(payload['user_question'], payload.get('user_info')):
+            return False
+        nickname = (payload.get('user_info') or {}).get('nickname')
+        if nickname and str(nickname) in answer:
+            return False
+        # 진행 중인 코스 컨텍스트를 받고 만든 답변은 그 사용자의 코스를 언급할 수 있음
+        if (payload.get('context') or {}).get('active_course'):
+            return False
+
+        cell = self.cell_for(payload)
+        normalized = normalize_question(payload['user_question'])
+        key = (cell, normalized)
+        vector = self.embedder.encode(normalized) if self.embedder is not None else None
+
+        with self._lock:
+            self._remove(key)
+            vector_id = None
+            if vector is not None:
+                vector_id = self._next_vector_id
+                self._next_vector_id += 1
+                index = self._indexes.get(cell)
+                if index is None:
+                    index = self._indexes[cell] = self._index_class(len(vector))
+                index.add(vector_id, vector)
+                self._vector_keys[vector_id] = key
+            self._entries[key] = _Entry(answer, cell, time.monotonic() + self.ttl, vector_id)
+            self._counters['stores'] += 1
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self._counters['evictions'] += 1
+        return True
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._indexes.clear()
+            self._vector_keys.clear()
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self._counters)
+            size = len(self._entries)
+        lookups = counters.get('lookups', 0)
+        hits = counters.get('exact_hits', 0) + counters.get('similar_hits', 0)
+        return {
+            'size': size,
+            'max_entries': self.max_entries,
+            'ttl_seconds': self.ttl,
+            'similarity': self.embedder.name if self.embedder else 'off',
+            'threshold': self.threshold,
+            'index': self._index_class.__name__,
+            'hit_rate': round(hits / lookups, 4) if lookups else 0.0,
+            **{name: counters.get(name, 0) for name in (
+                'lookups', 'exact_hits', 'similar_hits', 'misses', 'bypass', 'stores', 'evictions', 'expired'
+            )},
+            'bypass_reasons': {
+                name[len('bypass_'):]: count for name, count in counters.items() if name.startswith('bypass_')
+            },
+        }
+
+    # 아래는 self._lock을 잡은 상태에서만 호출
+    def _live_entry(self, key, now):
+        entry = self._entries.get(key) if key is not None else None
+        if entry is None:
+            return None
+        if entry.expires_at <= now:
+            self._remove(key)
+            self._counters['expired'] += 1
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None or entry.vector_id is None:
+            return
+        self._vector_keys.pop(entry.vector_id, None)
+        index = self._indexes.get(entry.cell)
+        if index is not None:
+            index.remove(entry.vector_id)
+            if not len(index):
+                del self._indexes[entry.cell]
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """설정으로 만든 프로세스 공용 캐시. CHATBOT_CACHE_ENABLED가 꺼져 있으면 None"""
+    global _cache
+    if not settings.CHATBOT_CACHE_ENABLED:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = AnswerCache(
+                    max_entries=settings.CHATBOT_CACHE_MAX_ENTRIES,
+                    ttl=settings.CHATBOT_CACHE_TTL,
+                    embedder=build_embedder(settings.CHATBOT_CACHE_SIMILARITY),
+                    threshold=settings.CHATBOT_CACHE_SIMILARITY_THRESHOLD,
+                )
+    return _cache
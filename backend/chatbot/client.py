@@ -0,0 +1,426 @@
+"""
+FastAPI AI 서버 공용 클라이언트
+- 연결 풀 재사용: 동기 httpx.Client 하나 + ASGI 서버 루프의 httpx.AsyncClient (그 밖의 루프는 호출마다 만들고 닫음)
+- 서킷 브레이커: 연속 실패가 쌓이면 일정 시간 바로 실패(open), 이후 한 요청만 시험(half-open)
+- 벌크헤드: 프로세스당 동시 요청 수 제한 + 짧은 대기열, 넘치면 바로 실패
+- 멱등 요청(GET/DELETE 등)만 지터를 둔 제한적 재시도
+- 백그라운드 상태 감시(chatbot.health)가 AI 서버 다운을 확인했으면 호출 없이 바로 실패
+
+AI 서버가 느려져도 챗봇 요청만 빠르게 실패하고 나머지 API의 워커는 묶이지 않습니다.
+"""
+import asyncio
+import random
+import threading
+import time
+import weakref
+from contextlib import asynccontextmanager, contextmanager
+
+import httpx
+from django.conf import settings
+
+from timetraveler import tracing
+
+from .health import monitor
+
+CHAT_TIMEOUT = httpx.Timeout(30.0, connect=3.0)  # read는 청크 사이 대기 시간 기준
+CHAT_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=20)
+IDEMPOTENT_METHODS = {'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'}
+RETRYABLE_STATUSES = {502, 503, 504}
+RETRY_BASE_DELAY = 0.2
+RETRY_MAX_DELAY = 2.0
+
+
+class AIServerUnavailable(Exception):
+    """AI 서버를 호출하지 않고 바로 실패한 경우 (서킷 open, 벌크헤드 포화)"""
+
+    def __init__(self, message, retry_after=1):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class CircuitOpenError(AIServerUnavailable):
+    pass
+
+
+class BulkheadFullError(AIServerUnavailable):
+    pass
+
+
+class AIServerDownError(AIServerUnavailable):
+    pass
+
+
+def check_health():
+    """상태 감시 결과 AI 서버가 다운이면 AIServerDownError (감시 스레드는 여기서 시작)"""
+    monitor.ensure_started()
+    if monitor.is_down():
+        raise AIServerDownError("AI 서버가 응답하지 않고 있습니다.", retry_after=max(1, round(monitor.interval)))
+
+
+# --- 1. 서킷 브레이커 ---
+class CircuitBreaker:
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                return self.HALF_OPEN
+            return self._state
+
+    def before_call(self):
+        """호출 가능하면 시험 요청(half-open)인지 여부를 반환, 아니면 CircuitOpenError"""
+        with self._lock:
+            if self._state == self.CLOSED:
+                return False
+            remaining = self.reset_timeout - (time.monotonic() - self._opened_at)
+            if self._state == self.OPEN and remaining > 0:
+                raise CircuitOpenError("AI 서버 장애로 잠시 요청을 보내지 않습니다.", retry_after=max(1, round(remaining)))
+            # half-open: 시험 요청은 한 번에 하나만
+            if self._probe_in_flight:
+                raise CircuitOpenError("AI 서버 상태를 확인하는 중입니다.", retry_after=1)
+            self._state = self.HALF_OPEN
+            self._probe_in_flight = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._probe_in_flight = False
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    print(f"[chatbot] AI 서버 서킷 open (연속 실패 {self._failures}회)")
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+
+    def record_cancel(self):
+        """결과 없이 끝난 호출 (벌크헤드 포화 등) - 시험 요청 자리만 돌려줌"""
+        with self._lock:
+            self._probe_in_flight = False
+
+    @contextmanager
+    def attempt(self):
+        """
+        before_call()부터 결과 기록까지 한 번의 호출을 감쌉니다.
+        시험 요청이 결과를 기록하지 못하고 끝나면(취소, 예상 못 한 예외 등) 자리를 돌려줘서
+        half-open 상태에 계속 갇히지 않게 합니다.
+        """
+        outcome = _Attempt(self, self.before_call())
+        try:
+            yield outcome
+        finally:
+            if outcome.probe and not outcome.recorded:
+                self.record_cancel()
+
+
+class _Attempt:
+    """CircuitBreaker.attempt()의 호출 한 번 결과"""
+
+    def __init__(self, breaker, probe):
+        self.breaker = breaker
+        self.probe = probe
+        self.recorded = False
+        self.failed = False
+
+    def success(self):
+        self.recorded = True
+        self.breaker.record_success()
+
+    def failure(self):
+        """실패는 호출 한 번에 한 번만 셉니다 (예: 5xx 응답 후 본문 읽기 중 끊김)"""
+        self.recorded = True
+        if not self.failed:
+            self.failed = True
+            self.breaker.record_failure()
+
+    def cancel(self):
+        self.recorded = True
+        if self.probe:
+            self.breaker.record_cancel()
+
+
+# --- 2. 벌크헤드 ---
+class Bulkhead:
+    """
+    동시 실행 max_concurrent개, 대기 max_queue개까지 허용합니다.
+    대기열이 가득 찼거나 queue_timeout 안에 자리가 나지 않으면 BulkheadFullError.
+    스레드(동기 뷰)와 이벤트 루프(비동기 뷰)가 같은 한도를 공유합니다.
+    """
+
+    ASYNC_POLL_INTERVAL = 0.02
+
+    def __init__(self, max_concurrent=32, max_queue=16, queue_timeout=2.0):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self.waiting = 0
+        self._cond = threading.Condition()
+
+    def _try_acquire(self):
+        if self.active < self.max_concurrent:
+            self.active += 1
+            return True
+        return False
+
+    def _full(self):
+        return BulkheadFullError("AI 서버 요청이 많아 잠시 후 다시 시도해주세요.", retry_after=1)
+
+    def _release(self):
+        with self._cond:
+            self.active -= 1
+            self._cond.notify()
+
+    @contextmanager
+    def slot(self):
+        with self._cond:
+            if not self._try_acquire():
+                if self.waiting >= self.max_queue:
+                    raise self._full()
+                self.waiting += 1
+                try:
+                    acquired = self._cond.wait_for(self._try_acquire, timeout=self.queue_timeout)
+                finally:
+                    self.waiting -= 1
+                if not acquired:
+                    raise self._full()
+        try:
+            yield
+        finally:
+            self._release()
+
+    @asynccontextmanager
+    async def aslot(self):
+        with self._cond:
+            acquired = self._try_acquire()
+            if not acquired:
+                if self.waiting >= self.max_queue:
+                    raise self._full()
+                self.waiting += 1
+        if not acquired:
+            deadline = time.monotonic() + self.queue_timeout
+            try:
+                while True:
+                    await asyncio.sleep(self.ASYNC_POLL_INTERVAL)
+                    with self._cond:
+                        if self._try_acquire():
+                            break
+                    if time.monotonic() >= deadline:
+                        raise self._full()
+            finally:
+                with self._cond:
+                    self.waiting -= 1
+        try:
+            yield
+        finally:
+            self._release()
+
+
+breaker = CircuitBreaker(
+    failure_threshold=settings.AI_SERVER_BREAKER_THRESHOLD,
+    reset_timeout=settings.AI_SERVER_BREAKER_RESET_SECONDS,
+)
+bulkhead = Bulkhead(
+    max_concurrent=settings.AI_SERVER_MAX_CONCURRENT,
+    max_queue=settings.AI_SERVER_MAX_QUEUE,
+    queue_timeout=settings.AI_SERVER_QUEUE_TIMEOUT,
+)
+
+
+# --- 3. HTTP 클라이언트 ---
+_clients = weakref.WeakKeyDictionary()
+_sync_client = None
+_sync_client_lock = threading.Lock()
+
+
+def _client_options():
+    return {
+        'base_url': settings.FASTAPI_AI_SERVER_URL,
+        'timeout': CHAT_TIMEOUT,
+        'limits': CHAT_LIMITS,
+        'headers': {'Content-Type': 'application/json'},
+    }
+
+
+def get_client():
+    """
+    현재 이벤트 루프용 AI 서버 비동기 클라이언트 (연결 풀 공유)
+    ASGI 서버(uvicorn)처럼 메인 스레드에서 계속 도는 루프에서만 만들 수 있습니다.
+    WSGI에서 비동기 뷰를 실행하면 요청마다 새 루프가 생겼다 닫히므로 그런 루프에서는 RuntimeError.
+    """
+    loop = asyncio.get_running_loop()
+    if not _is_long_lived(loop):
+        raise RuntimeError("AI 서버 공유 클라이언트는 ASGI 서버의 이벤트 루프에서만 사용할 수 있습니다.")
+    client = _clients.get(loop)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(**_client_options())
+        _clients[loop] = client
+    return client
+
+
+def _is_long_lived(loop):
+    # uvicorn/gunicorn 워커는 메인 스레드에서 루프 하나를 프로세스가 끝날 때까지 돌림.
+    # asgiref의 async_to_sync(WSGI + 비동기 뷰)는 요청마다 다른 스레드에 루프를 만들고 닫음
+    return threading.current_thread() is threading.main_thread()
+
+
+@asynccontextmanager
+async def _async_client():
+    """공유 클라이언트를 쓸 수 없는 루프에서는 호출마다 클라이언트를 만들고 끝나면 닫습니다."""
+    if _is_long_lived(asyncio.get_running_loop()):
+        yield get_client()
+        return
+    async with httpx.AsyncClient(**_client_options()) as client:
+        yield client
+
+
+def get_sync_client():
+    global _sync_client
+    with _sync_client_lock:
+        if _sync_client is None or _sync_client.is_closed:
+            _sync_client = httpx.Client(**_client_options())
+        return _sync_client
+
+
+def _retry_delay(attempt):
+    """full jitter 지수 백오프"""
+    return random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * (2 ** attempt)))
+
+
+def _max_retries(method, idempotent):
+    if idempotent is None:
+        idempotent = method.upper() in IDEMPOTENT_METHODS
+    return settings.AI_SERVER_MAX_RETRIES if idempotent else 0
+
+
+def _is_server_failure(response):
+    return response.status_code >= 500
+
+
+def _traced(kwargs, callback):
+    """request id / traceparent 헤더와 구간별 시간 기록용 httpx trace 확장을 붙입니다."""
+    kwargs['headers'] = {**tracing.outbound_headers(), **(kwargs.get('headers') or {})}
+    kwargs['extensions'] = {**(kwargs.get('extensions') or {}), 'trace': callback}
+    return kwargs
+
+
+def request(method, path, idempotent=None, **kwargs):
+    """
+    동기 요청 (서킷 브레이커 + 벌크헤드 + 멱등 요청 재시도)
+    현재 요청의 trace 헤더를 전달하고 구간별 시간(ai-queue/connect/ttfb, ai)을 기록합니다.
+
+    Raises:
+        AIServerUnavailable: AI 서버 다운 확인, 서킷 open 또는 벌크헤드 포화
+        httpx.HTTPError: 전송 오류 (재시도 후)
+    """
+    with tracing.hop('ai') as hop:
+        check_health()
+        kwargs = _traced(kwargs, hop.trace)
+        retries = _max_retries(method, idempotent)
+        for attempt in range(retries + 1):
+            with breaker.attempt() as outcome:
+                hop.begin_attempt()
+                try:
+                    with bulkhead.slot():
+                        hop.acquired()
+                        response = get_sync_client().request(method, path, **kwargs)
+                except AIServerUnavailable:
+                    outcome.cancel()
+                    raise
+                except httpx.TransportError:
+                    outcome.failure()
+                    if attempt < retries:
+                        time.sleep(_retry_delay(attempt))
+                        continue
+                    raise
+                hop.status = response.status_code
+                if _is_server_failure(response):
+                    outcome.failure()
+                    if attempt < retries and response.status_code in RETRYABLE_STATUSES:
+                        time.sleep(_retry_delay(attempt))
+                        continue
+                else:
+                    outcome.success()
+                return response
+
+
+async def arequest(method, path, idempotent=None, **kwargs):
+    """비동기 요청. 동작은 request()와 같습니다."""
+    with tracing.hop('ai') as hop:
+        check_health()
+        kwargs = _traced(kwargs, hop.atrace)
+        retries = _max_retries(method, idempotent)
+        for attempt in range(retries + 1):
+            with breaker.attempt() as outcome:
+                hop.begin_attempt()
+                try:
+                    async with bulkhead.aslot():
+                        hop.acquired()
+                        async with _async_client() as client:
+                            response = await client.request(method, path, **kwargs)
+                except AIServerUnavailable:
+                    outcome.cancel()
+                    raise
+                except httpx.TransportError:
+                    outcome.failure()
+                    if attempt < retries:
+                        await asyncio.sleep(_retry_delay(attempt))
+                        continue
+                    raise
+                hop.status = response.status_code
+                if _is_server_failure(response):
+                    outcome.failure()
+                    if attempt < retries and response.status_code in RETRYABLE_STATUSES:
+                        await asyncio.sleep(_retry_delay(attempt))
+                        continue
+                else:
+                    outcome.success()
+                return response
+
+
+@asynccontextmanager
+async def astream(method, path, **kwargs):
+    """
+    스트리밍 요청 (재시도 없음). 응답 헤더를 받은 시점에 브레이커에 결과를 기록하고,
+    본문을 다 읽을 때까지 벌크헤드 자리를 유지합니다. ai 구간 시간도 본문을 다 읽은 시점까지입니다.
+    본문을 읽다 연결이 끊기면 실패로 기록하되, 응답 헤더에서 이미 실패로 기록했으면 다시 세지 않습니다.
+    """
+    with tracing.hop('ai') as hop:
+        check_health()
+        kwargs = _traced(kwargs, hop.atrace)
+        with breaker.attempt() as outcome:
+            hop.begin_attempt()
+            try:
+                async with bulkhead.aslot():
+                    hop.acquired()
+                    try:
+                        async with _async_client() as client, client.stream(method, path, **kwargs) as response:
+                            hop.status = response.status_code
+                            if _is_server_failure(response):
+                                outcome.failure()
+                            else:
+                                outcome.success()
+                            yield response
+                    except httpx.TransportError:
+                        outcome.failure()
+                        raise
+            except AIServerUnavailable:
+                outcome.cancel()
+                raise
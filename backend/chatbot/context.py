@@ -0,0 +1,72 @@
+"""
+챗봇 컨텍스트 블록
+AI 서버가 매 턴 주변 스팟을 직접 검색하지 않도록, Django가 메모리 인덱스에서 만든 요약을
+payload["context"]로 함께 보냅니다.
+    nearby_spots   가까운 스팟 k개 (거리, 태그, 운영시간/지금 운영 여부, 미션 가능 여부)
+    active_course  진행 중인 코스 (진행률, 다음 목적지와 거리)
+
+스팟별 고정 정보는 카탈로그 버전마다 한 번만 만들고, 코스 상태는 courses.geofence의
+사용자별 미해제 스팟 인덱스를 그대로 씁니다. DB는 인덱스가 무효화됐을 때만 조회합니다.
+"""
+from django.conf import settings
+
+from courses.geofence import get_pending_index
+from spots import hours as spot_hours
+from spots.catalog import TAG_FIELDS, get_catalog
+
+_spot_summaries = (None, [])
+
+
+def _summaries(catalog):
+    """카탈로그 순서대로 스팟별 고정 요약 (카탈로그 버전마다 한 번 생성)"""
+    global _spot_summaries
+    version, summaries = _spot_summaries
+    if version != catalog.version:
+        summaries = []
+        for i, spot in enumerate(catalog.spots):
+            bits = int(catalog.tag_bits[i])
+            summaries.append({
+                'id': spot['id'],
+                'name': spot['name'],
+                'address': spot.get('address') or '',
+                'tags': [tag for bit, tag in enumerate(TAG_FIELDS) if bits >> bit & 1],
+                'mission_available': bool(catalog.mission[i]),
+            })
+        _spot_summaries = (catalog.version, summaries)
+    return summaries
+
+
+def nearby_spots(catalog, lat, lng, k):
+    now = spot_hours.local_now()
+    minute = spot_hours.minute_of_day(now)
+    hours = spot_hours.catalog_hours(catalog, now.month)
+    summaries = _summaries(catalog)
+    spots = []
+    for i, distance in catalog.nearest(lat, lng, k=k):
+        spots.append({
+            **summaries[i],
+            'distance_m': round(distance * 1000),
+            'hours': hours[i].label,
+            'open_now': spot_hours.is_open(hours[i], minute, now.weekday()),
+        })
+    return spots
+
+
+def build_context(payload, user_id):
+    """
+    payload에 붙일 컨텍스트 블록. 카탈로그가 없고 진행 중인 코스도 없으면 None
+    ORM을 쓰므로 동기 코드에서 호출합니다.
+    """
+    location = payload.get('user_location')
+    position = (location['lat'], location['lng']) if location else None
+    context = {}
+
+    catalog = get_catalog()
+    if catalog is not None and len(catalog) and position is not None:
+        context['catalog_version'] = catalog.version
+        context['nearby_spots'] = nearby_spots(catalog, *position, k=settings.CHATBOT_CONTEXT_SPOTS)
+
+    course = get_pending_index(user_id).active_course(position)
+    if course is not None:
+        context['active_course'] = course
+    return context or None
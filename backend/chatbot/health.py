@@ -0,0 +1,167 @@
+"""
+AI 서버 상태 감시
+프로세스마다 백그라운드 스레드 하나가 AI_HEALTH_INTERVAL초 간격으로 GET /health를 호출해
+공유 상태(최근 결과, 지연 시간 기록)를 갱신합니다.
+
+- health_check 뷰는 요청마다 AI 서버를 부르지 않고 이 상태로 바로 답합니다.
+- 연속 실패가 AI_HEALTH_FAILURE_THRESHOLD회 이상이면 chatbot.client가 AI 서버를 부르지 않고 바로 실패합니다.
+- 스레드는 처음 사용할 때 시작합니다 (manage.py 명령에서는 시작하지 않음).
+"""
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+
+import httpx
+from django.conf import settings
+
+UNKNOWN = 'unknown'
+STARTING = 'starting'  # 감시 스레드는 돌고 있지만 첫 확인 결과가 아직 없음
+HEALTHY = 'healthy'
+UNHEALTHY = 'unhealthy'
+
+STALE_INTERVALS = 3  # 이 간격 수만큼 결과가 없으면 감시 스레드가 멈춘 것으로 보고 unknown
+
+
+def _percentile(sorted_values, q):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, round(q * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def _classify(error):
+    """예외 -> health_check 응답의 ai_server 값"""
+    if isinstance(error, httpx.TimeoutException):
+        return 'timeout'
+    if isinstance(error, httpx.ConnectError):
+        return 'disconnected'
+    return 'error'
+
+
+def _describe(error):
+    if isinstance(error, httpx.HTTPStatusError):
+        return f"HTTP {error.response.status_code}"
+    return str(error) or error.__class__.__name__
+
+
+class HealthMonitor:
+    def __init__(self, interval=10.0, timeout=3.0, failure_threshold=2, history_size=60):
+        self.interval = interval
+        self.timeout = timeout
+        self.failure_threshold = failure_threshold
+        self.history = deque(maxlen=history_size)  # (checked_at epoch, ok, latency_ms)
+        self._status = UNKNOWN
+        self._ai_server = UNKNOWN
+        self._error = None
+        self._checked_at = None  # monotonic
+        self._consecutive_failures = 0
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+
+    # --- 감시 스레드 ---
+    def ensure_started(self):
+        """감시 스레드가 없으면 시작합니다 (AI 서버 URL이 없으면 시작하지 않음)"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        if not settings.FASTAPI_AI_SERVER_URL:
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='ai-health-prober', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        with httpx.Client(base_url=settings.FASTAPI_AI_SERVER_URL, timeout=self.timeout) as client:
+            while True:
+                self.probe(client)
+                if self._stop.wait(self.interval):
+                    return
+
+    def probe(self, client):
+        """GET /health 한 번 호출하고 결과를 기록합니다."""
+        started = time.perf_counter()
+        try:
+            response = client.get('/health')
+            response.raise_for_status()
+        except Exception as e:
+            self.record(False, (time.perf_counter() - started) * 1000, e)
+        else:
+            self.record(True, (time.perf_counter() - started) * 1000)
+
+    def record(self, ok, latency_ms, error=None):
+        with self._lock:
+            previous = self._status
+            self.history.append((time.time(), ok, round(latency_ms, 1)))
+            self._checked_at = time.monotonic()
+            if ok:
+                self._status, self._ai_server, self._error = HEALTHY, 'connected', None
+                self._consecutive_failures = 0
+            else:
+                self._status, self._ai_server, self._error = UNHEALTHY, _classify(error), _describe(error)
+                self._consecutive_failures += 1
+            current = self._status
+        if previous != current and previous != UNKNOWN:
+            print(f"[chatbot] AI 서버 상태 변경: {previous} -> {current}" + (f" ({_describe(error)})" if error else ""))
+
+    # --- 조회 ---
+    def _fresh(self):
+        return self._checked_at is not None and time.monotonic() - self._checked_at <= self.interval * STALE_INTERVALS
+
+    def is_down(self):
+        """최근 감시 결과로 AI 서버가 내려갔다고 판단되면 True (결과가 오래됐으면 False)"""
+        with self._lock:
+            return self._fresh() and self._consecutive_failures >= self.failure_threshold
+
+    def _starting(self):
+        return self._checked_at is None and self._thread is not None and self._thread.is_alive()
+
+    def snapshot(self, include_history=False):
+        with self._lock:
+            fresh = self._fresh()
+            history = list(self.history)
+            current = STARTING if self._starting() else UNKNOWN
+            data = {
+                'status': self._status if fresh else current,
+                'ai_server': self._ai_server if fresh else current,
+                'checked_at': (
+                    datetime.fromtimestamp(history[-1][0], timezone.utc).isoformat() if history else None
+                ),
+                'age_seconds': (
+                    round(time.monotonic() - self._checked_at, 1) if self._checked_at is not None else None
+                ),
+                'consecutive_failures': self._consecutive_failures,
+                'interval_seconds': self.interval,
+            }
+            if self._error and fresh:
+                data['error'] = self._error
+
+        latencies = sorted(latency for _, ok, latency in history if ok)
+        data['latency_ms'] = {
+            'last': history[-1][2] if history else None,
+            'p50': _percentile(latencies, 0.5),
+            'p95': _percentile(latencies, 0.95),
+            'avg': round(sum(latencies) / len(latencies), 1) if latencies else None,
+            'samples': len(history),
+        }
+        data['success_rate'] = round(sum(1 for _, ok, _ in history if ok) / len(history), 3) if history else None
+        if include_history:
+            data['history'] = [
+                {'at': datetime.fromtimestamp(at, timezone.utc).isoformat(), 'ok': ok, 'latency_ms': latency}
+                for at, ok, latency in history
+            ]
+        return data
+
+
+monitor = HealthMonitor(
+    interval=settings.AI_HEALTH_INTERVAL,
+    timeout=settings.AI_HEALTH_TIMEOUT,
+    failure_threshold=settings.AI_HEALTH_FAILURE_THRESHOLD,
+    history_size=settings.AI_HEALTH_HISTORY,
+)
@@ -0,0 +1,219 @@
+"""
+카탈로그 기반 의도 라우터
+스팟 카탈로그만으로 정확히 답할 수 있는 질문은 AI 서버를 부르지 않고 바로 답합니다.
+    nearest_mission  "가장 가까운 미션 장소"      위치 + 미션 마스크
+    nearest          "제일 가까운 관광지"          위치
+    open_now         "지금 열려있는 곳"            위치 + 운영시간(spots.hours)
+    address          "월미공원 주소 알려줘"        질문 속 스팟 이름
+    hours            "홍예문 운영시간"             질문 속 스팟 이름
+
+AI 서버가 응답하지 못할 때는 answer(..., degraded=True)로 같은 의도에 답하고,
+의도가 없어도 위치가 있으면 가까운 장소 목록을 대신 보냅니다.
+"""
+import re
+from collections import namedtuple
+
+import numpy as np
+
+from spots import hours as spot_hours
+from spots.catalog import get_catalog
+
+from .answer_cache import normalize_question
+
+NEAREST_MISSION = 'nearest_mission'
+NEAREST = 'nearest'
+OPEN_NOW = 'open_now'
+ADDRESS = 'address'
+HOURS = 'hours'
+FALLBACK = 'fallback'
+
+OPEN_NOW_RADIUS_KM = 3.0
+OPEN_NOW_LIMIT = 5
+ALTERNATIVES = 2
+
+NEAR_WORDS = ('가까운', '근처', '주변', '가까이')
+PLACE_WORDS = ('곳', '장소', '관광지', '명소', '스팟', '여행지', '데')
+OPEN_WORDS = ('열려있', '열린곳', '열린장소', '문연', '문열', '영업중', '운영중', '개방중', '갈수있는곳')
+ADDRESS_WORDS = ('주소', '어디에있', '위치가어디', '위치알려')
+HOURS_WORDS = (
+    '운영시간', '영업시간', '개방시간', '관람시간', '이용시간', '여는시간', '닫는시간', '문닫', '휴무', '휴관', '쉬는날',
+)
+# "몇 시"는 여닫는 시간을 묻는 경우만 ("몇 시에 출발하면 좋아?", "몇 시간 걸려?"는 운영시간 질문이 아님)
+_HOURS_ASK_RE = re.compile(r'몇시(?:에|부터|까지)?문?(?:열|닫|오픈|마감|입장|까지|부터)')
+
+_PAREN_RE = re.compile(r'\([^)]*\)')
+
+LocalAnswer = namedtuple('LocalAnswer', ['intent', 'text'])
+
+
+def _has(text, words):
+    return any(word in text for word in words)
+
+
+def detect_intent(question):
+    """정규화한 질문에서 의도를 찾습니다. 해당 없으면 None"""
+    text = normalize_question(question)
+    if '미션' in text and (_has(text, NEAR_WORDS) or '어디' in text):
+        return NEAREST_MISSION
+    if _HOURS_ASK_RE.search(text):  # "몇 시에 문 열어?"는 지금 열린 곳이 아니라 운영시간 질문
+        return HOURS
+    if _has(text, OPEN_WORDS):
+        return OPEN_NOW
+    if _has(text, HOURS_WORDS):
+        return HOURS
+    if _has(text, ADDRESS_WORDS):
+        return ADDRESS
+    if ('가장가까운' in text or '제일가까운' in text) and _has(text, PLACE_WORDS):
+        return NEAREST
+    return None
+
+
+_name_index = (None, [])
+
+
+def _names(catalog):
+    """(정규화한 이름, 스팟 인덱스) 목록, 긴 이름부터 (카탈로그 버전마다 한 번 생성)"""
+    global _name_index
+    version, names = _name_index
+    if version != catalog.version:
+        names = []
+        for i, spot in enumerate(catalog.spots):
+            full = normalize_question(spot['name'])
+            for alias in {full, normalize_question(_PAREN_RE.sub('', spot['name']))}:
+                if len(alias) >= 2:
+                    names.append((alias, i))
+        names.sort(key=lambda item: -len(item[0]))
+        _name_index = (catalog.version, names)
+    return names
+
+
+def find_spot(catalog, question):
+    """질문에 이름이 들어 있는 스팟 인덱스 (가장 긴 이름 우선). 없으면 None"""
+    text = normalize_question(question)
+    for alias, i in _names(catalog):
+        if alias in text:
+            return i
+    return None
+
+
+def format_distance(km):
+    if km < 1:
+        return f"약 {int(round(km * 1000, -1))}m"
+    return f"약 {km:.1f}km"
+
+
+def _location(payload):
+    location = payload.get('user_location')
+    return (location['lat'], location['lng']) if location else None
+
+
+def _nearest_text(catalog, nearest, title):
+    (first, distance), rest = nearest[0], nearest[1:]
+    spot = catalog.spots[first]
+    lines = [f"{title}는 '{spot['name']}'입니다 ({format_distance(distance)})."]
+    if spot.get('address'):
+        lines.append(f"주소: {spot['address']}")
+    if rest:
+        lines.append("다른 곳: " + ", ".join(
+            f"{catalog.spots[i]['name']} ({format_distance(d)})" for i, d in rest
+        ))
+    return "\n".join(lines)
+
+
+def _answer_nearest(catalog, payload, mission_only):
+    location = _location(payload)
+    if location is None:
+        return None
+    nearest = catalog.nearest(*location, k=1 + ALTERNATIVES, mask=catalog.mission if mission_only else None)
+    if not nearest:
+        return None
+    return _nearest_text(catalog, nearest, "가장 가까운 미션 장소" if mission_only else "가장 가까운 장소")
+
+
+def _answer_open_now(catalog, payload):
+    location = _location(payload)
+    if location is None:
+        return None
+    now = spot_hours.local_now()
+    minute = spot_hours.minute_of_day(now)
+    hours = spot_hours.catalog_hours(catalog, now.month)
+    weekday = now.weekday()
+    open_mask = np.array([spot_hours.is_open(h, minute, weekday) is True for h in hours], dtype=bool)
+    dist = np.where(open_mask, catalog.distances_from(*location), np.inf)
+    within = np.flatnonzero(dist <= OPEN_NOW_RADIUS_KM)
+    within = within[np.argsort(dist[within], kind='stable')][:OPEN_NOW_LIMIT]
+    clock = now.strftime('%H:%M')
+    if not within.size:
+        return (
+            f"{clock} 기준, 반경 {OPEN_NOW_RADIUS_KM:g}km 안에서 운영시간 정보로 "
+            f"지금 열려 있다고 확인되는 곳이 없습니다."
+        )
+    lines = [f"{clock} 기준, 근처에서 지금 열려 있는 곳입니다."]
+    for i in within:
+        lines.append(f"- {catalog.spots[i]['name']} ({format_distance(float(dist[i]))}, {hours[i].label})")
+    return "\n".join(lines)
+
+
+def _answer_named(catalog, payload, intent):
+    i = find_spot(catalog, payload['user_question'])
+    if i is None:
+        return None
+    spot = catalog.spots[i]
+    if intent == ADDRESS:
+        if not spot.get('address'):
+            return None
+        return f"'{spot['name']}'의 주소는 {spot['address']}입니다."
+
+    text = spot_hours.clean_text(spot.get('use_time'))
+    if not text:
+        return None
+    lines = [f"'{spot['name']}' 운영시간", text]
+    now = spot_hours.local_now()
+    state = spot_hours.is_open(
+        spot_hours.parse_use_time(spot.get('use_time'), now.month), spot_hours.minute_of_day(now), now.weekday()
+    )
+    if state is not None:
+        lines.append("지금은 운영 중입니다." if state else "지금은 운영 시간이 아닙니다.")
+    return "\n".join(lines)
+
+
+def _answer_fallback(catalog, payload):
+    location = _location(payload)
+    if location is None:
+        return None
+    nearest = catalog.nearest(*location, k=3)
+    if not nearest:
+        return None
+    lines = ["지금은 AI 답변을 드릴 수 없어 가까운 장소를 먼저 안내해 드려요."]
+    for i, d in nearest:
+        lines.append(f"- {catalog.spots[i]['name']} ({format_distance(d)})")
+    return "\n".join(lines)
+
+
+def answer(payload, degraded=False):
+    """
+    카탈로그만으로 답할 수 있으면 LocalAnswer, 아니면 None (AI 서버로 넘김)
+    degraded=True면 의도가 없어도 위치 기반 안내를 만들어 봅니다.
+    """
+    catalog = get_catalog()
+    if catalog is None or not len(catalog):
+        return None
+
+    intent = detect_intent(payload['user_question'])
+    text = None
+    if intent == NEAREST_MISSION:
+        text = _answer_nearest(catalog, payload, mission_only=True)
+    elif intent == NEAREST:
+        text = _answer_nearest(catalog, payload, mission_only=False)
+    elif intent == OPEN_NOW:
+        text = _answer_open_now(catalog, payload)
+    elif intent in (ADDRESS, HOURS):
+        text = _answer_named(catalog, payload, intent)
+
+    if text:
+        return LocalAnswer(intent, text)
+    if degraded:
+        text = _answer_fallback(catalog, payload)
+        if text:
+            return LocalAnswer(FALLBACK, text)
+    return None
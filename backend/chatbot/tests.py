@@ -1,3 +1,403 @@
-from django.test import TestCase
+import asyncio
+import gc
+import io
+import shutil
+import tempfile
+import threading
+import weakref
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from datetime import datetime
+from unittest import mock
 
-# Create your tests here.
+import httpx
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from accounts.models import CustomUser
+from courses import geofence
+from courses.models import Route, RouteSpot, UserRouteSpot
+from spots import catalog
+from spots import hours as spot_hours
+from spots.models import Spot
+
+from . import answer_cache, client, context, health, intents, views
+
+
+class HalfOpenProbeTests(SimpleTestCase):
+    """half-open 시험 요청이 결과 없이 끝나도 다음 시험 요청을 막지 않아야 함"""
+
+    def setUp(self):
+        self.breaker = client.CircuitBreaker(failure_threshold=1, reset_timeout=0)
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, client.CircuitBreaker.HALF_OPEN)
+        for patcher in (
+            mock.patch.object(client, 'breaker', self.breaker),
+            mock.patch.object(client, 'check_health'),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def use_transport(self, handler):
+        @asynccontextmanager
+        async def async_client():
+            async with httpx.AsyncClient(base_url='http://ai.test', transport=httpx.MockTransport(handler)) as c:
+                yield c
+
+        patcher = mock.patch.object(client, '_async_client', async_client)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def assert_probe_released(self):
+        self.assertTrue(self.breaker.before_call())
+
+    def test_cancelled_probe_is_released(self):
+        started = asyncio.Event()
+
+        async def slow(request):
+            started.set()
+            await asyncio.sleep(10)
+            return httpx.Response(200)
+
+        self.use_transport(slow)
+
+        async def run():
+            task = asyncio.create_task(client.arequest('POST', '/chat'))
+            await started.wait()
+            # 시험 요청이 진행 중이면 다른 요청은 바로 실패
+            with self.assertRaises(client.CircuitOpenError):
+                self.breaker.before_call()
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+        asyncio.run(run())
+        self.assert_probe_released()
+
+    def test_unexpected_error_in_stream_releases_probe(self):
+        def broken(request):
+            raise httpx.DecodingError('bad response')
+
+        self.use_transport(broken)
+
+        async def run():
+            async with client.astream('POST', '/chat'):
+                pass
+
+        with self.assertRaises(httpx.DecodingError):
+            asyncio.run(run())
+        self.assert_probe_released()
+
+    def test_sync_probe_result_is_recorded(self):
+        transport = httpx.MockTransport(lambda request: httpx.Response(200))
+        with mock.patch.object(client, 'get_sync_client', return_value=httpx.Client(base_url='http://ai.test', transport=transport)):
+            client.request('GET', '/health')
+        self.assertEqual(self.breaker.state, client.CircuitBreaker.CLOSED)
+        self.assertFalse(self.breaker.before_call())
+
+
+class BrokenBody(httpx.AsyncByteStream):
+    async def __aiter__(self):
+        yield b'data: partial\n\n'
+        raise httpx.ReadError('connection reset')
+
+
+class StreamFailureCountTests(SimpleTestCase):
+    """스트리밍 본문을 읽다 끊긴 호출도 실패는 한 번만 기록해야 함"""
+
+    def setUp(self):
+        self.breaker = client.CircuitBreaker(failure_threshold=2, reset_timeout=30)
+        for patcher in (
+            mock.patch.object(client, 'breaker', self.breaker),
+            mock.patch.object(client, 'check_health'),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def stream_with_status(self, status_code):
+        @asynccontextmanager
+        async def async_client():
+            transport = httpx.MockTransport(lambda request: httpx.Response(status_code, stream=BrokenBody()))
+            async with httpx.AsyncClient(base_url='http://ai.test', transport=transport) as c:
+                yield c
+
+        async def run():
+            async with client.astream('POST', '/chat') as response:
+                async for _ in response.aiter_bytes():
+                    pass
+
+        with mock.patch.object(client, '_async_client', async_client):
+            with self.assertRaises(httpx.ReadError):
+                asyncio.run(run())
+
+    def test_server_error_then_broken_body_counts_once(self):
+        self.stream_with_status(503)
+        self.assertEqual(self.breaker._failures, 1)
+        self.assertEqual(self.breaker.state, client.CircuitBreaker.CLOSED)
+
+    def test_success_then_broken_body_counts_once(self):
+        self.stream_with_status(200)
+        self.assertEqual(self.breaker._failures, 1)
+        self.assertEqual(self.breaker.state, client.CircuitBreaker.CLOSED)
+
+
+@override_settings(FASTAPI_AI_SERVER_URL='http://ai.test')
+class ClientReuseTests(SimpleTestCase):
+    """ASGI 루프(메인 스레드)는 클라이언트를 재사용하고, 요청마다 생기는 루프는 호출마다 만들고 닫아야 함"""
+
+    def setUp(self):
+        patcher = mock.patch.object(client, '_clients', weakref.WeakKeyDictionary())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_main_thread_loop_reuses_one_client(self):
+        async def run():
+            first = client.get_client()
+            async with client._async_client() as second:
+                pass
+            self.assertIs(second, first)
+            self.assertFalse(first.is_closed)
+            await first.aclose()
+            # 닫힌 클라이언트는 다시 만듦
+            third = client.get_client()
+            self.assertIsNot(third, first)
+            await third.aclose()
+            return third
+
+        last = asyncio.run(run())
+        self.assertIsNot(asyncio.run(run()), last)  # 루프마다 별도 클라이언트
+
+    def test_closed_loop_entry_is_dropped(self):
+        async def run():
+            client.get_client()
+            self.assertEqual(len(client._clients), 1)
+
+        asyncio.run(run())
+        gc.collect()
+        self.assertEqual(len(client._clients), 0)
+
+    def test_worker_thread_loop_gets_per_call_client(self):
+        results = {}
+
+        async def run():
+            with self.assertRaises(RuntimeError):
+                client.get_client()
+            async with client._async_client() as per_call:
+                results['open'] = not per_call.is_closed
+            results['client'] = per_call
+
+        # WSGI + async_to_sync처럼 요청마다 다른 스레드에서 루프를 만들고 닫는 경우
+        thread = threading.Thread(target=lambda: asyncio.run(run()))
+        thread.start()
+        thread.join()
+        self.assertTrue(results['open'])
+        self.assertTrue(results['client'].is_closed)
+        self.assertEqual(len(client._clients), 0)
+
+
+class DetectIntentTests(SimpleTestCase):
+    CASES = [
+        ('가장 가까운 미션 장소 어디야?', intents.NEAREST_MISSION),
+        ('근처에 미션 있는 곳 알려줘', intents.NEAREST_MISSION),
+        ('지금 열려있는 곳 알려줘', intents.OPEN_NOW),
+        ('근처에 영업중인 데 있어?', intents.OPEN_NOW),
+        ('홍예문 운영시간 알려줘', intents.HOURS),
+        ('차이나타운 몇 시에 문 열어?', intents.HOURS),
+        ('월미공원 몇시까지 해?', intents.HOURS),
+        ('인천상륙작전기념관 몇 시에 닫아요?', intents.HOURS),
+        ('송월동 동화마을 휴무일 언제야?', intents.HOURS),
+        ('개항박물관 월요일 휴관이야?', intents.HOURS),
+        ('월미공원 주소 알려줘', intents.ADDRESS),
+        ('홍예문 위치가 어디야?', intents.ADDRESS),
+        ('제일 가까운 관광지 추천해줘', intents.NEAREST),
+        # 운영시간이 아닌 "몇 시" 질문
+        ('홍예문 몇시에 출발하면 좋아?', None),
+        ('차이나타운에서 월미도까지 몇 시간 걸려?', None),
+        ('월미공원은 몇 시에 가면 사람이 적어?', None),
+        ('근처 맛집 추천해줘', None),
+    ]
+
+    def test_cases(self):
+        for question, expected in self.CASES:
+            with self.subTest(question=question):
+                self.assertEqual(intents.detect_intent(question), expected)
+
+
+INCHEON = {'lat': 37.4737, 'lng': 126.6216}
+BUSAN = {'lat': 35.1587, 'lng': 129.1604}
+
+
+class AnswerCacheTests(SimpleTestCase):
+    def make_cache(self, **kwargs):
+        options = {'embedder': answer_cache.HashingEmbedder(), 'use_faiss': False, **kwargs}
+        return answer_cache.AnswerCache(**options)
+
+    def payload(self, question, location=INCHEON, **extra):
+        return {'user_question': question, 'user_location': location, 'user_info': {'age_group': '20대'}, **extra}
+
+    def test_normalized_question_hits(self):
+        cache = self.make_cache(embedder=None)
+        cache.store(self.payload('근처에 갈 만한 곳 알려줘'), '답변')
+        self.assertEqual(cache.lookup(self.payload('혹시 근처에 갈만한 곳 알려주세요?')), (cache.HIT, '답변'))
+        self.assertEqual(cache.lookup(self.payload('근처에 갈 만한 곳 알려줘', location=BUSAN)), (cache.MISS, None))
+        other_age = self.payload('근처에 갈 만한 곳 알려줘', user_info={'age_group': '60대'})
+        self.assertEqual(cache.lookup(other_age), (cache.MISS, None))
+
+    def test_similar_question_hits_only_above_threshold(self):
+        cache = self.make_cache()
+        cache.store(self.payload('송도 센트럴파크 근처 맛집 추천해줘'), '맛집 답변')
+        self.assertEqual(cache.lookup(self.payload('송도 센트럴파크 근처 맛집 좀 추천해 줄래')), (cache.SIMILAR, '맛집 답변'))
+        # 장소/대상 하나만 다른 질문은 다른 답
+        self.assertEqual(cache.lookup(self.payload('송도 센트럴파크 근처 카페 추천해줘')), (cache.MISS, None))
+
+    def test_personal_and_time_questions_bypass(self):
+        cache = self.make_cache()
+        for question, reason in (('내 코스 다음 장소 알려줘', 'personal'), ('지금 차이나타운 열었어?', 'time')):
+            self.assertFalse(cache.store(self.payload(question), '답변'))
+            self.assertEqual(cache.lookup(self.payload(question)), (cache.BYPASS, None))
+            self.assertEqual(cache.stats()['bypass_reasons'][reason], 1)
+        nickname = {'age_group': '20대', 'nickname': '여행자'}
+        self.assertFalse(cache.store(self.payload('근처 맛집 추천해줘', user_info=nickname), '여행자님, 여기 어때요'))
+        self.assertFalse(cache.store(self.payload('근처 맛집 추천해줘', context={'active_course': {'id': 1}}), '답변'))
+
+    def test_expired_and_evicted_entries_miss(self):
+        cache = self.make_cache(embedder=None, max_entries=2, ttl=60)
+        with mock.patch.object(answer_cache.time, 'monotonic', return_value=1000.0):
+            cache.store(self.payload('차이나타운 가는 방법 알려줘'), 'a')
+        with mock.patch.object(answer_cache.time, 'monotonic', return_value=1060.0):
+            self.assertEqual(cache.lookup(self.payload('차이나타운 가는 방법 알려줘')), (cache.MISS, None))
+
+        for question in ('월미도 가는 방법 알려줘', '송도 가는 방법 알려줘', '강화도 가는 방법 알려줘'):
+            cache.store(self.payload(question), question)
+        self.assertEqual(cache.lookup(self.payload('월미도 가는 방법 알려줘')), (cache.MISS, None))
+        stats = cache.stats()
+        self.assertEqual((stats['size'], stats['expired'], stats['evictions']), (2, 1, 1))
+        self.assertEqual(stats['hit_rate'], 0.0)
+
+    def test_evicted_entry_leaves_similarity_index(self):
+        cache = self.make_cache(max_entries=1)
+        cache.store(self.payload('송도 센트럴파크 근처 맛집 추천해줘'), '맛집 답변')
+        cache.store(self.payload('인천 차이나타운 가는 방법 알려줘'), '길 답변')
+        self.assertEqual(cache.lookup(self.payload('송도 센트럴파크 근처에 맛집 추천해줘')), (cache.MISS, None))
+        self.assertEqual(cache.lookup(self.payload('인천 차이나타운으로 가는 방법 알려줘')), (cache.SIMILAR, '길 답변'))
+
+    def test_embedder_falls_back_to_hashing(self):
+        with mock.patch.object(answer_cache, 'SentenceTransformerEmbedder', side_effect=ImportError('no module')):
+            embedder = answer_cache.build_embedder('sentence-transformers')
+        self.assertIsInstance(embedder, answer_cache.HashingEmbedder)
+        self.assertIsNone(answer_cache.build_embedder('off'))
+        cache = answer_cache.AnswerCache(embedder=embedder)
+        self.assertEqual(cache.threshold, answer_cache.DEFAULT_THRESHOLDS['hashing'])
+
+
+class ContextTests(TestCase):
+    MONDAY_NOON = datetime(2026, 10, 19, 12, 0, tzinfo=spot_hours.SEOUL)
+
+    def setUp(self):
+        artifact_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, artifact_dir, ignore_errors=True)
+        settings_override = override_settings(CATALOG_ARTIFACT_DIR=artifact_dir, CHATBOT_CONTEXT_SPOTS=2)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        for patcher in (
+            mock.patch.object(geofence, '_indexes', OrderedDict()),
+            mock.patch.object(spot_hours, 'local_now', return_value=self.MONDAY_NOON),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.addCleanup(catalog.reset_catalog)
+
+        self.gate = Spot.objects.create(
+            name='홍예문', lat=37.4737, lng=126.6216, content_id='t-1', address='인천 중구 송학동',
+            use_time='09:00~18:00 (월요일 휴무)', past_image_url='https://example.com/a.jpg', famous=True,
+        )
+        self.park = Spot.objects.create(
+            name='자유공원', lat=37.4753, lng=126.6195, content_id='t-2', use_time='상시 개방', walking_activity=True,
+        )
+        self.far = Spot.objects.create(name='송도', lat=37.3925, lng=126.6393, content_id='t-3')
+        call_command('build_catalog', stdout=io.StringIO())
+        catalog.reset_catalog()
+        self.user = CustomUser.objects.create_user(useremail='context@example.com', username='context')
+
+    def payload(self, location=None):
+        return {'user_question': '근처 볼거리', 'user_location': location}
+
+    def adopt(self, *spots):
+        route = Route.objects.create(user_region_name='중구', total_spots=len(spots))
+        for order, spot in enumerate(spots, start=1):
+            route_spot = RouteSpot.objects.create(route_id=route, spot_id=spot, order=order)
+            UserRouteSpot.objects.create(user_id=self.user, route_id=route, route_spot_id=route_spot, order=order)
+        return route
+
+    def test_nearby_spots_summaries(self):
+        built = context.build_context(self.payload({'lat': 37.4740, 'lng': 126.6214}), self.user.id)
+        self.assertEqual(built['catalog_version'], catalog.get_catalog().version)
+        self.assertNotIn('active_course', built)
+        gate, park = built['nearby_spots']
+        self.assertEqual((gate['id'], park['id']), (self.gate.id, self.park.id))
+        self.assertLess(gate['distance_m'], park['distance_m'])
+        self.assertEqual(gate['address'], '인천 중구 송학동')
+        self.assertIn('famous', gate['tags'])
+        self.assertTrue(gate['mission_available'])
+        self.assertFalse(park['mission_available'])
+        # 월요일 정오: 월요일 휴무인 곳은 닫힘, 상시 개방은 열림
+        self.assertEqual(gate['hours'], '09:00~18:00 (월 휴무)')
+        self.assertIs(gate['open_now'], False)
+        self.assertIs(park['open_now'], True)
+
+    def test_no_location_and_no_course_is_none(self):
+        self.assertIsNone(context.build_context(self.payload(), self.user.id))
+
+    def test_active_course_tracks_progress(self):
+        route = self.adopt(self.park, self.far)
+        built = context.build_context(self.payload({'lat': 37.4740, 'lng': 126.6214}), self.user.id)
+        course = built['active_course']
+        self.assertEqual(course['route_id'], route.id)
+        self.assertEqual((course['total_spots'], course['unlocked_spots'], course['remaining_spots']), (2, 0, 2))
+        self.assertEqual(course['next_spot']['spot_id'], self.park.id)
+        self.assertGreater(course['next_spot']['distance_m'], 0)
+
+        # 위치 없이도 코스 요약은 보냄 (거리 제외)
+        UserRouteSpot.objects.filter(route_spot_id__spot_id=self.park).update(unlock_at=timezone.now())
+        course = context.build_context(self.payload(), self.user.id)['active_course']
+        self.assertEqual((course['unlocked_spots'], course['remaining_spots']), (1, 1))
+        self.assertEqual(course['next_spot']['title'], '송도')
+        self.assertNotIn('distance_m', course['next_spot'])
+
+        UserRouteSpot.objects.filter(user_id=self.user).update(unlock_at=timezone.now())
+        self.assertIsNone(context.build_context(self.payload(), self.user.id))
+
+
+class HealthCheckTests(SimpleTestCase):
+    def setUp(self):
+        self.monitor = health.HealthMonitor(interval=10.0)
+        # 첫 확인을 아직 끝내지 못한 감시 스레드
+        stop = threading.Event()
+        self.monitor._thread = threading.Thread(target=stop.wait, daemon=True)
+        self.monitor._thread.start()
+        self.addCleanup(stop.set)
+        for patcher in (
+            mock.patch.object(views, 'health_monitor', self.monitor),
+            mock.patch.object(client, 'breaker', client.CircuitBreaker()),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.client = APIClient()
+        self.client.force_authenticate(CustomUser(username='health'))
+
+    def test_starting_before_first_probe(self):
+        response = self.client.get('/v1/chatbot/health/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['status'], health.STARTING)
+
+    def test_probe_result_replaces_starting(self):
+        self.monitor.record(False, 3.0, httpx.ConnectError('refused'))
+        response = self.client.get('/v1/chatbot/health/')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.json()['ai_server'], 'disconnected')
+
+    def test_unknown_without_monitor_thread(self):
+        self.monitor._thread = None
+        self.assertEqual(self.monitor.snapshot()['status'], health.UNKNOWN)
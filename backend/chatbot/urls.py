@@ -5,5 +5,6 @@ from . import views
 urlpatterns = [
     path("", views.chat_with_bot, name="chat_with_bot"),
     path("health/", views.health_check, name="health_check"),
+    path("cache/", views.cache_stats, name="cache_stats"),
     path("memory/", views.memory, name="memory"),
 ]
@@ -1,138 +1,327 @@
-from rest_framework.decorators import api_view
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAdminUser
 from rest_framework.response import Response
 from rest_framework import status
 
-import requests
 import json
+import httpx
+from asgiref.sync import sync_to_async
 from django.conf import settings
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+from rest_framework.exceptions import AuthenticationFailed, NotAuthenticated
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
 
-@api_view(["POST"])
-def chat_with_bot(request):
-    """
-    사용자 질문에 대한 답변 반환 - FastAPI AI 서버와 통신
-    """
+from . import client as ai_client
+from . import intents
+from .answer_cache import get_cache
+from .context import build_context
+from .client import AIServerUnavailable
+from .health import monitor as health_monitor
+
+
+class _ChatRequestError(Exception):
+    pass
+
+
+async def _authenticate(request):
+    """DRF 기본 인증(JWT)과 같은 방식으로 사용자를 확인합니다. 실패하면 None"""
     try:
-        # 사용자 질문 받기 (JSON 또는 POST 데이터 모두 지원)
-        user_input = request.data.get("user_question") or request.POST.get("user_question")
-        
-        # 사용자 위치 받기
-        user_lat = request.data.get("lat") or request.POST.get("lat")
-        user_lon = request.data.get("lng") or request.POST.get("lng")
+        result = await sync_to_async(JWTAuthentication().authenticate)(request)
+    except (InvalidToken, AuthenticationFailed):
+        return None
+    return result[0] if result else None
 
-        # 사용자 고유 정보 받기
-        user_id = request.data.get("user_id") or request.POST.get("user_id")
 
-        # 사용자 추가 정보 받기
-        user_nickname = request.data.get("user_nickname") or request.POST.get("user_nickname")
-        user_gender = request.data.get("user_gender") or request.POST.get("user_gender")
-        user_age_group = request.data.get("user_age_group") or request.POST.get("user_age_group")
+def _request_data(request):
+    """JSON 본문 또는 POST 폼 데이터"""
+    if request.content_type == 'application/json':
+        try:
+            data = json.loads(request.body or b'{}')
+        except json.JSONDecodeError:
+            raise _ChatRequestError("JSON 본문을 파싱할 수 없습니다.")
+        if not isinstance(data, dict):
+            raise _ChatRequestError("JSON 본문은 객체여야 합니다.")
+        return data
+    return request.POST
 
-        # 꼭 필요한 user_input, user_id 받기
-        if not user_input or not user_id:
-            return Response(
-                {"error": "user_question, user_id 파라미터가 필요합니다."},
-                status=status.HTTP_400_BAD_REQUEST
-            )
 
-        # FastAPI AI 서버로 요청 데이터 준비
-        payload = {
-            "user_question": user_input,
-            "user_id": user_id,
-        }
-        
-        # 위치 정보가 있으면 추가
-        if user_lat and user_lon:
+def _build_payload(data):
+    """FastAPI AI 서버로 보낼 요청 데이터"""
+    # 사용자 질문 받기
+    user_input = data.get("user_question")
+
+    # 사용자 위치 받기
+    user_lat = data.get("lat")
+    user_lon = data.get("lng")
+
+    # 사용자 고유 정보 받기
+    user_id = data.get("user_id")
+
+    # 사용자 추가 정보 받기
+    user_nickname = data.get("user_nickname")
+    user_gender = data.get("user_gender")
+    user_age_group = data.get("user_age_group")
+
+    # 꼭 필요한 user_input, user_id 받기
+    if not user_input or not user_id:
+        raise _ChatRequestError("user_question, user_id 파라미터가 필요합니다.")
+
+    payload = {
+        "user_question": user_input,
+        "user_id": user_id,
+    }
+
+    # 위치 정보가 있으면 추가
+    if user_lat and user_lon:
+        try:
             payload["user_location"] = {
                 "lat": float(user_lat),
                 "lng": float(user_lon)
             }
+        except (TypeError, ValueError):
+            raise _ChatRequestError("lat, lng는 숫자여야 합니다.")
 
-        # 사용자 추가 정보가 있으면 추가
-        if user_nickname or user_gender or user_age_group:
-            payload["user_info"] = {
-                "nickname": user_nickname,
-                "gender": user_gender,
-                "age_group": user_age_group
-            }
+    # 사용자 추가 정보가 있으면 추가
+    if user_nickname or user_gender or user_age_group:
+        payload["user_info"] = {
+            "nickname": user_nickname,
+            "gender": user_gender,
+            "age_group": user_age_group
+        }
+    return payload
+
+
+def _ai_error(e):
+    """AI 서버 통신 예외 -> (오류 메시지, HTTP 상태)"""
+    if isinstance(e, AIServerUnavailable):
+        return str(e), status.HTTP_503_SERVICE_UNAVAILABLE
+    if isinstance(e, httpx.TimeoutException):
+        return "AI 서버 응답 시간이 초과되었습니다.", status.HTTP_504_GATEWAY_TIMEOUT
+    if isinstance(e, httpx.ConnectError):
+        return "AI 서버에 연결할 수 없습니다. 서버 상태를 확인해주세요.", status.HTTP_503_SERVICE_UNAVAILABLE
+    if isinstance(e, httpx.HTTPStatusError):
+        return f"AI 서버 오류: {e}", status.HTTP_502_BAD_GATEWAY
+    if isinstance(e, json.JSONDecodeError):
+        return "AI 서버 응답을 파싱할 수 없습니다.", status.HTTP_502_BAD_GATEWAY
+    return f"AI 서버 통신 오류: {e}", status.HTTP_502_BAD_GATEWAY
 
-        # FastAPI AI 서버에 요청
-        fastapi_url = f"{settings.FASTAPI_AI_SERVER_URL}/v1/chatbot"
-        
-        try:
-            response = requests.post(
-                fastapi_url,
-                json=payload,
-                timeout=30,  # 30초 타임아웃
-                headers={'Content-Type': 'application/json'}
-            )
-            response.raise_for_status()  # HTTP 에러가 있으면 예외 발생
-            
-            ai_response = response.json()
-            
-            return Response(
-                {"ai_answer": ai_response.get("ai_answer", "응답을 받을 수 없습니다.")},
-                status=status.HTTP_200_OK
-            )
-            
-        except requests.exceptions.ConnectionError:
-            return Response(
-                {"error": "AI 서버에 연결할 수 없습니다. 서버 상태를 확인해주세요."},
-                status=status.HTTP_503_SERVICE_UNAVAILABLE
-            )
-        except requests.exceptions.Timeout:
-            return Response(
-                {"error": "AI 서버 응답 시간이 초과되었습니다."},
-                status=status.HTTP_504_GATEWAY_TIMEOUT
-            )
-        except requests.exceptions.HTTPError as e:
-            return Response(
-                {"error": f"AI 서버 오류: {e}"},
-                status=status.HTTP_502_BAD_GATEWAY
-            )
-        except json.JSONDecodeError:
-            return Response(
-                {"error": "AI 서버 응답을 파싱할 수 없습니다."},
-                status=status.HTTP_502_BAD_GATEWAY
-            )
 
+def _json_response(data, status_code):
+    # DRF Response와 같이 한글을 이스케이프하지 않고 UTF-8로 응답
+    return JsonResponse(data, status=status_code, json_dumps_params={"ensure_ascii": False})
+
+
+def _error_response(e, response_class=_json_response):
+    message, error_status = _ai_error(e)
+    response = response_class({"error": message}, error_status)
+    if isinstance(e, AIServerUnavailable):
+        response["Retry-After"] = str(e.retry_after)
+    return response
+
+
+def _is_unavailable(e):
+    """AI 서버가 응답하지 못한 경우 (카탈로그 대체 답변 대상). 4xx 같은 요청 오류는 제외"""
+    if isinstance(e, (AIServerUnavailable, httpx.TransportError)):
+        return True
+    return isinstance(e, httpx.HTTPStatusError) and e.response.status_code >= 500
+
+
+async def _local_answer(payload, degraded=False):
+    if not settings.CHATBOT_LOCAL_INTENTS:
+        return None
+    return await sync_to_async(intents.answer, thread_sensitive=False)(payload, degraded=degraded)
+
+
+def _sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n".encode()
+
+
+async def _cached_stream(answer, **extra):
+    yield _sse("message", {"ai_answer": answer, **extra})
+    yield _sse("done", {})
+
+
+async def _attach_context(payload, user):
+    """주변 스팟/진행 코스 컨텍스트를 payload에 붙입니다. 실패해도 질문은 그대로 보냅니다."""
+    if not settings.CHATBOT_CONTEXT_ENABLED:
+        return
+    try:
+        context = await sync_to_async(build_context)(payload, user.id)
     except Exception as e:
-        return Response(
-            {"error": f"챗봇 오류가 발생했습니다: {str(e)}"},
-            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        print(f"[chatbot] 컨텍스트 생성 실패: {e}")
+        return
+    if context:
+        payload["context"] = context
+
+
+async def _store_answer(cache, payload, answer):
+    if cache is not None and answer:
+        await sync_to_async(cache.store, thread_sensitive=False)(payload, answer)
+
+
+async def _relay_stream(payload, cache=None):
+    """
+    AI 서버 응답을 SSE로 전달합니다.
+    AI 서버가 text/event-stream으로 답하면 받는 즉시 그대로 흘려보내고,
+    JSON으로 답하면 message 이벤트 하나와 done 이벤트로 감쌉니다.
+    (그대로 흘려보낸 SSE 답변은 형식을 해석하지 않으므로 캐시에 저장하지 않습니다.)
+    아무것도 보내기 전에 AI 서버가 응답하지 못하면 카탈로그 대체 답변을 보냅니다.
+    """
+    started = False
+    try:
+        async with ai_client.astream(
+            "POST", "/v1/chatbot", json=payload, headers={"Accept": "text/event-stream, application/json"}
+        ) as response:
+            response.raise_for_status()
+            if response.headers.get("content-type", "").startswith("text/event-stream"):
+                async for chunk in response.aiter_raw():
+                    started = True
+                    yield chunk
+                return
+            ai_response = json.loads(await response.aread())
+        yield _sse("message", {"ai_answer": ai_response.get("ai_answer", "응답을 받을 수 없습니다.")})
+        yield _sse("done", {})
+        await _store_answer(cache, payload, ai_response.get("ai_answer"))
+    except (httpx.HTTPError, json.JSONDecodeError, AIServerUnavailable) as e:
+        fallback = None if started or not _is_unavailable(e) else await _local_answer(payload, degraded=True)
+        if fallback is not None:
+            yield _sse("message", {"ai_answer": fallback.text, "degraded": True})
+            yield _sse("done", {})
+            return
+        message, error_status = _ai_error(e)
+        yield _sse("error", {"error": message, "status": error_status})
+
+
+def _event_stream_response(stream):
+    response = StreamingHttpResponse(stream, content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"  # 프록시(nginx) 버퍼링 방지
+    return response
+
+
+@csrf_exempt
+@require_POST
+async def chat_with_bot(request):
+    """
+    사용자 질문에 대한 답변 반환 - FastAPI AI 서버와 통신 (비동기 뷰)
+    LLM 응답을 기다리는 동안 워커 스레드를 점유하지 않습니다.
+
+    Accept: text/event-stream 또는 ?stream=1 이면 SSE로 스트리밍하고,
+    그 외에는 기존과 같은 JSON {"ai_answer": ...}를 반환합니다.
+
+    가장 가까운 미션 장소/운영시간/주소처럼 카탈로그로 답할 수 있는 질문은 intents에서 바로 답하고
+    (X-Chatbot-Intent 헤더), 반복되는 질문은 답변 캐시(answer_cache)에서 답합니다
+    (X-Chatbot-Cache 헤더: hit/similar/miss/bypass).
+    AI 서버가 응답하지 못하면 카탈로그 기반 대체 답변을 "degraded": true와 함께 반환합니다.
+    """
+    user = await _authenticate(request)
+    if user is None:
+        response = _json_response({"detail": str(NotAuthenticated.default_detail)}, status.HTTP_401_UNAUTHORIZED)
+        response["WWW-Authenticate"] = JWTAuthentication().authenticate_header(request)
+        return response
+
+    try:
+        payload = _build_payload(_request_data(request))
+    except _ChatRequestError as e:
+        return _json_response({"error": str(e)}, status.HTTP_400_BAD_REQUEST)
+
+    wants_stream = (
+        "text/event-stream" in request.headers.get("Accept", "")
+        or request.GET.get("stream") in ("1", "true")
+    )
+
+    local = await _local_answer(payload)
+    if local is not None:
+        if wants_stream:
+            response = _event_stream_response(_cached_stream(local.text))
+        else:
+            response = _json_response({"ai_answer": local.text}, status.HTTP_200_OK)
+        response["X-Chatbot-Intent"] = local.intent
+        return response
+
+    cache = get_cache()
+    cache_status, cached_answer = (
+        await sync_to_async(cache.lookup, thread_sensitive=False)(payload) if cache is not None else (None, None)
+    )
+
+    if cached_answer is None:
+        await _attach_context(payload, user)
+
+    if wants_stream:
+        response = _event_stream_response(
+            _cached_stream(cached_answer) if cached_answer is not None else _relay_stream(payload, cache)
         )
+    elif cached_answer is not None:
+        response = _json_response({"ai_answer": cached_answer}, status.HTTP_200_OK)
+    else:
+        try:
+            ai_response = await ai_client.arequest("POST", "/v1/chatbot", json=payload)
+            ai_response.raise_for_status()
+            ai_response = ai_response.json()
+        except (httpx.HTTPError, json.JSONDecodeError, AIServerUnavailable) as e:
+            fallback = await _local_answer(payload, degraded=True) if _is_unavailable(e) else None
+            if fallback is None:
+                return _error_response(e)
+            response = _json_response({"ai_answer": fallback.text, "degraded": True}, status.HTTP_200_OK)
+            response["X-Chatbot-Intent"] = fallback.intent
+            return response
+
+        await _store_answer(cache, payload, ai_response.get("ai_answer"))
+        response = _json_response(
+            {"ai_answer": ai_response.get("ai_answer", "응답을 받을 수 없습니다.")},
+            status.HTTP_200_OK
+        )
+
+    if cache_status:
+        response["X-Chatbot-Cache"] = cache_status
+    return response
+
+
+# ai_server 상태별 HTTP 상태 (기존 동기 확인 시절과 같은 매핑)
+HEALTH_HTTP_STATUS = {
+    "connected": status.HTTP_200_OK,
+    "starting": status.HTTP_200_OK,  # 첫 확인 전 (기동 직후 로드밸런서 헬스체크가 실패하지 않도록)
+    "timeout": status.HTTP_504_GATEWAY_TIMEOUT,
+    "error": status.HTTP_502_BAD_GATEWAY,
+}
 
 
 @api_view(["GET"])
 def health_check(request):
     """
     FastAPI AI 서버 상태 확인
+    AI 서버를 직접 호출하지 않고 백그라운드 감시(chatbot.health)의 최근 결과로 바로 답합니다.
+    ?history=1 이면 최근 확인 기록을 함께 반환합니다.
     """
-    try:
-        fastapi_url = f"{settings.FASTAPI_AI_SERVER_URL}/health"
-        
-        response = requests.get(fastapi_url, timeout=5)
-        response.raise_for_status()
-        
-        return Response(
-            {"status": "healthy", "ai_server": "connected"},
-            status=status.HTTP_200_OK
-        )
-        
-    except requests.exceptions.ConnectionError:
-        return Response(
-            {"status": "unhealthy", "ai_server": "disconnected", "error": "AI 서버에 연결할 수 없습니다."},
-            status=status.HTTP_503_SERVICE_UNAVAILABLE
-        )
-    except requests.exceptions.Timeout:
-        return Response(
-            {"status": "unhealthy", "ai_server": "timeout", "error": "AI 서버 응답 시간 초과"},
-            status=status.HTTP_504_GATEWAY_TIMEOUT
-        )
-    except Exception as e:
-        return Response(
-            {"status": "unhealthy", "ai_server": "error", "error": str(e)},
-            status=status.HTTP_502_BAD_GATEWAY
-        )
+    health_monitor.ensure_started()
+    data = health_monitor.snapshot(include_history=request.GET.get("history") in ("1", "true"))
+    data["circuit"] = ai_client.breaker.state
+    data["in_flight"] = ai_client.bulkhead.active
+
+    if data["status"] == "healthy" and data["circuit"] == ai_client.CircuitBreaker.OPEN:
+        data["status"], data["ai_server"] = "unhealthy", "circuit_open"
+
+    response_status = HEALTH_HTTP_STATUS.get(data["ai_server"], status.HTTP_503_SERVICE_UNAVAILABLE)
+    headers = {} if response_status == status.HTTP_200_OK else {"Retry-After": str(max(1, round(health_monitor.interval)))}
+    return Response(data, status=response_status, headers=headers)
+
+
+@api_view(["GET", "DELETE"])
+@permission_classes([IsAdminUser])
+def cache_stats(request):
+    """
+    답변 캐시 적중률 통계 (프로세스 단위, 관리자 전용)
+    DELETE는 캐시를 비웁니다.
+    """
+    cache = get_cache()
+    if cache is None:
+        return Response({"enabled": False}, status=status.HTTP_200_OK)
+    if request.method == "DELETE":
+        cache.clear()
+    return Response({"enabled": True, **cache.stats()}, status=status.HTTP_200_OK)
 
 
 @api_view(["DELETE"])
@@ -152,15 +341,9 @@ def memory(request):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        # FastAPI AI 서버에 요청
-        fastapi_url = f"{settings.FASTAPI_AI_SERVER_URL}/v1/memory"
-        
+        # FastAPI AI 서버에 요청 (DELETE는 멱등이라 일시적 오류는 재시도)
         try:
-            response = requests.delete(
-                f"{fastapi_url}?thread_id={user_id}",
-                timeout=30,  # 30초 타임아웃
-                headers={'Content-Type': 'application/json'}
-            )
+            response = ai_client.request("DELETE", "/v1/memory", params={"thread_id": user_id})
             response.raise_for_status()  # HTTP 에러가 있으면 예외 발생
             
             response = response.json()
@@ -177,29 +360,11 @@ def memory(request):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
         
-        except requests.exceptions.ConnectionError:
-            return Response(
-                {"error": "AI 서버에 연결할 수 없습니다. 서버 상태를 확인해주세요."},
-                status=status.HTTP_503_SERVICE_UNAVAILABLE
-            )
-        except requests.exceptions.Timeout:
-            return Response(
-                {"error": "AI 서버 응답 시간이 초과되었습니다."},
-                status=status.HTTP_504_GATEWAY_TIMEOUT
-            )
-        except requests.exceptions.HTTPError as e:
-            return Response(
-                {"error": f"AI 서버 오류: {e}"},
-                status=status.HTTP_502_BAD_GATEWAY
-            )
-        except json.JSONDecodeError:
-            return Response(
-                {"error": "AI 서버 응답을 파싱할 수 없습니다."},
-                status=status.HTTP_502_BAD_GATEWAY
-            )
+        except (httpx.HTTPError, json.JSONDecodeError, AIServerUnavailable) as e:
+            return _error_response(e, response_class=lambda data, error_status: Response(data, status=error_status))
 
     except Exception as e:
         return Response(
             {"error": f"챗봇 오류가 발생했습니다: {str(e)}"},
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
-        )
\ No newline at end of file
+        )
@@ -0,0 +1,52 @@
+"""
+사용자 단위 응답 캐시
+사용자별 버전 키를 두고, 진행 상태가 바뀌는 쓰기(코스 채택, 잠금 해제, 스탬프 사용, 코스 삭제)에서
+invalidate_user로 버전을 올리면 해당 사용자의 캐시 항목이 한 번에 무효화됩니다.
+
+버전 키가 모든 워커에 보여야 하므로 워커 간에 공유되는 캐시 백엔드(Redis, DB, 파일)에서만 캐시합니다.
+LocMem처럼 프로세스 안에만 있는 백엔드에서는 user_cache_key가 None을 반환하고 뷰는 매번 조회합니다.
+"""
+import time
+
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+USER_CACHE_TIMEOUT = 300  # 초
+PROCESS_LOCAL_BACKENDS = (LocMemCache, DummyCache)
+
+
+def _version_key(user_id):
+    return f'courses:user:{user_id}:version'
+
+
+def user_cache_version(user_id):
+    key = _version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        # 버전 키가 만료/유실되어도 이전 항목과 겹치지 않도록 시각 기반으로 시작
+        cache.add(key, int(time.time() * 1000), None)
+        version = cache.get(key)
+    return version
+
+
+def user_cache_enabled():
+    """다른 워커의 invalidate_user가 보이는 공유 캐시 백엔드인지 여부"""
+    return not isinstance(caches['default'], PROCESS_LOCAL_BACKENDS)
+
+
+def user_cache_key(user_id, name, *parts):
+    """사용자별 캐시 키. 사용자별 캐시를 쓰지 않는 설정이면 None"""
+    if not user_cache_enabled():
+        return None
+    suffix = ':'.join(str(part) for part in parts)
+    return f'courses:user:{user_id}:v{user_cache_version(user_id)}:{name}:{suffix}'
+
+
+def invalidate_user(user_id):
+    """해당 사용자의 모든 캐시 항목을 무효화합니다."""
+    key = _version_key(user_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, int(time.time() * 1000), None)
@@ -0,0 +1,142 @@
+"""
+활성 코스 지오펜스 평가
+사용자별로 아직 잠금 해제되지 않은 코스 스팟의 좌표를 numpy 배열로 메모리에 보관하고,
+위치(또는 짧은 위치 배치)가 들어오면 벡터 연산으로 반경 안의 스팟을 찾습니다.
+인덱스는 미해제 스팟이 바뀌면(채택/해제/동기화/삭제) 다시 만들어집니다.
+- 공유 캐시 백엔드: courses.cache의 사용자 버전으로 판단 (DB 조회 없음)
+- 프로세스 로컬 캐시(LocMem): 다른 워커의 무효화가 보이지 않으므로 미해제 행의 (개수, 최대 id, id 합)을
+  집계 쿼리 한 번으로 비교. 행은 삭제/해제로만 빠지고 새로 생기면 더 큰 id를 받으므로 변경이 모두 드러남
+"""
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from django.db.models import Count, Max, Sum
+
+from spots.catalog import haversine_to_many
+from .cache import user_cache_enabled, user_cache_version
+from .models import UserRouteSpot
+
+GEOFENCE_RADIUS_M = 300  # 프론트엔드 미션 감지 반경과 동일
+MAX_POSITIONS = 20
+MAX_INDEXED_USERS = 2048
+
+
+class PendingSpotIndex:
+    def __init__(self, version, rows):
+        self.version = version
+        self.rows = rows
+        self.lats = np.array([row['route_spot_id__spot_id__lat'] for row in rows], dtype=np.float64)
+        self.lngs = np.array([row['route_spot_id__spot_id__lng'] for row in rows], dtype=np.float64)
+        self.route_ids = np.array([row['route_id'] for row in rows], dtype=np.int64)
+        # 코스별 다음 목적지 (order가 가장 작은 미해제 스팟)
+        self.next_ids = {}
+        self.next_rows = {}
+        self.pending_counts = {}
+        adopted_at = {}
+        for row in rows:
+            if row['route_id'] not in self.next_ids:
+                self.next_ids[row['route_id']] = row['id']
+                self.next_rows[row['route_id']] = row
+            self.pending_counts[row['route_id']] = self.pending_counts.get(row['route_id'], 0) + 1
+            adopted_at[row['route_id']] = max(adopted_at.get(row['route_id'], row['created_at']), row['created_at'])
+        # 진행 중인 코스: 미해제 스팟이 남은 코스 중 가장 최근에 채택한 코스
+        self.active_route_id = max(adopted_at, key=lambda route_id: (adopted_at[route_id], route_id)) if adopted_at else None
+
+    def __len__(self):
+        return len(self.rows)
+
+    def evaluate(self, positions, radius_m=GEOFENCE_RADIUS_M, route_id=None):
+        """positions 중 하나라도 반경 안에 들어온 스팟을 가까운 순으로 반환합니다."""
+        if not len(self) or not positions:
+            return []
+        mask = np.ones(len(self), dtype=bool) if route_id is None else self.route_ids == route_id
+        best = np.full(len(self), np.inf)
+        for lat, lng in positions:
+            best = np.minimum(best, haversine_to_many(lat, lng, self.lats, self.lngs) * 1000)
+        hits = np.flatnonzero(mask & (best <= radius_m))
+        hits = hits[np.argsort(best[hits], kind='stable')]
+
+        reachable = []
+        for i in hits:
+            row = self.rows[i]
+            reachable.append({
+                'user_route_spot_id': row['id'],
+                'route_id': row['route_id'],
+                'route_spot_id': row['route_spot_id'],
+                'spot_id': row['route_spot_id__spot_id'],
+                'title': row['route_spot_id__spot_id__name'],
+                'order': row['order'],
+                'distance_m': round(float(best[i]), 1),
+                'is_next': self.next_ids.get(row['route_id']) == row['id'],
+            })
+        return reachable
+
+    def active_course(self, position=None):
+        """진행 중인 코스의 요약 (진행률, 다음 목적지와 거리). 없으면 None"""
+        route_id = self.active_route_id
+        if route_id is None:
+            return None
+        row = self.next_rows[route_id]
+        total = row['route_id__total_spots'] or self.pending_counts[route_id]
+        next_spot = {
+            'user_route_spot_id': row['id'],
+            'spot_id': row['route_spot_id__spot_id'],
+            'title': row['route_spot_id__spot_id__name'],
+            'order': row['order'],
+        }
+        if position is not None:
+            distance_km = haversine_to_many(
+                position[0], position[1],
+                np.array([row['route_spot_id__spot_id__lat']]), np.array([row['route_spot_id__spot_id__lng']]),
+            )[0]
+            next_spot['distance_m'] = round(float(distance_km) * 1000, 1)
+        return {
+            'route_id': route_id,
+            'total_spots': total,
+            'unlocked_spots': max(total - self.pending_counts[route_id], 0),
+            'remaining_spots': self.pending_counts[route_id],
+            'next_spot': next_spot,
+        }
+
+
+_indexes = OrderedDict()
+_indexes_lock = threading.Lock()
+
+
+def _pending_rows(user_id):
+    return UserRouteSpot.objects.filter(user_id=user_id, unlock_at__isnull=True)
+
+
+def _index_version(user_id):
+    if user_cache_enabled():
+        return ('cache', user_cache_version(user_id))
+    fingerprint = _pending_rows(user_id).aggregate(count=Count('id'), max_id=Max('id'), id_sum=Sum('id'))
+    return ('rows', fingerprint['count'], fingerprint['max_id'], fingerprint['id_sum'])
+
+
+def get_pending_index(user_id):
+    """사용자의 미해제 스팟 인덱스 (프로세스 메모리 LRU)"""
+    version = _index_version(user_id)
+    with _indexes_lock:
+        index = _indexes.get(user_id)
+        if index is not None and index.version == version:
+            _indexes.move_to_end(user_id)
+            return index
+
+    rows = list(
+        _pending_rows(user_id)
+        .order_by('route_id', 'order')
+        .values(
+            'id', 'route_id', 'route_spot_id', 'order', 'route_spot_id__spot_id',
+            'route_spot_id__spot_id__name', 'route_spot_id__spot_id__lat', 'route_spot_id__spot_id__lng',
+            'route_id__total_spots', 'created_at',
+        )
+    )
+    index = PendingSpotIndex(version, rows)
+    with _indexes_lock:
+        _indexes[user_id] = index
+        _indexes.move_to_end(user_id)
+        while len(_indexes) > MAX_INDEXED_USERS:
+            _indexes.popitem(last=False)
+    return index
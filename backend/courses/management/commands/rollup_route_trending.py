@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from courses.popularity import rollup_trending, TRENDING_WINDOW_DAYS, TRENDING_HALF_LIFE_HOURS
+
+
+class Command(BaseCommand):
+    help = 'Recompute decayed trending scores and adopter counts for routes (run periodically, e.g. every 10 minutes via cron)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--window-days', type=int, default=TRENDING_WINDOW_DAYS, help='Adoption window in days')
+        parser.add_argument('--half-life-hours', type=float, default=TRENDING_HALF_LIFE_HOURS, help='Decay half-life in hours')
+
+    def handle(self, *args, **options):
+        count = rollup_trending(window_days=options['window_days'], half_life_hours=options['half_life_hours'])
+        self.stdout.write(self.style.SUCCESS(f'Rolled up trending scores for {count} routes.'))
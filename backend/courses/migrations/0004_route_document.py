@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-19 11:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0003_userroutespot_is_used'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='route',
+            name='document',
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
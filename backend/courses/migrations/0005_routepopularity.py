@@ -0,0 +1,44 @@
+# Generated by Django 5.2.4 on 2026-10-19 11:16
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Max
+
+
+def backfill_popularity(apps, schema_editor):
+    """기존 UserRouteSpot에서 코스별 채택 사용자 수를 채웁니다."""
+    UserRouteSpot = apps.get_model('courses', 'UserRouteSpot')
+    RoutePopularity = apps.get_model('courses', 'RoutePopularity')
+    rows = (UserRouteSpot.objects.values('route_id')
+            .annotate(adopters=Count('user_id', distinct=True), last_adopted_at=Max('created_at')))
+    RoutePopularity.objects.bulk_create(
+        [
+            RoutePopularity(route_id_id=row['route_id'], adopter_count=row['adopters'], last_adopted_at=row['last_adopted_at'])
+            for row in rows
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0004_route_document'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoutePopularity',
+            fields=[
+                ('route_id', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='popularity', serialize=False, to='courses.route')),
+                ('adopter_count', models.IntegerField(default=0)),
+                ('trending_score', models.FloatField(default=0)),
+                ('last_adopted_at', models.DateTimeField(null=True)),
+                ('rolled_up_at', models.DateTimeField(null=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['-adopter_count'], name='routepop_adopters_idx'), models.Index(fields=['-trending_score'], name='routepop_trending_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_popularity, migrations.RunPython.noop),
+    ]
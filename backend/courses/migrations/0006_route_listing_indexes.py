@@ -0,0 +1,29 @@
+# Generated by Django 5.2.4 on 2026-10-19 11:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0005_routepopularity'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='route',
+            index=models.Index(fields=['-created_at', '-id'], name='route_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='route',
+            index=models.Index(fields=['user_region_name', '-created_at', '-id'], name='route_region_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='route',
+            index=models.Index(fields=['is_mission_available', '-created_at', '-id'], name='route_mission_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='route',
+            index=models.Index(fields=['total_spots', '-created_at', '-id'], name='route_total_created_idx'),
+        ),
+    ]
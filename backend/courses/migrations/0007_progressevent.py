@@ -0,0 +1,31 @@
+# Generated by Django 5.2.4 on 2026-10-19 11:19
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0006_route_listing_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProgressEvent',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('event_id', models.CharField(max_length=64)),
+                ('event_type', models.CharField(choices=[('unlock', '잠금 해제'), ('stamp', '스탬프 사용')], max_length=10)),
+                ('occurred_at', models.DateTimeField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('user_id', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='progressevents', to=settings.AUTH_USER_MODEL)),
+                ('user_route_spot_id', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='progressevents', to='courses.userroutespot')),
+            ],
+            options={
+                'unique_together': {('user_id', 'event_id')},
+            },
+        ),
+    ]
@@ -7,9 +7,20 @@ class Route(models.Model):
     mission_spot_count = models.IntegerField(default=0)
     user_region_name = models.CharField(max_length=100)
     total_spots = models.IntegerField(default=0)
+    # route_detail 응답용 비정규화 문서 (save_course에서 생성, 코스는 저장 후 변경되지 않음)
+    document = models.JSONField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        # routes 목록의 (created_at, id) 키셋 페이지네이션과 필터 조합용 인덱스
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='route_created_idx'),
+            models.Index(fields=['user_region_name', '-created_at', '-id'], name='route_region_created_idx'),
+            models.Index(fields=['is_mission_available', '-created_at', '-id'], name='route_mission_created_idx'),
+            models.Index(fields=['total_spots', '-created_at', '-id'], name='route_total_created_idx'),
+        ]
+
 
 class RouteSpot(models.Model):
     id = models.AutoField(primary_key=True)
@@ -33,4 +44,38 @@ class UserRouteSpot(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     
     class Meta:
-        unique_together = ('user_id', 'route_spot_id', 'route_id')
\ No newline at end of file
+        unique_together = ('user_id', 'route_spot_id', 'route_id')
+
+
+class RoutePopularity(models.Model):
+    # 코스 채택 사용자 수 (UserRouteSpot의 고유 사용자 수, 채택/삭제 시 갱신), trending_score는 주기적 롤업으로 갱신
+    route_id = models.OneToOneField(Route, primary_key=True, on_delete=models.CASCADE, related_name='popularity')
+    adopter_count = models.IntegerField(default=0)
+    trending_score = models.FloatField(default=0)
+    last_adopted_at = models.DateTimeField(null=True)
+    rolled_up_at = models.DateTimeField(null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-adopter_count'], name='routepop_adopters_idx'),
+            models.Index(fields=['-trending_score'], name='routepop_trending_idx'),
+        ]
+
+
+class ProgressEvent(models.Model):
+    # 오프라인 동기화(sync)로 적용된 진행 이벤트. (user_id, event_id)로 중복 적용을 막습니다.
+    EVENT_TYPES = (
+        ('unlock', '잠금 해제'),
+        ('stamp', '스탬프 사용'),
+    )
+
+    id = models.AutoField(primary_key=True)
+    user_id = models.ForeignKey('accounts.CustomUser', null=False, on_delete=models.CASCADE, related_name='progressevents')
+    event_id = models.CharField(max_length=64)  # 클라이언트가 생성한 멱등성 키
+    event_type = models.CharField(max_length=10, choices=EVENT_TYPES)
+    user_route_spot_id = models.ForeignKey(UserRouteSpot, null=False, on_delete=models.CASCADE, related_name='progressevents')
+    occurred_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('user_id', 'event_id')
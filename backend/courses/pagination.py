@@ -0,0 +1,114 @@
+"""
+키셋(커서) 페이지네이션
+OFFSET 대신 마지막 항목의 정렬 키 (예: created_at, id) 이후를 조회하므로
+테이블 크기와 관계없이 페이지당 비용이 일정합니다.
+
+응답 본문은 기존과 같은 리스트를 유지하고, 다음 페이지 정보는 헤더로 전달합니다.
+    X-Next-Cursor: <cursor>
+    Link: <...?cursor=<cursor>>; rel="next"
+"""
+import base64
+import json
+
+from django.db.models import Q
+from rest_framework.response import Response
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+class CursorError(ValueError):
+    pass
+
+
+def encode_cursor(values):
+    raw = json.dumps([v.isoformat() if hasattr(v, 'isoformat') else v for v in values], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, model, fields):
+    """커서 문자열을 정렬 필드 타입에 맞는 값 목록으로 복원합니다."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+        if not isinstance(values, list) or len(values) != len(fields):
+            raise ValueError
+        return [_model_field(model, path).to_python(value) for path, value in zip(fields, values)]
+    except Exception:
+        raise CursorError('cursor 값이 올바르지 않습니다.')
+
+
+def _model_field(model, path):
+    field = None
+    for name in path.split('__'):
+        field = model._meta.get_field(name)
+        if field.is_relation and field.related_model is not None:
+            model = field.related_model
+    # FK 자체(예: route_id)는 대상 모델의 기본키 타입으로 변환
+    if field.is_relation:
+        field = field.target_field
+    return field
+
+
+def _item_value(item, path):
+    if isinstance(item, dict):
+        return item[path]
+    names = path.split('__')
+    for name in names[:-1]:
+        item = getattr(item, name)
+    return getattr(item, item._meta.get_field(names[-1]).attname)
+
+
+def parse_limit(request, default=DEFAULT_PAGE_SIZE, maximum=MAX_PAGE_SIZE):
+    try:
+        limit = int(request.GET.get('limit', default))
+    except (TypeError, ValueError):
+        raise CursorError('limit는 정수여야 합니다.')
+    return max(1, min(limit, maximum))
+
+
+def keyset_page(queryset, request, fields=('created_at', 'id'), descending=True,
+                default_limit=DEFAULT_PAGE_SIZE, max_limit=MAX_PAGE_SIZE):
+    """
+    queryset을 fields 순서로 정렬해 한 페이지를 가져옵니다.
+
+    Returns:
+        tuple: (items list, next_cursor 또는 None)
+
+    Raises:
+        CursorError: cursor 또는 limit 파라미터가 올바르지 않을 때
+    """
+    limit = parse_limit(request, default_limit, max_limit)
+    cursor = request.GET.get('cursor')
+
+    if cursor:
+        values = decode_cursor(cursor, queryset.model, fields)
+        op = 'lt' if descending else 'gt'
+        # (a, b) < (x, y)  ==  a < x OR (a = x AND b < y)
+        condition = Q()
+        for i, path in enumerate(fields):
+            term = Q(**{f'{path}__{op}': values[i]})
+            for prev_path, prev_value in zip(fields[:i], values[:i]):
+                term &= Q(**{prev_path: prev_value})
+            condition |= term
+        queryset = queryset.filter(condition)
+
+    ordering = [f'-{path}' if descending else path for path in fields]
+    items = list(queryset.order_by(*ordering)[:limit + 1])
+
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_cursor = encode_cursor([_item_value(items[-1], path) for path in fields])
+    return items, next_cursor
+
+
+def paginated_response(request, data, next_cursor, status=200):
+    """리스트 본문에 다음 페이지 커서 헤더를 붙여 반환합니다."""
+    response = Response(data, status=status)
+    if next_cursor:
+        params = request.GET.copy()
+        params['cursor'] = next_cursor
+        response['X-Next-Cursor'] = next_cursor
+        response['Link'] = f'<{request.build_absolute_uri(request.path)}?{params.urlencode()}>; rel="next"'
+    return response
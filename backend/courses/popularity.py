@@ -0,0 +1,124 @@
+"""
+코스 인기도
+- 채택 사용자 수는 UserRouteSpot의 고유 (사용자, 코스) 수입니다. 새 채택(generate_user_course)과
+  삭제(delete_user_route_spot)에서 원자적으로 1씩 증감하고, 정확한 재집계는 롤업 명령이 합니다.
+- 인기순 목록은 캐시된 랭킹으로 응답합니다.
+- 트렌딩 점수는 rollup_route_trending 명령이 지수 감쇠로 주기적으로 계산합니다.
+  (계정 삭제처럼 위 두 경로를 거치지 않는 변경도 이때 반영됩니다.)
+"""
+import math
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db.models import Count, F, Min
+from django.utils import timezone
+
+from .models import Route, RoutePopularity, UserRouteSpot
+from .serializers import RouteSerializer
+
+BEST_ROUTES_CACHE_KEY = 'courses:best_routes'
+TRENDING_ROUTES_CACHE_KEY = 'courses:trending_routes'
+RANKING_CACHE_TIMEOUT = 60  # 초
+RANKING_SIZE = 5
+
+TRENDING_WINDOW_DAYS = 7
+TRENDING_HALF_LIFE_HOURS = 24
+
+
+def record_adoption(route_id, adopted_at=None):
+    """사용자가 코스를 새로 채택했을 때 채택 수를 1 증가시킵니다 (채택 트랜잭션 안에서 호출)."""
+    adopted_at = adopted_at or timezone.now()
+    RoutePopularity.objects.get_or_create(route_id_id=route_id)
+    RoutePopularity.objects.filter(route_id_id=route_id).update(
+        adopter_count=F('adopter_count') + 1,
+        last_adopted_at=adopted_at,
+    )
+
+
+def record_removal(route_id):
+    """사용자가 채택한 코스를 삭제했을 때 채택 수를 1 감소시킵니다 (삭제 트랜잭션 안에서 호출)."""
+    RoutePopularity.objects.filter(route_id_id=route_id, adopter_count__gt=0).update(
+        adopter_count=F('adopter_count') - 1,
+    )
+
+
+def _ranked_routes(order_field, size):
+    route_ids = list(
+        RoutePopularity.objects.filter(**{f'{order_field}__gt': 0})
+        .order_by(f'-{order_field}', '-route_id')
+        .values_list('route_id', flat=True)[:size]
+    )
+    routes = {route.id: route for route in Route.objects.filter(id__in=route_ids)}
+    return [routes[route_id] for route_id in route_ids if route_id in routes]
+
+
+def best_routes_data(size=RANKING_SIZE):
+    """채택 사용자 수 상위 코스 (캐시)"""
+    data = cache.get(BEST_ROUTES_CACHE_KEY)
+    if data is None:
+        data = RouteSerializer(_ranked_routes('adopter_count', size), many=True).data
+        cache.set(BEST_ROUTES_CACHE_KEY, data, RANKING_CACHE_TIMEOUT)
+    return data
+
+
+def trending_routes_data(size=RANKING_SIZE):
+    """최근 채택에 가중치를 둔 트렌딩 상위 코스 (캐시)"""
+    data = cache.get(TRENDING_ROUTES_CACHE_KEY)
+    if data is None:
+        data = RouteSerializer(_ranked_routes('trending_score', size), many=True).data
+        cache.set(TRENDING_ROUTES_CACHE_KEY, data, RANKING_CACHE_TIMEOUT)
+    return data
+
+
+def rollup_trending(window_days=TRENDING_WINDOW_DAYS, half_life_hours=TRENDING_HALF_LIFE_HOURS, now=None):
+    """
+    최근 window_days 동안의 (사용자, 코스) 채택 이벤트로 트렌딩 점수를 다시 계산합니다.
+    채택 하나의 가중치는 0.5 ** (경과 시간 / 반감기) 입니다.
+    채택 사용자 수도 UserRouteSpot 기준으로 함께 다시 맞춥니다.
+
+    Returns:
+        int: 점수가 있는 코스 수
+    """
+    now = now or timezone.now()
+    since = now - timedelta(days=window_days)
+    half_life = timedelta(hours=half_life_hours).total_seconds()
+
+    # (route, user)별 첫 채택 시각 = 해당 사용자의 UserRouteSpot 중 가장 이른 created_at
+    adoptions = (
+        UserRouteSpot.objects.values('route_id', 'user_id')
+        .annotate(adopted_at=Min('created_at'))
+        .filter(adopted_at__gte=since)
+    )
+
+    scores = {}
+    for row in adoptions.iterator():
+        age = max(0.0, (now - row['adopted_at']).total_seconds())
+        scores[row['route_id']] = scores.get(row['route_id'], 0.0) + math.pow(0.5, age / half_life)
+
+    adopters = dict(
+        UserRouteSpot.objects.values('route_id')
+        .annotate(count=Count('user_id', distinct=True))
+        .values_list('route_id', 'count')
+    )
+
+    # 윈도우 밖으로 밀려난 코스는 0으로, 채택한 사용자가 모두 사라진 코스도 0으로 초기화
+    RoutePopularity.objects.filter(trending_score__gt=0).exclude(route_id__in=scores.keys()).update(
+        trending_score=0, rolled_up_at=now
+    )
+    RoutePopularity.objects.filter(adopter_count__gt=0).exclude(route_id__in=adopters.keys()).update(
+        adopter_count=0
+    )
+    RoutePopularity.objects.bulk_create(
+        [
+            RoutePopularity(
+                route_id_id=route_id, adopter_count=count, trending_score=scores.get(route_id, 0.0), rolled_up_at=now
+            )
+            for route_id, count in adopters.items()
+        ],
+        update_conflicts=True,
+        unique_fields=['route_id'],
+        update_fields=['adopter_count', 'trending_score', 'rolled_up_at'],
+        batch_size=500,
+    )
+    cache.delete_many([BEST_ROUTES_CACHE_KEY, TRENDING_ROUTES_CACHE_KEY])
+    return len(scores)
@@ -0,0 +1,144 @@
+"""
+오프라인 진행 이벤트 동기화
+클라이언트가 모아둔 잠금 해제/스탬프 이벤트를 한 트랜잭션에서 집합 단위 UPDATE로 적용합니다.
+이벤트는 (user_id, event_id)로 기록되므로 같은 배치를 다시 보내도 결과가 같습니다.
+"""
+from django.db import transaction
+from django.db.models import Case, When, Value, DateTimeField
+from django.utils import timezone
+
+from .cache import invalidate_user
+from .models import ProgressEvent, UserRouteSpot
+from .serializers import ProgressEventSerializer
+
+MAX_SYNC_EVENTS = 200
+
+
+def validate_events(raw_events):
+    """
+    이벤트 목록을 개별 검증합니다.
+
+    같은 배치 안에서 event_id가 반복되면 첫 번째만 적용 대상으로 남깁니다.
+
+    Returns:
+        tuple: (유효한 이벤트 dict 목록, [{'event_id', 'error'}, ...], 배치 안에서 반복된 event_id 목록)
+    """
+    valid, rejected, repeated = [], [], []
+    seen = set()
+    now = timezone.now()
+    for raw in raw_events:
+        serializer = ProgressEventSerializer(data=raw if isinstance(raw, dict) else {})
+        if not serializer.is_valid():
+            rejected.append({'event_id': raw.get('event_id') if isinstance(raw, dict) else None, 'error': serializer.errors})
+            continue
+        event = serializer.validated_data
+        if event['event_id'] in seen:
+            repeated.append(event['event_id'])  # 같은 배치 안의 중복
+            continue
+        seen.add(event['event_id'])
+        # 기기 시계가 앞서 있어도 미래 시각은 기록하지 않음
+        event['occurred_at'] = min(event['occurred_at'], now)
+        valid.append(event)
+    return valid, rejected, repeated
+
+
+def event_statuses(raw_events, result):
+    """
+    요청 순서대로 이벤트별 처리 결과를 반환합니다.
+    applied(이번에 적용), duplicate(이미 적용됐거나 같은 배치에서 반복), rejected(검증/소유 실패)
+    클라이언트는 applied/duplicate인 이벤트를 큐에서 지워도 됩니다.
+    """
+    applied = set(result['applied'])
+    rejected = {item['event_id'] for item in result['rejected'] if item['event_id'] is not None}
+    statuses, seen = [], set()
+    for raw in raw_events:
+        event_id = raw.get('event_id') if isinstance(raw, dict) else None
+        event_id = str(event_id) if event_id is not None else None
+        if event_id in seen:
+            status = 'duplicate'
+        elif event_id in applied:
+            status = 'applied'
+        elif event_id is None or event_id in rejected:
+            status = 'rejected'
+        else:
+            status = 'duplicate'
+        if status != 'rejected':
+            seen.add(event_id)
+        statuses.append({'event_id': event_id, 'status': status})
+    return statuses
+
+
+def apply_progress_events(user, events):
+    """
+    검증된 이벤트를 적용하고 결과와 영향을 받은 코스의 최신 진행 상태를 반환합니다.
+    """
+    event_ids = [event['event_id'] for event in events]
+    spot_ids = {event['user_route_spot_id'] for event in events}
+    rejected = []
+
+    with transaction.atomic():
+        already_applied = set(
+            ProgressEvent.objects.filter(user_id=user, event_id__in=event_ids).values_list('event_id', flat=True)
+        )
+        owned = dict(
+            UserRouteSpot.objects.filter(user_id=user, id__in=spot_ids).values_list('id', 'route_id')
+        )
+
+        new_events = []
+        for event in events:
+            if event['event_id'] in already_applied:
+                continue
+            if event['user_route_spot_id'] not in owned:
+                rejected.append({'event_id': event['event_id'], 'error': 'UserRouteSpot을 찾을 수 없습니다.'})
+                continue
+            new_events.append(event)
+
+        ProgressEvent.objects.bulk_create(
+            [
+                ProgressEvent(
+                    user_id=user,
+                    event_id=event['event_id'],
+                    event_type=event['type'],
+                    user_route_spot_id_id=event['user_route_spot_id'],
+                    occurred_at=event['occurred_at'],
+                )
+                for event in new_events
+            ],
+            ignore_conflicts=True,
+        )
+
+        # 잠금 해제: 스팟별 가장 이른 시각으로, 아직 해제되지 않은 행만 갱신
+        unlock_times = {}
+        for event in new_events:
+            if event['type'] == 'unlock':
+                spot_id = event['user_route_spot_id']
+                unlock_times[spot_id] = min(event['occurred_at'], unlock_times.get(spot_id, event['occurred_at']))
+        if unlock_times:
+            UserRouteSpot.objects.filter(user_id=user, id__in=unlock_times.keys(), unlock_at__isnull=True).update(
+                unlock_at=Case(
+                    *[When(id=spot_id, then=Value(occurred_at)) for spot_id, occurred_at in unlock_times.items()],
+                    output_field=DateTimeField(),
+                )
+            )
+
+        # 스탬프 사용
+        stamp_ids = {event['user_route_spot_id'] for event in new_events if event['type'] == 'stamp'}
+        if stamp_ids:
+            UserRouteSpot.objects.filter(user_id=user, id__in=stamp_ids, is_used=False).update(is_used=True)
+
+        route_ids = {owned[spot_id] for spot_id in spot_ids if spot_id in owned}
+        progress = list(
+            UserRouteSpot.objects.filter(user_id=user, route_id__in=route_ids)
+            .order_by('route_id', 'order')
+            .values('id', 'route_id', 'route_spot_id', 'order', 'unlock_at', 'is_used')
+        )
+
+    if new_events:
+        invalidate_user(user.id)
+
+    return {
+        'applied': [event['event_id'] for event in new_events],
+        'duplicates': [event_id for event_id in event_ids if event_id in already_applied],
+        'rejected': rejected,
+        'progress': progress,
+    }
@@ -1,12 +1,12 @@
 from django.contrib.auth.models import User
 from rest_framework import serializers
-from .models import Route, RouteSpot, UserRouteSpot 
+from .models import Route, RouteSpot, UserRouteSpot, ProgressEvent
 
 
 class RouteSerializer(serializers.ModelSerializer):
     class Meta:
         model = Route
-        fields = '__all__'
+        exclude = ['document']
 
 class RouteDetailSerializer(serializers.ModelSerializer):
     class Meta:
@@ -21,4 +21,10 @@ class UserRouteSpotSerializer(serializers.ModelSerializer):
 class UserRouteSpotUpdateSerializer(serializers.ModelSerializer):
     class Meta:
         model = UserRouteSpot
-        exclude = ['user_id', 'route_spot_id']
\ No newline at end of file
+        exclude = ['user_id', 'route_spot_id']
+
+class ProgressEventSerializer(serializers.Serializer):
+    event_id = serializers.CharField(max_length=64)
+    type = serializers.ChoiceField(choices=[choice for choice, _ in ProgressEvent.EVENT_TYPES])
+    user_route_spot_id = serializers.IntegerField()
+    occurred_at = serializers.DateTimeField()
@@ -1,3 +1,452 @@
-from django.test import TestCase
+import shutil
+import tempfile
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from accounts.models import CustomUser
+from photos.models import Photo
+from spots.models import Spot
+from . import geofence
+from .cache import invalidate_user, user_cache_enabled, user_cache_key
+from .models import Route, RoutePopularity, RouteSpot, UserRouteSpot
+from .popularity import BEST_ROUTES_CACHE_KEY, rollup_trending
+from .utils import materialize_route_document
+
+# 홍예문 근처의 스팟 3곳 (서로 약 1km 간격)
+SPOT_COORDS = [(37.4737, 126.6216), (37.4753, 126.6105), (37.4665, 126.6230)]
+
+
+class CourseFixtureMixin:
+    def make_user(self, name):
+        user = CustomUser.objects.create_user(useremail=f'{name}@example.com', username=name)
+        client = APIClient()
+        client.force_authenticate(user)
+        return user, client
+
+    def make_route(self, coords=SPOT_COORDS, region='중구', **fields):
+        route = Route.objects.create(user_region_name=region, total_spots=len(coords), **fields)
+        for order, (lat, lng) in enumerate(coords, start=1):
+            spot = Spot.objects.create(
+                name=f'{region}-{route.id}-{order}', lat=lat, lng=lng, content_id=f'c-{route.id}-{order}',
+                past_image_url=f'https://example.com/{route.id}-{order}.jpg',
+            )
+            RouteSpot.objects.create(route_id=route, spot_id=spot, order=order)
+        return route
+
+    def adopt(self, client, route):
+        return client.post('/v1/courses/generate_user_course/', {'route_id': route.id}, format='json')
+
+    def user_route_spots(self, user, route):
+        return list(UserRouteSpot.objects.filter(user_id=user, route_id=route).order_by('order'))
+
+
+class RouteDocumentTests(CourseFixtureMixin, TestCase):
+    def test_detail_serves_stored_document(self):
+        route = self.make_route()
+        document = materialize_route_document(route)
+        self.assertEqual([spot['order'] for spot in document['spots']], [1, 2, 3])
+        self.assertEqual(document['route']['bbox'], [37.4665, 126.6105, 37.4753, 126.6230])
+        self.assertGreater(document['route']['total_distance'], 1)
+
+        with self.assertNumQueries(1):
+            response = APIClient().get(f'/v1/routes/{route.id}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), document)
+
+    def test_legacy_route_document_is_built_once(self):
+        route = self.make_route()
+        self.assertIsNone(Route.objects.get(id=route.id).document)
+        first = APIClient().get(f'/v1/routes/{route.id}/').json()
+        self.assertEqual(Route.objects.get(id=route.id).document, first)
+        self.assertEqual(len(first['spots']), 3)
+
+    def test_missing_route_is_404(self):
+        self.assertEqual(APIClient().get('/v1/routes/999999/').status_code, 404)
+
+
+class PopularityTests(CourseFixtureMixin, TestCase):
+    def setUp(self):
+        self.route = self.make_route()
+        self.alice, self.alice_client = self.make_user('alice')
+        self.bob, self.bob_client = self.make_user('bob')
+
+    def adopters(self):
+        return RoutePopularity.objects.get(route_id=self.route).adopter_count
+
+    def test_adopter_count_follows_adopt_and_remove(self):
+        self.assertEqual(self.adopt(self.alice_client, self.route).status_code, 201)
+        self.assertEqual(self.adopters(), 1)
+        # 같은 사용자의 재요청은 새 채택이 아님
+        self.assertEqual(self.adopt(self.alice_client, self.route).data['created_count'], 0)
+        self.assertEqual(self.adopters(), 1)
+
+        self.adopt(self.bob_client, self.route)
+        self.assertEqual(self.adopters(), 2)
+
+        self.bob_client.delete(f'/v1/courses/{self.route.id}/users/delete/')
+        self.assertEqual(self.adopters(), 1)
+        # 채택하지 않은 코스 삭제는 영향 없음
+        self.bob_client.delete(f'/v1/courses/{self.route.id}/users/delete/')
+        self.assertEqual(self.adopters(), 1)
+
+        self.adopt(self.bob_client, self.route)
+        self.assertEqual(self.adopters(), 2)
+
+    def test_rollup_reconciles_counts(self):
+        self.adopt(self.alice_client, self.route)
+        self.adopt(self.bob_client, self.route)
+        RoutePopularity.objects.filter(route_id=self.route).update(adopter_count=99)
+        other = self.make_route(region='동구')
+        RoutePopularity.objects.create(route_id=other, adopter_count=3, trending_score=1.5)
+
+        self.assertEqual(rollup_trending(), 1)
+        self.assertEqual(self.adopters(), 2)
+        self.assertGreater(RoutePopularity.objects.get(route_id=self.route).trending_score, 1.9)
+        self.assertEqual(RoutePopularity.objects.get(route_id=other).adopter_count, 0)
+        self.assertEqual(RoutePopularity.objects.get(route_id=other).trending_score, 0)
+
+    def test_best_routes_ranking(self):
+        other = self.make_route(region='동구')
+        self.adopt(self.alice_client, self.route)
+        self.adopt(self.bob_client, self.route)
+        self.adopt(self.alice_client, other)
+        cache.delete(BEST_ROUTES_CACHE_KEY)
+        ranking = APIClient().get('/v1/routes/best/').json()
+        self.assertEqual([route['id'] for route in ranking], [self.route.id, other.id])
+
+
+class RouteListingTests(CourseFixtureMixin, TestCase):
+    def collect(self, path, **params):
+        client, ids, pages = APIClient(), [], 0
+        response = client.get(path, params)
+        while True:
+            self.assertEqual(response.status_code, 200)
+            ids.extend(route['id'] for route in response.json())
+            pages += 1
+            cursor = response.headers.get('X-Next-Cursor')
+            if not cursor:
+                return ids, pages
+            response = client.get(path, {**params, 'cursor': cursor})
+
+    def test_cursor_is_stable_on_equal_created_at(self):
+        routes = [Route.objects.create(user_region_name='중구', total_spots=3) for _ in range(5)]
+        Route.objects.update(created_at=timezone.now())
+
+        ids, pages = self.collect('/v1/routes/', limit=2)
+        self.assertEqual(ids, sorted((route.id for route in routes), reverse=True))
+        self.assertEqual(pages, 3)
+
+    def test_cursor_continues_after_new_routes(self):
+        old = [Route.objects.create(user_region_name='중구', total_spots=3) for _ in range(3)]
+        first = APIClient().get('/v1/routes/', {'limit': 2})
+        Route.objects.create(user_region_name='중구', total_spots=3)  # 첫 페이지 이후 추가된 코스
+        rest = APIClient().get('/v1/routes/', {'limit': 2, 'cursor': first.headers['X-Next-Cursor']})
+        self.assertEqual([route['id'] for route in rest.json()], [old[0].id])
+        self.assertIn('rel="next"', first.headers['Link'])
+
+    def test_filters_and_bad_params(self):
+        Route.objects.create(user_region_name='중구', total_spots=3, is_mission_available=True)
+        Route.objects.create(user_region_name='동구', total_spots=5)
+        ids, _ = self.collect('/v1/routes/', user_region_name='동구')
+        self.assertEqual(len(ids), 1)
+        ids, _ = self.collect('/v1/routes/', is_mission_available='true', total_spots=3)
+        self.assertEqual(len(ids), 1)
+        for params in ({'cursor': 'not-a-cursor'}, {'limit': 'x'}, {'total_spots': 'x'}, {'is_mission_available': 'maybe'}):
+            self.assertEqual(APIClient().get('/v1/routes/', params).status_code, 400)
+
+
+def _file_cache(location):
+    return {'default': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': location}}
+
+
+class SharedCacheMixin:
+    """워커 간에 공유되는 캐시 백엔드 (사용자별 캐시가 켜짐)"""
+
+    def setUp(self):
+        super().setUp()
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir, ignore_errors=True)
+        cache_override = override_settings(CACHES=_file_cache(cache_dir))
+        cache_override.enable()
+        self.addCleanup(cache_override.disable)
+
+
+class UserRoutesCacheTests(SharedCacheMixin, CourseFixtureMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.route = self.make_route()
+        self.user, self.client = self.make_user('walker')
+        self.adopt(self.client, self.route)
+
+    def unlocked(self):
+        course, = self.client.get('/v1/courses/user_routes/').json()
+        return [spot['unlock_at'] is not None for spot in course['spots']]
+
+    def test_cached_until_progress_changes(self):
+        self.assertTrue(user_cache_enabled())
+        self.assertEqual(self.unlocked(), [False, False, False])
+
+        first = self.user_route_spots(self.user, self.route)[0]
+        # 무효화 없이 바뀐 값은 캐시 때문에 보이지 않음
+        UserRouteSpot.objects.filter(id=first.id).update(is_used=True)
+        with self.assertNumQueries(0):
+            self.client.get('/v1/courses/user_routes/')
+
+        response = self.client.patch(f'/v1/courses/unlock_route_spot/{first.route_spot_id_id}/', {'id': first.id}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.unlocked(), [True, False, False])
+
+    def test_is_unlocked_keeps_original_meaning(self):
+        course, = self.client.get('/v1/courses/user_routes/').json()
+        self.assertEqual({spot['is_unlocked'] for spot in course['spots']}, {True})
+
+    def test_process_local_cache_is_not_used(self):
+        with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}):
+            self.assertFalse(user_cache_enabled())
+            self.assertIsNone(user_cache_key(self.user.id, 'user_routes'))
+            self.assertEqual(self.unlocked(), [False, False, False])
+            # 다른 워커에서 잠금 해제된 상황: 이 워커는 무효화를 보지 못해도 바로 반영
+            UserRouteSpot.objects.filter(user_id=self.user, order=1).update(unlock_at=timezone.now())
+            self.assertEqual(self.unlocked(), [True, False, False])
+
+
+class AdoptionTests(CourseFixtureMixin, TestCase):
+    def setUp(self):
+        self.route = self.make_route()
+        self.user, self.client = self.make_user('adopter')
+
+    def test_adopt_creates_every_spot_once(self):
+        response = self.adopt(self.client, self.route)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['created_count'], 3)
+        self.assertEqual([spot.order for spot in self.user_route_spots(self.user, self.route)], [1, 2, 3])
+
+        # 일부만 남은 상태에서 다시 채택하면 빠진 스팟만 채움
+        UserRouteSpot.objects.filter(user_id=self.user, order=2).delete()
+        response = self.adopt(self.client, self.route)
+        self.assertEqual((response.data['created_count'], response.data['existing_count']), (1, 2))
+        self.assertEqual(len(self.user_route_spots(self.user, self.route)), 3)
+
+    def test_adopt_errors(self):
+        self.assertEqual(self.client.post('/v1/courses/generate_user_course/', {}, format='json').status_code, 400)
+        self.assertEqual(self.adopt(self.client, Route(id=999999)).status_code, 404)
+        empty = Route.objects.create(user_region_name='중구', total_spots=0)
+        self.assertEqual(self.adopt(self.client, empty).status_code, 404)
+
+
+class UnlockSpotsTests(CourseFixtureMixin, TestCase):
+    def setUp(self):
+        self.route = self.make_route()
+        self.user, self.client = self.make_user('collector')
+        self.adopt(self.client, self.route)
+
+    def test_lists_unlocked_spots_with_past_photos(self):
+        self.assertEqual(self.client.get('/v1/courses/unlock_spots/').json()['data'], [])
+
+        first, second, third = self.user_route_spots(self.user, self.route)
+        UserRouteSpot.objects.filter(id__in=[first.id, second.id]).update(unlock_at=timezone.now())
+        Spot.objects.filter(routespots__id=second.route_spot_id_id).update(past_image_url='')
+
+        response = self.client.get('/v1/courses/unlock_spots/')
+        self.assertEqual(response.status_code, 200)
+        item, = response.json()
+        self.assertEqual(item['id'], first.id)
+        self.assertEqual(item['user_id'], self.user.id)
+        self.assertEqual(item['route_id'], self.route.id)
+        self.assertEqual(item['past_photo_url'], f'https://example.com/{self.route.id}-1.jpg')
+        self.assertEqual(
+            set(item),
+            {'id', 'user_id', 'order', 'unlock_at', 'is_used', 'created_at', 'route_id', 'route_spot_id',
+             'past_photo_url', 'spot_name'},
+        )
+
+    def test_paginates_by_id(self):
+        UserRouteSpot.objects.filter(user_id=self.user).update(unlock_at=timezone.now())
+        first_page = self.client.get('/v1/courses/unlock_spots/', {'limit': 2})
+        second_page = self.client.get('/v1/courses/unlock_spots/', {'limit': 2, 'cursor': first_page.headers['X-Next-Cursor']})
+        ids = [item['id'] for item in first_page.json() + second_page.json()]
+        self.assertEqual(ids, [spot.id for spot in self.user_route_spots(self.user, self.route)])
+        self.assertNotIn('X-Next-Cursor', second_page.headers)
+
+
+class SyncProgressTests(CourseFixtureMixin, TestCase):
+    def setUp(self):
+        self.route = self.make_route()
+        self.user, self.client = self.make_user('offline')
+        self.adopt(self.client, self.route)
+        self.spots = self.user_route_spots(self.user, self.route)
+
+    def sync(self, *events):
+        return self.client.post('/v1/courses/sync/', {'events': list(events)}, format='json')
+
+    def event(self, event_id, spot, type='unlock', occurred_at='2025-09-01T10:00:00Z'):
+        return {'event_id': event_id, 'type': type, 'user_route_spot_id': spot.id, 'occurred_at': occurred_at}
+
+    def test_duplicate_event_ids_in_one_batch(self):
+        response = self.sync(
+            self.event('e1', self.spots[0]),
+            self.event('e1', self.spots[1]),  # 같은 id의 두 번째 이벤트는 적용하지 않음
+            self.event('e2', self.spots[1], type='stamp'),
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['applied'], ['e1', 'e2'])
+        self.assertEqual(response.data['duplicates'], ['e1'])
+        self.assertEqual(
+            [(item['event_id'], item['status']) for item in response.data['results']],
+            [('e1', 'applied'), ('e1', 'duplicate'), ('e2', 'applied')],
+        )
+        first, second, _ = self.user_route_spots(self.user, self.route)
+        self.assertIsNotNone(first.unlock_at)
+        self.assertIsNone(second.unlock_at)
+        self.assertTrue(second.is_used)
+
+    def test_retry_reports_duplicates_and_rejections(self):
+        self.sync(self.event('e1', self.spots[0]))
+        response = self.sync(
+            self.event('e1', self.spots[0]),
+            self.event('e3', UserRouteSpot(id=999999)),
+            {'event_id': 'e4', 'type': 'teleport'},
+        )
+        self.assertEqual(response.data['applied'], [])
+        self.assertEqual(
+            [(item['event_id'], item['status']) for item in response.data['results']],
+            [('e1', 'duplicate'), ('e3', 'rejected'), ('e4', 'rejected')],
+        )
+        self.assertEqual(len(response.data['rejected']), 2)
+
+    def test_earliest_unlock_wins(self):
+        self.sync(
+            self.event('late', self.spots[0], occurred_at='2025-09-01T12:00:00Z'),
+            self.event('early', self.spots[0], occurred_at='2025-09-01T09:00:00Z'),
+        )
+        self.assertEqual(self.user_route_spots(self.user, self.route)[0].unlock_at.hour, 9)
+
+    def test_rejects_bad_bodies(self):
+        self.assertEqual(self.client.post('/v1/courses/sync/', [1, 2], format='json').status_code, 400)
+        self.assertEqual(self.sync().status_code, 400)
+
+
+class GeofenceTests(CourseFixtureMixin, TestCase):
+    def setUp(self):
+        geofence._indexes.clear()
+        self.addCleanup(geofence._indexes.clear)
+        self.route = self.make_route()
+        self.user, self.client = self.make_user('hiker')
+        self.adopt(self.client, self.route)
+        self.spots = self.user_route_spots(self.user, self.route)
+
+    def reachable(self, lat, lng, **data):
+        response = self.client.post('/v1/courses/geofence/', {'lat': lat, 'lng': lng, **data}, format='json')
+        self.assertEqual(response.status_code, 200)
+        return [item['user_route_spot_id'] for item in response.data['reachable']]
+
+    def test_hit_and_miss_radius(self):
+        lat, lng = SPOT_COORDS[0]
+        self.assertEqual(self.reachable(lat, lng), [self.spots[0].id])
+        # 위도 0.002도 ≈ 222m (반경 300m 안), 0.004도 ≈ 445m (밖)
+        self.assertEqual(self.reachable(lat + 0.002, lng), [self.spots[0].id])
+        self.assertEqual(self.reachable(lat + 0.004, lng), [])
+
+        response = self.client.post('/v1/courses/geofence/', {'lat': lat, 'lng': lng}, format='json')
+        hit, = response.data['reachable']
+        self.assertTrue(hit['is_next'])
+        self.assertLess(hit['distance_m'], 1)
+        self.assertEqual(response.data['pending_count'], 3)
+
+    def test_position_batch_and_route_filter(self):
+        positions = [{'lat': lat, 'lng': lng} for lat, lng in SPOT_COORDS[1:]]
+        response = self.client.post('/v1/courses/geofence/', {'positions': positions}, format='json')
+        self.assertCountEqual([item['order'] for item in response.data['reachable']], [2, 3])
+        self.assertEqual(self.reachable(*SPOT_COORDS[0], route_id=self.route.id + 1), [])
+        for body in ([], {'lat': 'x', 'lng': 1}, {'lat': 91, 'lng': 0}, {'positions': [{'lat': 0, 'lng': 0}] * 21}):
+            self.assertEqual(self.client.post('/v1/courses/geofence/', body, format='json').status_code, 400)
+
+    def test_progress_in_another_worker_invalidates_index(self):
+        self.assertEqual(self.reachable(*SPOT_COORDS[0]), [self.spots[0].id])
+        # 다른 워커가 잠금 해제 (이 프로세스의 LocMem 캐시 버전은 그대로)
+        UserRouteSpot.objects.filter(id=self.spots[0].id).update(unlock_at=timezone.now())
+        self.assertEqual(self.reachable(*SPOT_COORDS[0]), [])
+
+    def test_removal_invalidates_index(self):
+        self.assertEqual(self.reachable(*SPOT_COORDS[1]), [self.spots[1].id])
+        UserRouteSpot.objects.filter(user_id=self.user).delete()
+        self.assertEqual(self.reachable(*SPOT_COORDS[1]), [])
+
+        # 다시 채택하면 새 행으로 인덱스가 다시 만들어짐
+        self.adopt(self.client, self.route)
+        self.assertEqual(self.reachable(*SPOT_COORDS[1]), [self.user_route_spots(self.user, self.route)[1].id])
+
+    def test_index_is_reused_until_progress_changes(self):
+        self.reachable(*SPOT_COORDS[0])
+        index = geofence.get_pending_index(self.user.id)
+        self.assertIs(geofence.get_pending_index(self.user.id), index)
+        self.client.post('/v1/courses/sync/', {'events': [{
+            'event_id': 'u1', 'type': 'unlock', 'user_route_spot_id': self.spots[0].id,
+            'occurred_at': '2025-09-01T10:00:00Z',
+        }]}, format='json')
+        self.assertIsNot(geofence.get_pending_index(self.user.id), index)
+        self.assertEqual(len(geofence.get_pending_index(self.user.id)), 2)
+
+
+class SharedCacheGeofenceTests(SharedCacheMixin, GeofenceTests):
+    """공유 캐시 백엔드에서는 사용자 버전으로 인덱스를 무효화"""
+
+    def test_progress_in_another_worker_invalidates_index(self):
+        self.assertEqual(self.reachable(*SPOT_COORDS[0]), [self.spots[0].id])
+        UserRouteSpot.objects.filter(id=self.spots[0].id).update(unlock_at=timezone.now())
+        invalidate_user(self.user.id)  # 다른 워커의 무효화가 공유 캐시로 보임
+        self.assertEqual(self.reachable(*SPOT_COORDS[0]), [])
+
+    def test_removal_invalidates_index(self):
+        self.assertEqual(self.reachable(*SPOT_COORDS[1]), [self.spots[1].id])
+        self.client.delete(f'/v1/courses/{self.route.id}/users/delete/')
+        self.assertEqual(self.reachable(*SPOT_COORDS[1]), [])
+
+
+class DeleteUserCourseTests(SharedCacheMixin, CourseFixtureMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.route = self.make_route()
+        self.user, self.client = self.make_user('cleaner')
+        self.adopt(self.client, self.route)
+        spot = Spot.objects.get(routespots__route_id=self.route, routespots__order=1)
+        self.photo = Photo.objects.create(
+            user_id=self.user, spot_id=spot, storage_key='uploads/1/1/1/a.jpg',
+            derivatives={'thumb': 'uploads/1/1/1/a.thumb.webp'},
+        )
+
+    def delete(self):
+        return self.client.delete(f'/v1/courses/{self.route.id}/users/delete/')
+
+    def test_delete_invalidates_cached_routes(self):
+        self.assertEqual(len(self.client.get('/v1/courses/user_routes/').json()), 1)
+        UserRouteSpot.objects.filter(user_id=self.user, order=1).update(unlock_at=timezone.now())
+        self.assertEqual(len(self.client.get('/v1/courses/unlock_spots/').json()), 1)
+
+        with mock.patch('courses.views.deletion_queue') as queue, self.captureOnCommitCallbacks(execute=True):
+            response = self.delete()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['deleted_user_routes'], response.data['deleted_photos']), (3, 1))
+        queue.enqueue.assert_called_once_with(['uploads/1/1/1/a.jpg', 'uploads/1/1/1/a.thumb.webp'])
+
+        self.assertEqual(self.client.get('/v1/courses/user_routes/').json(), [])
+        self.assertEqual(self.client.get('/v1/courses/unlock_spots/').json()['data'], [])
+        self.assertFalse(Photo.objects.exists())
+
+    def test_storage_cleanup_waits_for_commit(self):
+        with mock.patch('courses.views.deletion_queue') as queue, self.captureOnCommitCallbacks(execute=False) as callbacks:
+            self.delete()
+        queue.enqueue.assert_not_called()
+        self.assertEqual(len(callbacks), 1)
+
+    def test_other_users_are_untouched(self):
+        other, other_client = self.make_user('neighbour')
+        self.adopt(other_client, self.route)
+        with mock.patch('courses.views.deletion_queue'):
+            self.delete()
+        self.assertEqual(len(self.user_route_spots(other, self.route)), 3)
+        self.assertEqual(len(other_client.get('/v1/courses/user_routes/').json()), 1)
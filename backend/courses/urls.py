@@ -5,6 +5,7 @@ from . import views
 urlpatterns = [
     path('', views.routes, name='routes'),
     path('best/', views.best_routes, name='best-routes'),
+    path('best/trending/', views.trending_routes, name='trending-routes'),
     path('<int:route_id>/', views.route_detail, name='route-detail'),
     path('<int:route_id>/users/', views.user_routes, name='user-routes'),
     path('<int:route_id>/users/delete/', views.delete_user_route_spot, name='delete-user-route-spot'),
@@ -15,4 +16,6 @@ urlpatterns = [
     path('user_routes/', views.user_routes, name='user-routes-list'),  # 사용자 코스 목록 조회
     path('unlock_spots/', views.unlock_spots, name='unlock-spots'), # 사용자 해금 장소 조회
     path('use_stamp/', views.use_stamp, name='use-stamp'), # 스탬프 사용
+    path('sync/', views.sync_progress, name='sync-progress'), # 오프라인 진행 이벤트 일괄 동기화
+    path('geofence/', views.geofence, name='geofence'), # 현재 위치 기준 도착 스팟 판정
 ]
\ No newline at end of file
@@ -3,7 +3,8 @@ import numpy as np
 import math
 from django.db.models import Q
 from spots.models import Spot
-from .models import RouteSpot
+from spots.catalog import get_catalog
+from .models import Route, RouteSpot
 from .serializers import RouteSerializer
 
 
@@ -47,7 +48,9 @@ ANSWER_TO_TAG_MAP = {
 
 def propose_mission(spots_queryset, user_lat, user_lon):
     """미션 수행이 가능한 장소들을 찾아 사용자에게 제안합니다."""
-    mission_spots = spots_queryset.filter(past_image_url__isnull=False).exclude(past_image_url='')
+    mission_spots = (spots_queryset.filter(past_image_url__isnull=False)
+                     .exclude(past_image_url='')
+                     .exclude(past_image_broken=True))
     
     if not mission_spots.exists():
         return "현재 수행 가능한 미션이 없습니다.", False, 0
@@ -76,6 +79,13 @@ def get_region_name(sigungu_code):
 
 def get_user_region(spots_queryset, user_lat, user_lon):
     """사용자의 현재 위치에서 가장 가까운 장소의 지역 코드를 추정합니다."""
+    # 카탈로그 아티팩트가 있으면 DB 순회 없이 벡터 연산으로 계산
+    catalog = get_catalog()
+    if catalog is not None and len(catalog):
+        nearest = catalog.nearest(user_lat, user_lon, k=1)
+        if nearest:
+            return catalog.spots[nearest[0][0]]['sigungu_code']
+
     min_dist = float('inf')
     closest_sigungu_code = "0"
     
@@ -98,7 +108,8 @@ def spots_to_dataframe(spots_queryset):
             'mapy': spot.lat,
             'mapx': spot.lng,
             'sigungucode': spot.sigungu_code,
-            'past_image_url': spot.past_image_url,
+            # 과거 사진 링크가 깨진 스팟은 미션 풀에서 제외 (일반 장소로 취급)
+            'past_image_url': '' if spot.past_image_broken else spot.past_image_url,
             'walking_activity': spot.walking_activity,
             'night_view': spot.night_view,
             'quiet_rest': spot.quiet_rest,
@@ -463,9 +474,93 @@ def save_course(result):
                 print(f"RouteSpot 저장 실패 (spot_id {spot['id']}): {spot_error}")
                 continue
         
+        # route_detail용 비정규화 문서 생성
+        try:
+            materialize_route_document(route)
+        except Exception as doc_error:
+            print(f"Route 문서 생성 실패 (route_id {route.id}): {doc_error}")
+
         print("코스 저장 완료")
         return route.id
         
     except Exception as e:
         print(f"save_course 전체 오류: {e}")
-        return None
\ No newline at end of file
+        return None
+
+
+# --- 4. 코스 상세 문서 ---
+def encode_polyline(points, precision=5):
+    """(lat, lng) 목록을 Google encoded polyline 문자열로 인코딩합니다."""
+    factor = 10 ** precision
+    result = []
+    prev_lat = prev_lng = 0
+    for lat, lng in points:
+        lat_i, lng_i = int(round(lat * factor)), int(round(lng * factor))
+        for delta in (lat_i - prev_lat, lng_i - prev_lng):
+            value = ~(delta << 1) if delta < 0 else (delta << 1)
+            while value >= 0x20:
+                result.append(chr((0x20 | (value & 0x1f)) + 63))
+                value >>= 5
+            result.append(chr(value + 63))
+        prev_lat, prev_lng = lat_i, lng_i
+    return ''.join(result)
+
+
+def build_route_document(route):
+    """
+    route_detail이 그대로 반환할 코스 문서를 만듭니다.
+    RouteSpot과 Spot을 한 번의 조인 쿼리로 읽습니다.
+    """
+    rows = list(
+        RouteSpot.objects.filter(route_id=route.id)
+        .order_by('order')
+        .values(
+            'order', 'spot_id', 'spot_id__name', 'spot_id__description',
+            'spot_id__lat', 'spot_id__lng', 'spot_id__address',
+        )
+    )
+
+    spots = [
+        {
+            'id': row['spot_id'],
+            'title': row['spot_id__name'],
+            'description': row['spot_id__description'],
+            'lat': row['spot_id__lat'],
+            'lng': row['spot_id__lng'],
+            'order': row['order'],
+            'address': row['spot_id__address'],
+        }
+        for row in rows
+    ]
+
+    points = [(spot['lat'], spot['lng']) for spot in spots]
+    total_distance = sum(
+        float(haversine_distance(a[0], a[1], b[0], b[1])) for a, b in zip(points, points[1:])
+    )
+    bbox = None
+    if points:
+        lats = [p[0] for p in points]
+        lngs = [p[1] for p in points]
+        bbox = [min(lats), min(lngs), max(lats), max(lngs)]
+
+    return {
+        'route': {
+            'id': route.id,
+            'title': route.user_region_name,  # title 대신 user_region_name 사용
+            'user_region_name': route.user_region_name,
+            'total_spots': route.total_spots,
+            'mission_available': route.is_mission_available,
+            'total_distance': round(total_distance, 2),  # km
+            'bbox': bbox,  # [min_lat, min_lng, max_lat, max_lng]
+            'polyline': encode_polyline(points),
+        },
+        'spots': spots,
+    }
+
+
+def materialize_route_document(route):
+    """코스 문서를 생성해 Route.document에 저장하고 반환합니다."""
+    document = build_route_document(route)
+    Route.objects.filter(id=route.id).update(document=document)
+    route.document = document
+    return document
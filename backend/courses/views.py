@@ -4,48 +4,92 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework import status
 from .models import Route, RouteSpot, UserRouteSpot
 from .serializers import RouteSerializer, RouteDetailSerializer, UserRouteSpotSerializer, UserRouteSpotUpdateSerializer
-from .utils import generate_course, save_course
+from .utils import generate_course, save_course, materialize_route_document
+from .popularity import best_routes_data, trending_routes_data, record_adoption, record_removal
+from .pagination import keyset_page, paginated_response, CursorError
+from .cache import user_cache_key, invalidate_user, USER_CACHE_TIMEOUT
+from .progress import validate_events, apply_progress_events, event_statuses, MAX_SYNC_EVENTS
+from .geofence import get_pending_index, GEOFENCE_RADIUS_M, MAX_POSITIONS as MAX_GEOFENCE_POSITIONS
+from django.core.cache import cache
+from django.db import transaction
 from rest_framework.permissions import IsAuthenticated, AllowAny
-from django.db.models import Count
 from spots.models import Spot
 from photos.models import Photo
 from photos.serializers import PhotoSerializer
+from photos.storage import deletion_queue, photo_object_keys
+from django.db.models import Q
 
 # Create your views here.
 """
 코스 관련
 코스 조회, 코스 상세 조회, 유저 코스 생성, 유저 코스 조회, 잠금 해제제
-"""    
+"""
+USER_ROUTES_PAGE_SIZE = 20
+UNLOCK_SPOTS_PAGE_SIZE = 100    
 # 코스 조회
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def routes(request):
     """
     여행 코스 조회 API
-    프론트엔드에서 전체 코스를 조회합니다.
+    프론트엔드에서 전체 코스를 최신순으로 조회합니다.
+    (created_at, id) 키셋 페이지네이션을 사용하며 다음 페이지 커서는 X-Next-Cursor / Link 헤더로 전달합니다.
+
+    Query params:
+        cursor: 이전 응답의 X-Next-Cursor 값
+        limit: 페이지 크기 (기본 50, 최대 200)
+        user_region_name, is_mission_available, total_spots: 필터
     """
-    # 전체 코스 조회
     if request.method == 'GET':
         routes = Route.objects.all()
-        serializer = RouteSerializer(routes, many=True)
-        return Response(serializer.data, status=200)
+        
+        user_region_name = request.GET.get('user_region_name')
+        if user_region_name:
+            routes = routes.filter(user_region_name=user_region_name)
+        
+        is_mission_available = request.GET.get('is_mission_available')
+        if is_mission_available is not None:
+            if is_mission_available.lower() not in ('true', 'false'):
+                return Response({'error': 'is_mission_available은 true 또는 false여야 합니다.'}, status=status.HTTP_400_BAD_REQUEST)
+            routes = routes.filter(is_mission_available=is_mission_available.lower() == 'true')
+        
+        total_spots = request.GET.get('total_spots')
+        if total_spots is not None:
+            try:
+                routes = routes.filter(total_spots=int(total_spots))
+            except ValueError:
+                return Response({'error': 'total_spots는 정수여야 합니다.'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            page, next_cursor = keyset_page(routes.defer('document'), request, fields=('created_at', 'id'))
+        except CursorError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        serializer = RouteSerializer(page, many=True)
+        return paginated_response(request, serializer.data, next_cursor)
 
 # 코스 인기순 조회
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def best_routes(request):
+    """
+    코스 인기순 조회 API
+    코스를 채택한 사용자 수 기준 상위 5개 코스를 캐시된 랭킹에서 반환합니다.
+    """
     if request.method == 'GET':
-        # route_id 언급 순으로 상위 5개 추출
-        top_route_ids = (UserRouteSpot.objects
-                        .values('route_id')
-                        .annotate(count=Count('route_id'))
-                        .order_by('-count')[:5])
-        # 실제 route 객체 반환환
-        route_ids = [item['route_id'] for item in top_route_ids]
-        routes = Route.objects.filter(id__in=route_ids)
+        return Response(best_routes_data(), status=200)
 
-        serializer = RouteSerializer(routes, many=True)
-        return Response(serializer.data, status=200)
+# 코스 트렌딩 조회
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def trending_routes(request):
+    """
+    코스 트렌딩 조회 API
+    최근 채택일수록 가중치가 큰(지수 감쇠) 점수 기준 상위 5개 코스를 반환합니다.
+    점수는 rollup_route_trending 명령이 주기적으로 갱신합니다.
+    """
+    if request.method == 'GET':
+        return Response(trending_routes_data(), status=200)
 
 # 코스 상세 조회
 @api_view(['GET'])
@@ -56,35 +100,13 @@ def route_detail(request, route_id):
     프론트엔드에서 특정 코스의 상세 정보를 조회합니다.
     """
     try:
-        # Route 모델을 먼저 찾기
-        route = get_object_or_404(Route, id=route_id)
+        # 저장 시 만들어둔 비정규화 문서를 기본키 조회 한 번으로 반환
+        route = Route.objects.get(id=route_id)
+        route_data = route.document
         
-        # 해당 루트의 모든 RouteSpot들을 찾기
-        route_spots = RouteSpot.objects.filter(route_id=route_id).order_by('order')
-        
-        # Route와 RouteSpot 정보를 함께 반환
-        route_data = {
-            'route': {
-                'id': route.id,
-                'title': route.user_region_name,  # title 대신 user_region_name 사용
-                'user_region_name': route.user_region_name,
-                'total_spots': route.total_spots,
-                'mission_available': route.is_mission_available,
-            },
-            'spots': []
-        }
-        
-        for route_spot in route_spots:
-            spot_data = {
-                'id': route_spot.spot_id.id,
-                'title': route_spot.spot_id.name,  # title 대신 name 사용
-                'description': route_spot.spot_id.description,
-                'lat': route_spot.spot_id.lat,
-                'lng': route_spot.spot_id.lng,
-                'order': route_spot.order,
-                'address': route_spot.spot_id.address,
-            }
-            route_data['spots'].append(spot_data)
+        # 문서가 없는 이전 코스는 한 번 생성해 저장 (코스는 저장 후 변경되지 않음)
+        if not route_data:
+            route_data = materialize_route_document(route)
         
         return Response(route_data, status=200)
         
@@ -129,56 +151,65 @@ def generate_user_course(request):
                 )
             
             # RouteSpot 존재 여부 확인
-            route_spots = RouteSpot.objects.filter(route_id=route_id)
-            if not route_spots.exists():
+            route_spots = list(RouteSpot.objects.filter(route_id=route_id).order_by('order').values('id', 'order'))
+            if not route_spots:
                 return Response(
                     {'error': f'Route {route_id}에 대한 RouteSpot이 없습니다.'}, 
                     status=status.HTTP_404_NOT_FOUND
                 )
             
-            print(f"[generate_user_course] RouteSpot 개수: {route_spots.count()}")
+            print(f"[generate_user_course] RouteSpot 개수: {len(route_spots)}")
             
-            # UserRouteSpot 생성
-            created_user_routes = []
-            for route_spot in route_spots:
-                try:
-                    user_route_data = {
-                        'user_id': user,  # CustomUser 인스턴스 전달
-                        'route_id': route,  # Route 인스턴스 전달
-                        'route_spot_id': route_spot,  # RouteSpot 인스턴스 전달
-                        'order': route_spot.order,  # order 필드 추가
-                    }
-                    
-                    # 이미 존재하는지 확인
-                    existing_user_route = UserRouteSpot.objects.filter(
-                        user_id=user,
-                        route_spot_id=route_spot,
-                        route_id=route
-                    ).first()
-                    
-                    if not existing_user_route:
-                        user_route = UserRouteSpot.objects.create(**user_route_data)
-                        created_user_routes.append(user_route)
-                        print(f"[generate_user_course] UserRouteSpot 생성: {user_route.id}")
-                    else:
-                        print(f"[generate_user_course] UserRouteSpot 이미 존재: {existing_user_route.id}")
-                        created_user_routes.append(existing_user_route)
-                        
-                except Exception as e:
-                    print(f"[generate_user_course] UserRouteSpot 생성 실패: {e}")
-                    continue
+            # UserRouteSpot 일괄 생성
+            # unique_together(user_id, route_spot_id, route_id) 충돌은 무시하므로 재시도/중복 탭에도 결과가 같습니다.
+            with transaction.atomic():
+                # 같은 사용자의 동시 요청을 직렬화해 신규 채택 여부를 정확히 판단
+                type(user).objects.select_for_update().only('id').get(pk=user.pk)
+                
+                existing_ids = set(
+                    UserRouteSpot.objects.filter(user_id=user, route_id=route).values_list('route_spot_id', flat=True)
+                )
+                # 이 사용자가 처음 채택하는 코스인지 확인 (인기도는 스팟이 아닌 사용자 수로 집계)
+                is_new_adopter = not existing_ids
+                
+                UserRouteSpot.objects.bulk_create(
+                    [
+                        UserRouteSpot(
+                            user_id=user,  # CustomUser 인스턴스 전달
+                            route_id=route,  # Route 인스턴스 전달
+                            route_spot_id_id=route_spot['id'],
+                            order=route_spot['order'],  # order 필드 추가
+                        )
+                        for route_spot in route_spots
+                        if route_spot['id'] not in existing_ids
+                    ],
+                    ignore_conflicts=True,
+                )
+                user_routes = list(UserRouteSpot.objects.filter(user_id=user, route_id=route).order_by('order'))
+                
+                if is_new_adopter and user_routes:
+                    record_adoption(route.id)
+            
+            created_user_routes = [ur for ur in user_routes if ur.route_spot_id_id not in existing_ids]
+            existing_user_routes = [ur for ur in user_routes if ur.route_spot_id_id in existing_ids]
+            print(f"[generate_user_course] UserRouteSpot 생성 {len(created_user_routes)}개, 기존 {len(existing_user_routes)}개")
             
-            if not created_user_routes:
+            if not user_routes:
                 return Response(
                     {'error': '사용자 코스를 생성할 수 없습니다.'}, 
                     status=status.HTTP_500_INTERNAL_SERVER_ERROR
                 )
             
+            invalidate_user(user.id)
+            
             # 성공 응답
             return Response({
                 'success': True,
-                'message': f'{len(created_user_routes)}개의 사용자 코스가 생성되었습니다.',
-                'user_routes_count': len(created_user_routes),
+                'message': f'{len(user_routes)}개의 사용자 코스가 생성되었습니다.',
+                'user_routes_count': len(user_routes),
+                'created_count': len(created_user_routes),
+                'existing_count': len(existing_user_routes),
+                'user_routes': UserRouteSpotSerializer(user_routes, many=True).data,
                 'route_id': route_id
             }, status=status.HTTP_201_CREATED)
             
@@ -213,51 +244,65 @@ def user_routes(request, route_id=None):
             return Response(serializer.data, status=status.HTTP_200_OK)
         else:
             # 사용자의 모든 코스 조회 (새로운 기능)
-            # 사용자의 UserRouteSpot 조회
-            user_route_spots = UserRouteSpot.objects.filter(user_id=user.id).select_related(
-                'route_spot_id__route_id',  # Route 정보
-                'route_spot_id__spot_id'    # Spot 정보
-            ).order_by('route_spot_id__route_id', 'order')
+            # 코스 단위 키셋 페이지네이션 + 사용자별 캐시 (진행 상태 변경 시 invalidate_user로 무효화)
+            cache_key = user_cache_key(user.id, 'user_routes', request.GET.get('cursor', ''), request.GET.get('limit', ''))
+            cached = cache.get(cache_key) if cache_key else None
+            if cached is not None:
+                course_list, next_cursor = cached
+                return paginated_response(request, course_list, next_cursor)
             
-            if not user_route_spots.exists():
-                print(f"[user_routes] 사용자 {user.id}의 코스 없음")
-                return Response([], status=status.HTTP_200_OK)
+            # 1) 사용자가 채택한 코스 한 페이지 (최신 코스 순)
+            user_courses = (Route.objects.filter(userroutespots__user_id=user.id)
+                            .distinct()
+                            .values('id', 'total_spots', 'user_region_name', 'created_at'))
+            try:
+                route_page, next_cursor = keyset_page(user_courses, request, fields=('created_at', 'id'), default_limit=USER_ROUTES_PAGE_SIZE)
+            except CursorError as e:
+                return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
             
-            # 코스별로 그룹화
-            courses = {}
-            for user_route_spot in user_route_spots:
-                route = user_route_spot.route_spot_id.route_id
-                spot = user_route_spot.route_spot_id.spot_id
-                
-                if route.id not in courses:
-                    courses[route.id] = {
-                        'route_id': route.id,
-                        'total_spots': route.total_spots,
-                        'user_region_name': route.user_region_name,
-                        'created_at': route.created_at,
-                        'spots': []
-                    }
-                
-                courses[route.id]['spots'].append({
-                    'id': spot.id,
-                    'title': spot.name,
-                    'lat': spot.lat,
-                    'lng': spot.lng,
-                    'order': user_route_spot.order,
-                    'address': spot.address,  # 주소 정보 추가
-                    'user_route_spot_id': user_route_spot.id,  # UserRouteSpot의 ID 추가
-                    'route_spot_id': user_route_spot.route_spot_id.id,  # RouteSpot의 ID 추가
-                    'is_unlocked': user_route_spot.is_unlocked if hasattr(user_route_spot, 'is_unlocked') else True,
-                    'completed_at': user_route_spot.completed_at if hasattr(user_route_spot, 'completed_at') else None,
-                    'unlock_at': user_route_spot.unlock_at
+            # 2) 해당 코스들의 스팟을 조인 쿼리 한 번으로 조회
+            spot_rows = (UserRouteSpot.objects
+                         .filter(user_id=user.id, route_id__in=[route['id'] for route in route_page])
+                         .order_by('route_id', 'order')
+                         .values(
+                             'id', 'route_id', 'order', 'unlock_at', 'route_spot_id',
+                             'route_spot_id__spot_id', 'route_spot_id__spot_id__name',
+                             'route_spot_id__spot_id__lat', 'route_spot_id__spot_id__lng',
+                             'route_spot_id__spot_id__address',
+                         ))
+            
+            courses = {
+                route['id']: {
+                    'route_id': route['id'],
+                    'total_spots': route['total_spots'],
+                    'user_region_name': route['user_region_name'],
+                    'created_at': route['created_at'],
+                    'spots': []
+                }
+                for route in route_page
+            }
+            for row in spot_rows:
+                courses[row['route_id']]['spots'].append({
+                    'id': row['route_spot_id__spot_id'],
+                    'title': row['route_spot_id__spot_id__name'],
+                    'lat': row['route_spot_id__spot_id__lat'],
+                    'lng': row['route_spot_id__spot_id__lng'],
+                    'order': row['order'],
+                    'address': row['route_spot_id__spot_id__address'],  # 주소 정보 추가
+                    'user_route_spot_id': row['id'],  # UserRouteSpot의 ID 추가
+                    'route_spot_id': row['route_spot_id'],  # RouteSpot의 ID 추가
+                    'is_unlocked': True,  # 기존 응답과 동일 (UserRouteSpot에 해당 필드 없음, 잠금 상태는 unlock_at)
+                    'completed_at': None,  # 별도 완료 시각 필드 없음 (unlock_at 사용)
+                    'unlock_at': row['unlock_at']
                 })
             
-            # 코스 목록을 생성일 기준으로 정렬
-            course_list = list(courses.values())
-            course_list.sort(key=lambda x: x['created_at'], reverse=True)
+            # 코스 목록은 생성일 기준 최신순 (페이지 쿼리 순서 유지)
+            course_list = [courses[route['id']] for route in route_page]
+            if cache_key:
+                cache.set(cache_key, (course_list, next_cursor), USER_CACHE_TIMEOUT)
             
             print(f"[user_routes] 사용자 {user.id}의 코스 {len(course_list)}개 반환")
-            return Response(course_list, status=status.HTTP_200_OK)
+            return paginated_response(request, course_list, next_cursor)
         
     except Exception as e:
         print(f"[user_routes] 오류: {e}")
@@ -277,24 +322,29 @@ def delete_user_route_spot(request, route_id):
     """
     if request.method == "DELETE":
         user = request.user
-        # 1) 사용자 코스(UserRouteSpot) 삭제
-        user_route_spots_qs = UserRouteSpot.objects.filter(user_id=user, route_id_id=route_id)
-        deleted_user_routes = user_route_spots_qs.count()
-        user_route_spots_qs.delete()
+        with transaction.atomic():
+            # 1) 사용자 코스(UserRouteSpot) 삭제
+            _, deleted_by_model = UserRouteSpot.objects.filter(user_id=user, route_id_id=route_id).delete()
+            deleted_user_routes = deleted_by_model.get(UserRouteSpot._meta.label, 0)
+            if deleted_user_routes:
+                record_removal(route_id)
+
+            # 2) 사용자 촬영 사진(Photo)도 함께 삭제
+            #    - 기본: user + route_id 일치
+            #    - 보강: 해당 route에 속한 spot들(Spot IDs)로도 삭제 (초기 저장 시 route_id가 비어있던 사진 대비)
+            photos_qs = Photo.objects.filter(user_id=user).filter(
+                Q(route_id_id=route_id) |
+                Q(spot_id__in=RouteSpot.objects.filter(route_id=route_id).values('spot_id'))
+            )
+            photo_rows = list(photos_qs.values_list('id', 'image_url', 'storage_key', 'derivatives'))
+            Photo.objects.filter(id__in=[row[0] for row in photo_rows]).delete()
+            deleted_photos = len(photo_rows)
 
-        # 2) 사용자 촬영 사진(Photo)도 함께 삭제
-        #    - 기본: user + route_id 일치
-        #    - 보강: 해당 route에 속한 spot들(Spot IDs)로도 삭제 (초기 저장 시 route_id가 비어있던 사진 대비)
-        photos_qs = Photo.objects.filter(user_id=user, route_id_id=route_id)
+            # 3) 저장소 객체(원본 + 파생 이미지)는 커밋 후 백그라운드 큐에서 일괄 삭제
+            storage_keys = [key for _, *fields in photo_rows for key in photo_object_keys(*fields)]
+            transaction.on_commit(lambda: deletion_queue.enqueue(storage_keys))
 
-        # 보강 삭제: route에 포함된 스팟의 사진까지 제거
-        route_spot_ids = RouteSpot.objects.filter(route_id=route_id).values_list('spot_id', flat=True)
-        extra_qs = Photo.objects.filter(user_id=user, spot_id_id__in=list(route_spot_ids))
-        # 합쳐서 삭제
-        deleted_photos = photos_qs.count() + extra_qs.exclude(id__in=photos_qs.values_list('id', flat=True)).count()
-        # 실제 삭제 실행
-        photos_qs.delete()
-        extra_qs.delete()
+        invalidate_user(user.id)
 
         return Response(
             {
@@ -331,6 +381,7 @@ def unlock_route_spot(request, route_spot_id):
             serializer = UserRouteSpotUpdateSerializer(user_route_spot, data=request.data, partial=True)
             if serializer.is_valid(raise_exception=True):
                 serializer.save()
+                invalidate_user(user.id)
                 print(f"[unlock_route_spot] UserRouteSpot {user_route_spot.id} 방문 완료 처리됨 - unlock_at: {request.data['unlock_at']}")
                 return Response(serializer.data, status=status.HTTP_200_OK)
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -348,25 +399,56 @@ def unlock_spots(request):
     유저 해금 장소 조회 API
     유저의 UserRouteSpot 테이블에서 해금 장소를 조회합니다.
     해금 기준 : unlock_at이 null이 아닌 장소
+    id 순 키셋 페이지네이션 (다음 페이지 커서는 X-Next-Cursor / Link 헤더), 사용자별 캐시
     """
     if request.method == "GET":
         user = request.user
-        user_route_spots = UserRouteSpot.objects.filter(user_id=user.id, unlock_at__isnull=False)
-        data = []
-        if not user_route_spots.exists():
+        cache_key = None
+        if user.is_authenticated:
+            cache_key = user_cache_key(user.id, 'unlock_spots', request.GET.get('cursor', ''), request.GET.get('limit', ''))
+        if cache_key:
+            cached = cache.get(cache_key)
+            if cached is not None:
+                data, next_cursor = cached
+                return paginated_response(request, data, next_cursor)
+        
+        # 과거 사진이 있는 해금 장소를 Spot까지 조인한 쿼리 한 번으로 조회
+        unlocked = UserRouteSpot.objects.filter(user_id=user.id, unlock_at__isnull=False)
+        rows = (unlocked
+                .exclude(route_spot_id__spot_id__past_image_url='')
+                .values(
+                    'id', 'route_id', 'route_spot_id', 'order', 'unlock_at', 'is_used', 'created_at',
+                    'route_spot_id__spot_id__past_image_url', 'route_spot_id__spot_id__name',
+                ))
+        try:
+            page, next_cursor = keyset_page(rows, request, fields=('id',), descending=False, default_limit=UNLOCK_SPOTS_PAGE_SIZE)
+        except CursorError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        if not page and not request.GET.get('cursor') and not unlocked.exists():
             return Response({
                 'message': '해당 사용자의 루트 스팟이 없습니다.',
-                'data': data
+                'data': []
             }, status=status.HTTP_200_OK)
-        serializer = UserRouteSpotSerializer(user_route_spots, many=True)
-        for spot in serializer.data:
-            spot_id = RouteSpot.objects.get(id=spot['route_spot_id'])
-            if spot_id.spot_id.past_image_url:
-                past_photo_url = Spot.objects.get(id=spot_id.spot_id.id).past_image_url
-                spot['past_photo_url'] = past_photo_url
-                spot['spot_name'] = spot_id.spot_id.name
-                data.append(spot)
-        return Response(data, status=status.HTTP_200_OK)
+        
+        data = []
+        for row in page:
+            data.append({
+                'id': row['id'],
+                'user_id': user.id,
+                'order': row['order'],
+                'unlock_at': row['unlock_at'],
+                'is_used': row['is_used'],
+                'created_at': row['created_at'],
+                'route_id': row['route_id'],
+                'route_spot_id': row['route_spot_id'],
+                'past_photo_url': row['route_spot_id__spot_id__past_image_url'],
+                'spot_name': row['route_spot_id__spot_id__name'],
+            })
+        
+        if cache_key:
+            cache.set(cache_key, (data, next_cursor), USER_CACHE_TIMEOUT)
+        return paginated_response(request, data, next_cursor)
     else:
         return Response({'error': 'GET 메서드만 지원됩니다.'}, status=status.HTTP_405_METHOD_NOT_ALLOWED)
 
@@ -522,5 +604,83 @@ def use_stamp(request):
         serializer = UserRouteSpotUpdateSerializer(user_route_spot, data=request.data, partial=True)
         if serializer.is_valid(raise_exception=True):
             serializer.save()
+            invalidate_user(user.id)
             return Response(serializer.data, status=status.HTTP_200_OK)
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
\ No newline at end of file
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+# 오프라인 진행 이벤트 일괄 동기화
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def sync_progress(request):
+    """
+    진행 이벤트 동기화 API
+    네트워크가 불안정할 때 쌓아둔 잠금 해제(unlock)/스탬프 사용(stamp) 이벤트를 한 번에 적용합니다.
+    event_id는 클라이언트가 생성한 멱등성 키로, 이미 적용됐거나 같은 배치에서 반복된 이벤트는 duplicates로 반환됩니다.
+    results에는 요청 순서대로 이벤트별 상태(applied / duplicate / rejected)가 들어갑니다.
+
+    요청 예시:
+        {"events": [{"event_id": "uuid", "type": "unlock", "user_route_spot_id": 1, "occurred_at": "2025-09-01T10:00:00Z"}]}
+    """
+    if not isinstance(request.data, dict):
+        return Response({'error': '요청 본문은 JSON 객체여야 합니다.'}, status=status.HTTP_400_BAD_REQUEST)
+    events = request.data.get('events')
+    if not isinstance(events, list) or not events:
+        return Response({'error': 'events 리스트가 필요합니다.'}, status=status.HTTP_400_BAD_REQUEST)
+    if len(events) > MAX_SYNC_EVENTS:
+        return Response({'error': f'events는 최대 {MAX_SYNC_EVENTS}개까지 보낼 수 있습니다.'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        valid_events, rejected, repeated = validate_events(events)
+        result = apply_progress_events(request.user, valid_events)
+        result['rejected'] = rejected + result['rejected']
+        result['duplicates'] = result['duplicates'] + repeated
+        result['results'] = event_statuses(events, result)
+        return Response(result, status=status.HTTP_200_OK)
+    except Exception as e:
+        print(f"[sync_progress] 오류: {e}")
+        return Response({'error': f'진행 상태 동기화 중 오류가 발생했습니다: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+# 지오펜스 평가
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def geofence(request):
+    """
+    지오펜스 평가 API
+    현재 위치(또는 최대 20개의 최근 위치 배치)를 사용자의 미해제 코스 스팟과 비교해
+    반경 안에 들어온 스팟을 반환합니다.
+
+    요청 예시:
+        {"lat": 37.47, "lng": 126.62}
+        {"positions": [{"lat": 37.47, "lng": 126.62}, ...], "route_id": 3}
+    """
+    if not isinstance(request.data, dict):
+        return Response({'error': '요청 본문은 JSON 객체여야 합니다.'}, status=status.HTTP_400_BAD_REQUEST)
+    raw_positions = request.data.get('positions')
+    if raw_positions is None:
+        raw_positions = [{'lat': request.data.get('lat'), 'lng': request.data.get('lng')}]
+    if not isinstance(raw_positions, list) or not raw_positions or len(raw_positions) > MAX_GEOFENCE_POSITIONS:
+        return Response({'error': f'positions는 1~{MAX_GEOFENCE_POSITIONS}개의 위치 리스트여야 합니다.'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    positions = []
+    for position in raw_positions:
+        try:
+            lat, lng = float(position['lat']), float(position['lng'])
+        except (TypeError, KeyError, ValueError):
+            return Response({'error': 'lat와 lng는 숫자여야 합니다.'}, status=status.HTTP_400_BAD_REQUEST)
+        if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+            return Response({'error': 'lat/lng 범위가 올바르지 않습니다.'}, status=status.HTTP_400_BAD_REQUEST)
+        positions.append((lat, lng))
+    
+    route_id = request.data.get('route_id')
+    try:
+        route_id = int(route_id) if route_id is not None else None
+    except (TypeError, ValueError):
+        return Response({'error': 'route_id는 정수여야 합니다.'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    index = get_pending_index(request.user.id)
+    reachable = index.evaluate(positions, route_id=route_id)
+    return Response({
+        'reachable': reachable,
+        'pending_count': len(index),
+        'radius_m': GEOFENCE_RADIUS_M,
+    }, status=status.HTTP_200_OK)
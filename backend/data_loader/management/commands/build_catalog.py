@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from spots.models import Spot
+from spots import catalog
+
+
+class Command(BaseCommand):
+    help = 'Build derived spot catalog artifacts (run after load_incheon_spots)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output-dir', type=str, default=None, help='Artifact directory (default: CATALOG_ARTIFACT_DIR)')
+        parser.add_argument('--keep', type=int, default=3, help='Number of versions to keep')
+
+    def handle(self, *args, **options):
+        fields = sorted(set(catalog.SPOT_META_FIELDS) | set(catalog.TAG_FIELDS) | {'past_image_broken'})
+        spot_rows = list(Spot.objects.order_by('id').values(*fields))
+
+        if not spot_rows:
+            self.stdout.write(self.style.WARNING('No spots found. Run load_incheon_spots first.'))
+            return
+
+        arrays, meta = catalog.compute_catalog(spot_rows)
+        version = catalog.write_catalog(arrays, meta, base_dir=options['output_dir'], keep=options['keep'])
+        catalog.reset_catalog()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Built catalog {version}: {len(meta)} spots, missions={int(arrays["mission"].sum())}, '
+                f'dir={options["output_dir"] or catalog.artifact_dir()}'
+            )
+        )
@@ -0,0 +1,109 @@
+import asyncio
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from spots.link_checker import LINK_FIELDS, check_links, collect_targets
+from spots.models import Spot, SpotLinkCheck
+
+
+class Command(BaseCommand):
+    help = (
+        'Check every spot image URL concurrently, record the results and flag spots whose past image '
+        'failed definitively (4xx or non-image) on several consecutive runs'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=50, help='Maximum open connections')
+        parser.add_argument('--per-host', type=int, default=4, help='Maximum concurrent requests per host')
+        parser.add_argument('--timeout', type=float, default=10.0, help='Per-request timeout in seconds')
+        parser.add_argument('--fields', nargs='+', choices=LINK_FIELDS, default=list(LINK_FIELDS), help='Image fields to check')
+        parser.add_argument('--failures-to-flag', type=int, default=3, help='Consecutive definitive failures before a past image is flagged broken')
+        parser.add_argument('--max-failure-rate', type=float, default=0.5, help='Abort without recording anything if more than this share of URLs fail (outage guard)')
+        parser.add_argument('--skip-catalog', action='store_true', help='Do not rebuild catalog artifacts when mission flags change')
+
+    def handle(self, *args, **options):
+        fields = options['fields']
+        targets = collect_targets(Spot.objects.order_by('id').values('id', *fields), fields)
+        self.stdout.write(f'Checking {len(targets)} URLs...')
+
+        results = asyncio.run(check_links(
+            targets,
+            concurrency=options['concurrency'],
+            per_host=options['per_host'],
+            timeout=options['timeout'],
+        ))
+
+        failures = [r for r in results if not r.ok]
+        # 네트워크 장애/오프라인 실행이면 대부분이 실패하므로 아무것도 기록하지 않고 중단
+        if results and len(failures) / len(results) > options['max_failure_rate']:
+            raise CommandError(
+                f'{len(failures)}/{len(results)} URLs failed (limit {options["max_failure_rate"]:.0%}); '
+                f'looks like an outage, nothing recorded'
+            )
+
+        # 연속 확정 실패 횟수: 확정 실패면 +1, 성공이면 0, 일시 실패면 이전 값 유지 (URL이 바뀌면 새로 셈)
+        previous = {
+            (row['spot_id'], row['field']): row
+            for row in SpotLinkCheck.objects.values('spot_id', 'field', 'url', 'consecutive_failures')
+        }
+        streaks = {}
+        for result in results:
+            row = previous.get((result.spot_id, result.field))
+            streak = row['consecutive_failures'] if row and row['url'] == result.url else 0
+            if result.ok:
+                streak = 0
+            elif result.definitive_failure:
+                streak += 1
+            streaks[(result.spot_id, result.field)] = streak
+
+        checked_at = timezone.now()
+        SpotLinkCheck.objects.bulk_create(
+            [
+                SpotLinkCheck(
+                    spot_id=result.spot_id, field=result.field, url=result.url, ok=result.ok,
+                    status_code=result.status_code, latency_ms=result.latency_ms,
+                    content_length=result.content_length, content_type=result.content_type,
+                    error=result.error, consecutive_failures=streaks[(result.spot_id, result.field)],
+                    checked_at=checked_at,
+                )
+                for result in results
+            ],
+            update_conflicts=True,
+            unique_fields=['spot', 'field'],
+            update_fields=[
+                'url', 'ok', 'status_code', 'latency_ms', 'content_length', 'content_type', 'error',
+                'consecutive_failures', 'checked_at',
+            ],
+            batch_size=500,
+        )
+
+        changed = 0
+        if 'past_image_url' in fields:
+            past = [r for r in results if r.field == 'past_image_url']
+            broken_ids = {
+                r.spot_id for r in past if streaks[(r.spot_id, r.field)] >= options['failures_to_flag']
+            }
+            # 플래그 해제는 성공했거나 더 이상 past_image_url이 없는 스팟만 (일시 실패는 기존 상태 유지)
+            recovered = Spot.objects.filter(past_image_broken=True).exclude(
+                id__in=[r.spot_id for r in past if not r.ok]
+            )
+            changed += Spot.objects.filter(id__in=broken_ids, past_image_broken=False).update(past_image_broken=True)
+            changed += recovered.update(past_image_broken=False)
+            pending = sum(1 for r in past if 0 < streaks[(r.spot_id, r.field)] < options['failures_to_flag'])
+            self.stdout.write(
+                f'{len(broken_ids)} spots have broken past images, {pending} failing but not yet flagged '
+                f'({changed} flags changed)'
+            )
+            if changed and not options['skip_catalog']:
+                call_command('build_catalog', stdout=self.stdout)
+
+        for result in sorted(failures, key=lambda r: (r.spot_id, r.field))[:20]:
+            self.stdout.write(self.style.WARNING(
+                f'spot {result.spot_id} {result.field}: {result.status_code or "-"} {result.error} {result.url}'
+            ))
+        latencies = sorted(r.latency_ms for r in results if r.latency_ms is not None)
+        p95 = latencies[int(len(latencies) * 0.95)] if latencies else 0
+        self.stdout.write(self.style.SUCCESS(
+            f'Checked {len(results)} URLs: {len(results) - len(failures)} ok, {len(failures)} broken, p95 {p95}ms'
+        ))
@@ -1,5 +1,6 @@
 import csv
 import os
+from django.core.management import call_command
 from django.core.management.base import BaseCommand
 from spots.models import Spot
 
@@ -9,6 +10,7 @@ class Command(BaseCommand):
 
     def add_arguments(self, parser):
         parser.add_argument('csv_file', type=str, help='Path to the CSV file')
+        parser.add_argument('--skip-catalog', action='store_true', help='Do not rebuild catalog artifacts')
 
     def handle(self, *args, **options):
         csv_file = options['csv_file']
@@ -85,4 +87,8 @@ class Command(BaseCommand):
             self.style.SUCCESS(
                 f'Successfully created {spots_created} spots. Skipped {spots_skipped} spots.'
             )
-        ) 
\ No newline at end of file
+        )
+
+        # 파생 카탈로그 아티팩트 재생성
+        if not options['skip_catalog']:
+            call_command('build_catalog', stdout=self.stdout) 
\ No newline at end of file
@@ -1,3 +1,86 @@
+import io
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
 from django.test import TestCase
 
-# Create your tests here.
+from spots.models import Spot, SpotLinkCheck
+from spots.tests import OriginServer, _jpeg
+
+
+class CheckSpotLinksTests(TestCase):
+    def setUp(self):
+        self.routes = {
+            '/ok.jpg': (200, 'image/jpeg', _jpeg((10, 10))),
+            '/page.jpg': (200, 'text/html', b'<html>moved</html>'),
+            '/flaky.jpg': (503, 'text/html', b'busy'),
+        }
+        self.origin = OriginServer(self.routes).__enter__()
+        self.addCleanup(self.origin.__exit__, None, None, None)
+        self.spots = {
+            name: Spot.objects.create(name=name, lat=37.47, lng=126.62, content_id=f't-{name}', past_image_url=url)
+            for name, url in {
+                'ok': self.origin.url('/ok.jpg'),
+                'ok2': self.origin.url('/ok.jpg?2'),
+                'ok3': self.origin.url('/ok.jpg?3'),
+                'gone': self.origin.url('/gone.jpg'),
+                'page': self.origin.url('/page.jpg'),
+                'flaky': self.origin.url('/flaky.jpg'),
+                'offline': 'http://127.0.0.1:1/unreachable.jpg',
+            }.items()
+        }
+
+    def run_check(self, **options):
+        out = io.StringIO()
+        options = {'failures_to_flag': 2, 'max_failure_rate': 0.7, 'timeout': 2.0, **options}
+        call_command('check_spot_links', fields=['past_image_url'], skip_catalog=True, stdout=out, **options)
+        return out.getvalue()
+
+    def broken(self):
+        return set(Spot.objects.filter(past_image_broken=True).values_list('name', flat=True))
+
+    def streak(self, name):
+        return SpotLinkCheck.objects.get(spot=self.spots[name], field='past_image_url').consecutive_failures
+
+    def test_only_repeated_definitive_failures_are_flagged(self):
+        self.run_check()
+        self.assertEqual(self.broken(), set())
+        self.assertEqual(self.streak('gone'), 1)
+        self.assertEqual(self.streak('page'), 1)
+        self.assertEqual(self.streak('flaky'), 0)
+        self.assertEqual(self.streak('offline'), 0)
+
+        self.run_check()
+        self.assertEqual(self.broken(), {'gone', 'page'})
+        self.assertEqual(self.streak('gone'), 2)
+
+    def test_transient_failure_keeps_flag_and_success_clears_it(self):
+        self.run_check()
+        self.run_check()
+        self.assertIn('gone', self.broken())
+
+        # 오리진이 일시적으로 5xx -> 플래그 유지, 횟수도 그대로
+        self.routes['/gone.jpg'] = (503, 'text/html', b'busy')
+        self.run_check()
+        self.assertIn('gone', self.broken())
+        self.assertEqual(self.streak('gone'), 2)
+
+        self.routes['/gone.jpg'] = self.routes['/ok.jpg']
+        self.run_check()
+        self.assertNotIn('gone', self.broken())
+        self.assertEqual(self.streak('gone'), 0)
+
+    def test_outage_aborts_without_recording(self):
+        with self.assertRaises(CommandError):
+            self.run_check(max_failure_rate=0.3)
+        self.assertFalse(SpotLinkCheck.objects.exists())
+        self.assertEqual(self.broken(), set())
+
+    def test_changed_url_starts_a_new_count(self):
+        self.run_check()
+        spot = self.spots['gone']
+        spot.past_image_url = self.origin.url('/gone-again.jpg')
+        spot.save()
+        self.run_check()
+        self.assertEqual(self.streak('gone'), 1)
+        self.assertNotIn('gone', self.broken())
@@ -0,0 +1,116 @@
+"""
+과거-현재 합성 이미지
+사용자 사진과 스팟의 past_image_url을 서버에서 합성하고, 결과를 내용 주소(content-addressed) 키로 저장합니다.
+
+    uploads/<user>/<route>/<spot>/<uuid>.composite-<layout>-<hash[:16]>.jpg
+    hash = sha256(사진 키, 과거 사진 URL, 레이아웃, 렌더링 버전)
+
+입력이 같으면 키도 같으므로 한 번 만든 결과는 다시 렌더링하지 않습니다.
+키는 사진과 같은 사용자 접두사 아래에 두고 Photo.derivatives에 기록하므로,
+사진/코스 삭제와 고아 객체 정리(sweep_photo_storage)가 파생 이미지와 똑같이 처리합니다.
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+from django.core.files.storage import default_storage
+from spots.image_proxy import get_image, ImageProxyError
+
+from .derivatives import COMPOSITE_PREFIX, process_pool, update_derivatives
+from .imaging import COMPOSITE_LAYOUTS, render_composite
+from .storage import head_object, name_from_key, put_object
+
+COMPOSITE_RENDER_VERSION = 2  # 합성 방식이 바뀌면 올려서 캐시를 무효화
+COMPOSITE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+MAX_KNOWN_COMPOSITES = 10000
+
+# 저장소에 있는 것으로 확인된 합성 키 (내용 주소라 한 번 있으면 바뀌지 않음)
+_known = OrderedDict()
+_known_lock = threading.Lock()
+
+
+class CompositeSourceError(Exception):
+    """원본 사진이나 과거 사진을 가져올 수 없을 때"""
+
+
+def composite_name(layout):
+    """Photo.derivatives에 기록할 항목 이름"""
+    return f"{COMPOSITE_PREFIX}{layout}"
+
+
+def composite_key(photo_key, past_image_url, layout):
+    """uploads/1/2/3/<uuid>.jpg -> uploads/1/2/3/<uuid>.composite-<layout>-<hash>.jpg"""
+    digest = hashlib.sha256(
+        '\n'.join([photo_key, past_image_url, layout, str(COMPOSITE_RENDER_VERSION)]).encode()
+    ).hexdigest()
+    base, _ = os.path.splitext(photo_key)
+    return f"{base}.composite-{layout}-{digest[:16]}.jpg"
+
+
+def _remember(key):
+    with _known_lock:
+        _known[key] = True
+        _known.move_to_end(key)
+        while len(_known) > MAX_KNOWN_COMPOSITES:
+            _known.popitem(last=False)
+
+
+def _is_known(key):
+    with _known_lock:
+        if key in _known:
+            _known.move_to_end(key)
+            return True
+    return False
+
+
+def fetch_past_image(url):
+    """스팟 이미지 프록시의 디스크 캐시를 거쳐 과거 사진 원본을 가져옵니다."""
+    try:
+        data, _ = get_image(url, 'full')
+    except ImageProxyError as e:
+        raise CompositeSourceError(str(e))
+    return data
+
+
+def get_composite(photo_key, past_image_url, layout, source_key=None):
+    """
+    합성 이미지의 객체 키를 반환합니다. 없으면 렌더링해서 저장합니다.
+    photo_key는 사진 원본 키(결과 키의 기준), source_key는 실제로 읽을 입력 (기본은 원본)
+
+    Returns:
+        tuple: (객체 키, 이번에 새로 렌더링했는지 여부)
+
+    Raises:
+        ValueError: 지원하지 않는 layout
+        CompositeSourceError: 입력 이미지를 가져오거나 읽을 수 없을 때
+    """
+    if layout not in COMPOSITE_LAYOUTS:
+        raise ValueError(f"layout은 {', '.join(COMPOSITE_LAYOUTS)} 중 하나여야 합니다.")
+
+    key = composite_key(photo_key, past_image_url, layout)
+    if _is_known(key) or head_object(key) is not None:
+        _remember(key)
+        return key, False
+
+    try:
+        with default_storage.open(name_from_key(source_key or photo_key), 'rb') as f:
+            photo_data = f.read()
+    except Exception as e:
+        raise CompositeSourceError(f"사진 원본을 읽을 수 없습니다: {e}")
+    past_data = fetch_past_image(past_image_url)
+
+    try:
+        content = process_pool().submit(render_composite, photo_data, past_data, layout).result()
+    except (OSError, ValueError) as e:  # PIL.UnidentifiedImageError는 OSError
+        raise CompositeSourceError(f"이미지를 합성할 수 없습니다: {e}")
+
+    put_object(key, content, 'image/jpeg', cache_control=COMPOSITE_CACHE_CONTROL)
+    _remember(key)
+    return key, True
+
+
+def record_composite(photo_id, derivatives, layout, key):
+    """합성 키를 Photo.derivatives에 기록합니다 (이미 같은 키면 쓰지 않음)."""
+    if (derivatives or {}).get(composite_name(layout)) != key:
+        update_derivatives(photo_id, {composite_name(layout): key})
@@ -0,0 +1,120 @@
+"""
+사진 파생 이미지 파이프라인
+- 원본(storage_key)을 읽어 프로세스 풀에서 썸네일/WebP/AVIF를 만들고 (EXIF 제거)
+- 원본 키에서 결정되는 키로 저장한 뒤 Photo.derivatives에 기록합니다.
+- 합성 이미지(photos.composites)도 composite_<layout> 항목으로 같은 필드에 기록하므로
+  사진 삭제(photo_object_keys)와 고아 객체 정리(sweeper)가 함께 처리합니다.
+
+요청 스레드는 schedule_derivatives()로 작업만 넘기고 바로 반환합니다.
+"""
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import multiprocessing
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+
+from .imaging import render_derivatives
+from .models import Photo
+from .storage import name_from_key, put_object
+
+COMPOSITE_PREFIX = 'composite_'  # Photo.derivatives의 합성 이미지 항목 이름 접두사
+DERIVATIVE_CACHE_CONTROL = 'public, max-age=31536000, immutable'  # 키가 원본마다 고유하므로 변하지 않음
+
+_pool = None
+_dispatcher = None
+_pool_lock = threading.Lock()
+
+
+def derivative_key(original_key, name, content_type):
+    """uploads/1/2/3/<uuid>.jpg -> uploads/1/2/3/<uuid>.<크기>.<ext> (예: .thumb.webp, .thumb.avif)"""
+    base, _ = os.path.splitext(original_key)
+    size_name = name.split('_', 1)[0]
+    return f"{base}.{size_name}.{content_type.split('/')[-1]}"
+
+
+def update_derivatives(photo_id, entries, keep=None):
+    """
+    Photo.derivatives에 entries를 합쳐 저장합니다. 행을 잠그므로 파생 이미지 생성과 합성 기록이 서로 덮어쓰지 않습니다.
+    keep이 주어지면 기존 항목 중 keep(이름)이 True인 것만 남깁니다.
+
+    Returns:
+        dict: 저장된 derivatives (사진이 없으면 None)
+    """
+    with transaction.atomic():
+        row = Photo.objects.select_for_update().filter(id=photo_id).values('derivatives').first()
+        if row is None:
+            return None
+        derivatives = {name: key for name, key in (row['derivatives'] or {}).items() if keep is None or keep(name)}
+        derivatives.update(entries)
+        Photo.objects.filter(id=photo_id).update(derivatives=derivatives)
+    return derivatives
+
+
+def _executors():
+    """CPU 작업용 프로세스 풀과, 저장소 I/O를 기다리는 디스패처 스레드 풀 (지연 생성)"""
+    global _pool, _dispatcher
+    with _pool_lock:
+        if _pool is None:
+            workers = settings.PHOTO_DERIVATIVE_WORKERS
+            # 요청 스레드가 있는 프로세스에서 fork하지 않도록 spawn 사용
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+            _dispatcher = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='photo-derivatives')
+        return _pool, _dispatcher
+
+
+def process_pool():
+    """이미지 처리용 공용 프로세스 풀 (파생 이미지, 합성 이미지가 CPU 예산을 공유)"""
+    return _executors()[0]
+
+
+def generate_derivatives(photo_id):
+    """
+    사진 한 장의 파생 이미지를 만들어 저장합니다.
+
+    Returns:
+        dict: {이름: 객체 키} (원본이 없거나 직접 업로드 사진이 아니면 빈 dict)
+    """
+    photo = Photo.objects.filter(id=photo_id).values('storage_key').first()
+    if not photo or not photo['storage_key']:
+        return {}
+    original_key = photo['storage_key']
+
+    with default_storage.open(name_from_key(original_key), 'rb') as f:
+        data = f.read()
+
+    rendered = process_pool().submit(render_derivatives, data).result()
+
+    derivatives = {}
+    for name, (content, content_type, _size) in rendered.items():
+        key = derivative_key(original_key, name, content_type)
+        put_object(key, content, content_type, cache_control=DERIVATIVE_CACHE_CONTROL)
+        derivatives[name] = key
+
+    # 다시 생성할 때 이전 크기 항목은 버리고 합성 이미지 항목은 유지
+    update_derivatives(photo_id, derivatives, keep=lambda name: name.startswith(COMPOSITE_PREFIX))
+    return derivatives
+
+
+def _run(photo_id):
+    close_old_connections()
+    try:
+        return generate_derivatives(photo_id)
+    except Exception as e:
+        print(f"[photos] 파생 이미지 생성 실패 (photo={photo_id}): {str(e)}")
+        return None
+    finally:
+        close_old_connections()
+
+
+def schedule_derivatives(photo_id):
+    """
+    백그라운드에서 파생 이미지를 생성합니다. (트랜잭션 커밋 후 호출)
+
+    Returns:
+        Future: 결과는 {이름: 객체 키}, 실패하면 None
+    """
+    _, dispatcher = _executors()
+    return dispatcher.submit(_run, photo_id)
@@ -0,0 +1,99 @@
+"""
+사진 파생 이미지 / 과거-현재 합성 이미지 생성 (순수 Pillow 코드)
+프로세스 풀 워커에서 실행되므로 Django를 import하지 않습니다.
+"""
+import io
+
+from PIL import Image, ImageOps, features
+
+# 이름: (긴 변 최대 픽셀, 용도)
+DERIVATIVE_SIZES = {
+    'thumb': 320,    # 갤러리 그리드
+    'medium': 1080,  # 스탬프/상세 화면
+}
+COMPOSITE_LAYOUTS = ('side_by_side', 'overlay')
+COMPOSITE_HEIGHT = 1080
+COMPOSITE_GAP = 16
+COMPOSITE_OVERLAY_ALPHA = 0.5
+COMPOSITE_QUALITY = 85
+WEBP_QUALITY = 80
+AVIF_QUALITY = 60
+CONTENT_TYPES = {'webp': 'image/webp', 'avif': 'image/avif'}
+
+
+def output_formats():
+    """사용 가능한 출력 포맷 (AVIF는 Pillow 빌드에 따라 지원 여부가 다름)"""
+    formats = ['webp']
+    if features.check('avif'):
+        formats.append('avif')
+    return formats
+
+
+def derivative_name(size_name, fmt):
+    """파생 이미지 이름: webp는 크기 이름 그대로, 그 외는 '<크기>_<포맷>'"""
+    return size_name if fmt == 'webp' else f"{size_name}_{fmt}"
+
+
+def _open_rgb(data):
+    with Image.open(io.BytesIO(data)) as source:
+        return ImageOps.exif_transpose(source).convert('RGB')
+
+
+def render_derivatives(data):
+    """
+    원본 이미지 바이트에서 파생 이미지를 만듭니다.
+    EXIF 방향을 픽셀에 반영한 뒤 메타데이터(EXIF/GPS)는 모두 제거합니다.
+
+    Returns:
+        dict: {이름: (bytes, content_type, (width, height))}
+    """
+    with Image.open(io.BytesIO(data)) as source:
+        image = ImageOps.exif_transpose(source)
+        image = image.convert('RGBA' if image.mode in ('RGBA', 'LA', 'P') else 'RGB')
+
+    results = {}
+    for size_name, max_side in DERIVATIVE_SIZES.items():
+        resized = image.copy()
+        resized.thumbnail((max_side, max_side), Image.Resampling.LANCZOS)
+        for fmt in output_formats():
+            buffer = io.BytesIO()
+            if fmt == 'webp':
+                resized.save(buffer, format='WEBP', quality=WEBP_QUALITY, method=4)
+            else:
+                resized.save(buffer, format='AVIF', quality=AVIF_QUALITY)
+            results[derivative_name(size_name, fmt)] = (buffer.getvalue(), CONTENT_TYPES[fmt], resized.size)
+    return results
+
+
+def render_composite(photo_data, past_data, layout):
+    """
+    사용자 사진(현재)과 스팟의 과거 사진을 합성합니다. 결과는 메타데이터 없는 JPEG입니다.
+
+    - side_by_side: 같은 높이로 맞춰 [과거 | 현재]로 나란히 배치
+    - overlay: 현재 사진 위에 과거 사진을 같은 크기로 맞춰 반투명하게 겹침
+
+    Returns:
+        bytes: JPEG 이미지
+    """
+    present = _open_rgb(photo_data)
+    past = _open_rgb(past_data)
+
+    if layout == 'side_by_side':
+        def fit_height(image):
+            width = max(1, round(image.width * COMPOSITE_HEIGHT / image.height))
+            return image.resize((width, COMPOSITE_HEIGHT), Image.Resampling.LANCZOS)
+
+        past, present = fit_height(past), fit_height(present)
+        canvas = Image.new('RGB', (past.width + COMPOSITE_GAP + present.width, COMPOSITE_HEIGHT), (255, 255, 255))
+        canvas.paste(past, (0, 0))
+        canvas.paste(present, (past.width + COMPOSITE_GAP, 0))
+    elif layout == 'overlay':
+        present.thumbnail((COMPOSITE_HEIGHT * 2, COMPOSITE_HEIGHT * 2), Image.Resampling.LANCZOS)
+        past = ImageOps.fit(past, present.size, Image.Resampling.LANCZOS)
+        canvas = Image.blend(present, past, COMPOSITE_OVERLAY_ALPHA)
+    else:
+        raise ValueError(f"unknown layout: {layout}")
+
+    buffer = io.BytesIO()
+    canvas.save(buffer, format='JPEG', quality=COMPOSITE_QUALITY, optimize=True)
+    return buffer.getvalue()
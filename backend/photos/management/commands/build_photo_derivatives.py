@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from photos.models import Photo
+from photos.derivatives import schedule_derivatives
+
+
+class Command(BaseCommand):
+    help = 'Generate thumbnail/WebP derivatives for directly uploaded photos that do not have them yet'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Regenerate derivatives for every uploaded photo')
+        parser.add_argument('--limit', type=int, default=None, help='Maximum number of photos to process')
+
+    def handle(self, *args, **options):
+        photos = Photo.objects.exclude(storage_key='').order_by('id')
+        if not options['all']:
+            photos = photos.filter(~Q(derivatives__has_key='thumb'))  # 합성 이미지 항목만 있는 사진 포함
+        photo_ids = list(photos.values_list('id', flat=True)[:options['limit']])
+
+        futures = [schedule_derivatives(photo_id) for photo_id in photo_ids]
+        results = [future.result() for future in futures]
+        done = sum(1 for result in results if result)
+
+        self.stdout.write(self.style.SUCCESS(f'Generated derivatives for {done}/{len(photo_ids)} photos'))
@@ -0,0 +1,43 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from photos.sweeper import sweep
+
+
+class Command(BaseCommand):
+    help = 'Find (and optionally delete) objects under uploads/<user_id>/ that no Photo row references'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--delete', action='store_true', help='Delete orphans (default: report only)')
+        parser.add_argument('--grace-hours', type=float, default=48, help='Ignore objects newer than this (in-flight uploads)')
+        parser.add_argument('--workers', type=int, default=4, help='Parallel shard listings')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Keys per delete request (max 1000)')
+        parser.add_argument('--max-deletes-per-second', type=float, default=500, help='Delete rate limit (0 = unlimited)')
+        parser.add_argument('--verbose-keys', action='store_true', help='Print every orphan key')
+
+    def handle(self, *args, **options):
+        on_orphan = None
+        if options['verbose_keys']:
+            on_orphan = lambda key, size: self.stdout.write(f'orphan {key} ({size} bytes)')
+
+        report = sweep(
+            delete=options['delete'],
+            grace=timedelta(hours=options['grace_hours']),
+            workers=options['workers'],
+            batch_size=min(options['batch_size'], 1000),
+            max_deletes_per_second=options['max_deletes_per_second'],
+            on_orphan=on_orphan,
+        )
+
+        for prefix in report.skipped_prefixes:
+            self.stdout.write(self.style.WARNING(f'Skipped non-user prefix {prefix}'))
+        for key, message in report.errors[:20]:
+            self.stdout.write(self.style.ERROR(f'Failed to delete {key}: {message}'))
+
+        action = f'deleted {report.deleted}' if options['delete'] else 'dry run, nothing deleted'
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Scanned {report.scanned} objects in {report.shards} user prefixes: '
+                f'{report.orphans} orphans ({report.orphan_bytes} bytes), {action}.'
+            )
+        )
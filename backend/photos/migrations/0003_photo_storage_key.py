@@ -0,0 +1,55 @@
+from urllib.parse import urlparse, unquote
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def storage_key_from_url(url):
+    # photos.storage.storage_key_from_url의 마이그레이션 시점 사본 (앱 코드가 바뀌어도 마이그레이션은 그대로 동작)
+    if not url:
+        return None
+    parsed = urlparse(url)
+    if parsed.scheme not in ('http', 'https'):
+        return None
+
+    bucket = settings.AWS_STORAGE_BUCKET_NAME
+    host = parsed.netloc.lower()
+    path = unquote(parsed.path)
+    if host.startswith(f"{bucket}.s3"):
+        key = path.lstrip('/')
+    elif host.startswith('s3') and path.startswith(f"/{bucket}/"):
+        key = path[len(bucket) + 2:]
+    else:
+        return None
+
+    location = getattr(settings, 'AWS_LOCATION', '').strip('/')
+    if location and not key.startswith(f"{location}/"):
+        return None
+    return key or None
+
+
+def backfill_storage_keys(apps, schema_editor):
+    Photo = apps.get_model('photos', 'Photo')
+    updates = []
+    for photo in Photo.objects.filter(storage_key='').only('id', 'image_url').iterator(chunk_size=1000):
+        key = storage_key_from_url(photo.image_url)
+        if key:
+            photo.storage_key = key
+            updates.append(photo)
+    Photo.objects.bulk_update(updates, ['storage_key'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('photos', '0002_alter_photo_image_url'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='photo',
+            name='storage_key',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=512),
+        ),
+        migrations.RunPython(backfill_storage_keys, migrations.RunPython.noop),
+    ]
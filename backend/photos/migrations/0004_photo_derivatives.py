@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-19 11:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('photos', '0003_photo_storage_key'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='photo',
+            name='derivatives',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
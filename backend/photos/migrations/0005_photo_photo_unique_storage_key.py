@@ -0,0 +1,45 @@
+# Generated by Django 5.2.4 on 2026-10-19 11:54
+
+from django.db import migrations, models
+from django.db.models import Count
+
+MAX_LISTED_DUPLICATES = 50
+
+
+def check_duplicate_storage_keys(apps, schema_editor):
+    # 0003에서 image_url로 채운 이전 사진은 같은 객체를 가리킬 수 있음.
+    # 어느 행을 남길지는 사람이 정해야 하므로 지우지 않고, 중복 목록과 함께 마이그레이션을 중단
+    Photo = apps.get_model('photos', 'Photo')
+    duplicated = list(
+        Photo.objects.exclude(storage_key='')
+        .values('storage_key').annotate(count=Count('id')).filter(count__gt=1)
+        .order_by('storage_key').values_list('storage_key', flat=True)
+    )
+    if not duplicated:
+        return
+    lines = []
+    for key in duplicated[:MAX_LISTED_DUPLICATES]:
+        ids = list(Photo.objects.filter(storage_key=key).order_by('id').values_list('id', flat=True))
+        lines.append(f"  {key}: Photo id {ids}")
+    if len(duplicated) > MAX_LISTED_DUPLICATES:
+        lines.append(f"  ... 외 {len(duplicated) - MAX_LISTED_DUPLICATES}개")
+    raise RuntimeError(
+        f"같은 storage_key를 가진 Photo가 {len(duplicated)}개 키에 있어 유일 제약을 추가할 수 없습니다.\n"
+        + "\n".join(lines)
+        + "\n중복 행을 정리하거나 storage_key를 비운 뒤 다시 migrate 하세요."
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('photos', '0004_photo_derivatives'),
+    ]
+
+    operations = [
+        migrations.RunPython(check_duplicate_storage_keys, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='photo',
+            constraint=models.UniqueConstraint(condition=models.Q(('storage_key', ''), _negated=True), fields=('storage_key',), name='photo_unique_storage_key'),
+        ),
+    ]
@@ -10,6 +10,8 @@ from spots.models import Spot
 # | route_id | FK, NOT NULL | intger | 연결된 코스 ID |
 # | spot_id | FK, NOT NULL | integer | 연관된 장소 ID |
 # | image_url | NOT NULL | TEXT | 사진 저장 URL |
+# | storage_key |  | varchar | 버킷 객체 키 (uploads/...) |
+# | derivatives |  | json | 파생 이미지 키 (thumb, medium, ...) |
 # | is_used |  | boolean | 스탬프 사용 여부 |
 # | used_at |  | datetime | 스탬프 사용 일시 |
 
@@ -19,6 +21,16 @@ class Photo(models.Model):
     route_id = models.ForeignKey(Route, null=True, blank=True, on_delete=models.CASCADE, related_name='user_photos')
     spot_id = models.ForeignKey(Spot, on_delete=models.CASCADE, related_name='user_photos')
     image_url = models.TextField(blank=True) # 사진 URL (로컬 file:// 또는 S3 URL)
+    storage_key = models.CharField(max_length=512, blank=True, default='', db_index=True) # 버킷 객체 키 (직접 업로드 시)
+    derivatives = models.JSONField(default=dict, blank=True) # 파생 이미지 키 {이름: 객체 키}
     is_used = models.BooleanField(default=False) # 스탬프 사용 여부
     created_at = models.DateTimeField(auto_now_add=True) # 생성 일시    
-    used_at = models.DateTimeField(auto_now=True) # 스탬프 사용 일시
\ No newline at end of file
+    used_at = models.DateTimeField(auto_now=True) # 스탬프 사용 일시
+
+    class Meta:
+        constraints = [
+            # 직접 업로드(finalize) 재시도/동시 호출로 같은 객체의 Photo가 두 번 생기지 않도록
+            models.UniqueConstraint(
+                fields=['storage_key'], condition=~models.Q(storage_key=''), name='photo_unique_storage_key'
+            ),
+        ]
\ No newline at end of file
@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from .models import Photo
+from .storage import signed_url
 
 # code here.
 class PhotoSerializer(serializers.ModelSerializer):
@@ -10,4 +11,27 @@ class PhotoSerializer(serializers.ModelSerializer):
 class PhotoDetailSerializer(serializers.ModelSerializer):
     class Meta:
         model = Photo
-        fields = ['id', 'image_url', 'is_used', 'created_at', 'used_at']
\ No newline at end of file
+        fields = ['id', 'image_url', 'is_used', 'created_at', 'used_at']
+
+PHOTO_LIST_FIELDS = (
+    'id', 'image_url', 'storage_key', 'derivatives', 'is_used', 'created_at', 'used_at', 'user_id', 'route_id', 'spot_id',
+)
+
+
+def photo_list_item(row, size=None):
+    """
+    목록용 경량 직렬화 (values() 행 -> dict)
+    직접 업로드된 사진은 캐시된 서명 URL을 image_url로 내려줍니다.
+    size(thumb, medium, thumb_avif, ...)를 주면 해당 파생 이미지가 있을 때 그 URL을 사용합니다.
+    """
+    key = (row['derivatives'] or {}).get(size) or row['storage_key']
+    return {
+        'id': row['id'],
+        'image_url': signed_url(key) if key else row['image_url'],
+        'is_used': row['is_used'],
+        'created_at': row['created_at'],
+        'used_at': row['used_at'],
+        'user_id': row['user_id'],
+        'route_id': row['route_id'],
+        'spot_id': row['spot_id'],
+    }
@@ -0,0 +1,368 @@
+"""
+사진 저장소(S3) 헬퍼
+- 객체 키 <-> default_storage 이름 변환
+- S3 multi-object delete를 이용한 일괄 삭제
+- 요청 처리와 분리된 백그라운드 삭제 큐
+- presigned 직접 업로드 / HEAD 검증
+- 서명된 조회 URL 캐시
+- 접두사(prefix) 단위 목록 조회
+"""
+import mimetypes
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from urllib.parse import urlparse, unquote
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+S3_DELETE_BATCH_SIZE = 1000  # delete_objects 한 번에 보낼 수 있는 최대 키 수
+UPLOAD_CONTENT_TYPES = {
+    'image/jpeg': 'jpg',
+    'image/png': 'png',
+    'image/webp': 'webp',
+}  # HEIC/HEIF는 Pillow가 디코딩하지 못해 파생 이미지/합성이 불가능하므로 받지 않음 (클라이언트에서 JPEG로 변환)
+
+
+# --- 1. 키 변환 ---
+def storage_location():
+    return getattr(settings, 'AWS_LOCATION', '').strip('/')
+
+
+def is_s3_storage(storage=None):
+    storage = storage or default_storage
+    return hasattr(storage, 'bucket_name') and hasattr(storage, 'connection')
+
+
+def key_from_name(name):
+    """default_storage 이름(uploads/ 이하 경로)을 버킷의 전체 객체 키로 변환합니다."""
+    location = storage_location()
+    name = name.lstrip('/')
+    return f"{location}/{name}" if location else name
+
+
+def name_from_key(key):
+    """버킷의 전체 객체 키를 default_storage 이름으로 변환합니다."""
+    location = storage_location()
+    if location and key.startswith(f"{location}/"):
+        return key[len(location) + 1:]
+    return key
+
+
+def storage_key_from_url(url):
+    """
+    사진 URL에서 우리 버킷의 객체 키를 추출합니다.
+    다른 호스트의 URL이나 file:// 같은 로컬 경로면 None을 반환합니다.
+    """
+    if not url:
+        return None
+    parsed = urlparse(url)
+    if parsed.scheme not in ('http', 'https'):
+        return None
+
+    bucket = settings.AWS_STORAGE_BUCKET_NAME
+    host = parsed.netloc.lower()
+    path = unquote(parsed.path)
+    if host.startswith(f"{bucket}.s3"):
+        key = path.lstrip('/')  # virtual-hosted style
+    elif host.startswith('s3') and path.startswith(f"/{bucket}/"):
+        key = path[len(bucket) + 2:]  # path style
+    else:
+        return None
+
+    location = storage_location()
+    if location and not key.startswith(f"{location}/"):
+        return None
+    return key or None
+
+
+def photo_object_keys(image_url, storage_key='', derivatives=None):
+    """사진 한 장이 차지하는 버킷 객체 키 목록 (원본 + 파생 이미지)"""
+    keys = [storage_key or storage_key_from_url(image_url)]
+    keys.extend((derivatives or {}).values())
+    return [key for key in keys if key]
+
+
+def object_url(key, storage=None):
+    """DB(image_url)에 저장할 서명 없는 객체 URL을 만듭니다."""
+    storage = storage or default_storage
+    if is_s3_storage(storage):
+        return f"{settings.MEDIA_URL}{name_from_key(key)}"
+    return storage.url(name_from_key(key))
+
+
+# --- 2. 서명된 조회 URL 캐시 ---
+# AWS_QUERYSTRING_AUTH=True라 url() 호출마다 SigV4 서명(HMAC)이 일어나므로
+# 객체 키별로 만료 직전까지 재사용합니다. (프로세스 메모리 LRU)
+SIGNED_URL_EXPIRE = getattr(settings, 'AWS_QUERYSTRING_EXPIRE', 3600)
+SIGNED_URL_REFRESH_MARGIN = 300  # 만료 5분 전부터는 새로 서명
+MAX_SIGNED_URLS = 10000
+
+_signed_urls = OrderedDict()
+_signed_urls_lock = threading.Lock()
+
+
+def signed_url(key, storage=None):
+    """객체 키의 조회 URL을 반환합니다. S3면 캐시된 presigned URL을 재사용합니다."""
+    storage = storage or default_storage
+    if not is_s3_storage(storage):
+        return storage.url(name_from_key(key))
+
+    now = time.monotonic()
+    with _signed_urls_lock:
+        entry = _signed_urls.get(key)
+        if entry is not None and entry[1] > now:
+            _signed_urls.move_to_end(key)
+            return entry[0]
+
+    url = storage.url(name_from_key(key), expire=SIGNED_URL_EXPIRE)
+    with _signed_urls_lock:
+        _signed_urls[key] = (url, now + SIGNED_URL_EXPIRE - SIGNED_URL_REFRESH_MARGIN)
+        _signed_urls.move_to_end(key)
+        while len(_signed_urls) > MAX_SIGNED_URLS:
+            _signed_urls.popitem(last=False)
+    return url
+
+
+def forget_signed_urls(keys):
+    """삭제된 객체의 캐시 항목을 제거합니다."""
+    with _signed_urls_lock:
+        for key in keys:
+            _signed_urls.pop(key, None)
+
+
+# --- 3. 직접 업로드 ---
+def upload_key(user_id, route_id, spot_id, content_type):
+    """직접 업로드용 객체 키: uploads/<user>/<route>/<spot>/<uuid>.<ext>"""
+    ext = UPLOAD_CONTENT_TYPES[content_type]
+    return key_from_name(f"{user_id}/{route_id}/{spot_id}/{uuid.uuid4().hex}.{ext}")
+
+
+def presign_upload(key, content_type, max_bytes, expires_in, storage=None):
+    """
+    S3 presigned POST를 생성합니다. content-length-range 조건으로 크기를 제한합니다.
+    S3 저장소가 아니면 None을 반환합니다.
+    """
+    storage = storage or default_storage
+    if not is_s3_storage(storage):
+        return None
+    post = storage.connection.meta.client.generate_presigned_post(
+        Bucket=storage.bucket_name,
+        Key=key,
+        Fields={'Content-Type': content_type},
+        Conditions=[{'Content-Type': content_type}, ['content-length-range', 1, max_bytes]],
+        ExpiresIn=expires_in,
+    )
+    return {'method': 'POST', 'url': post['url'], 'fields': post['fields']}
+
+
+def head_object(key, storage=None):
+    """
+    객체 메타데이터를 조회합니다. S3면 HEAD 요청 한 번입니다.
+
+    Returns:
+        dict: {'size': int, 'content_type': str} 또는 객체가 없으면 None
+    """
+    storage = storage or default_storage
+    if is_s3_storage(storage):
+        from botocore.exceptions import ClientError
+
+        try:
+            response = storage.connection.meta.client.head_object(Bucket=storage.bucket_name, Key=key)
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+                return None
+            raise
+        return {'size': response['ContentLength'], 'content_type': response.get('ContentType', '')}
+
+    name = name_from_key(key)
+    if not storage.exists(name):
+        return None
+    return {'size': storage.size(name), 'content_type': mimetypes.guess_type(name)[0] or ''}
+
+
+def put_object(key, data, content_type, cache_control=None, storage=None):
+    """
+    정해진 키에 객체를 씁니다. (같은 키가 있으면 덮어씀)
+    data는 bytes 또는 파일 객체(업로드 파일 등)이며, 파일 객체는 통째로 읽지 않고 스트리밍합니다.
+    default_storage.save는 AWS_S3_FILE_OVERWRITE=False라 이름을 바꾸므로 S3는 클라이언트를 직접 사용합니다.
+    """
+    storage = storage or default_storage
+    is_file = hasattr(data, 'read')
+    if is_s3_storage(storage):
+        extra = {'ContentType': content_type}
+        if cache_control:
+            extra['CacheControl'] = cache_control
+        client = storage.connection.meta.client
+        if is_file:
+            client.upload_fileobj(data, storage.bucket_name, key, ExtraArgs=extra)
+        else:
+            client.put_object(Bucket=storage.bucket_name, Key=key, Body=data, **extra)
+        return
+
+    name = name_from_key(key)
+    if storage.exists(name):
+        storage.delete(name)
+    storage.save(name, data if is_file else ContentFile(data))
+
+
+# --- 4. 일괄 삭제 ---
+def delete_objects(keys, storage=None):
+    """
+    객체 키 목록을 삭제합니다. S3면 delete_objects(최대 1000개씩)를 사용합니다.
+
+    Returns:
+        tuple: (삭제된 키 목록, [(키, 오류 메시지), ...])
+    """
+    storage = storage or default_storage
+    keys = [key for key in dict.fromkeys(keys) if key]
+    deleted, errors = [], []
+
+    if is_s3_storage(storage):
+        client = storage.connection.meta.client
+        for i in range(0, len(keys), S3_DELETE_BATCH_SIZE):
+            batch = keys[i:i + S3_DELETE_BATCH_SIZE]
+            try:
+                response = client.delete_objects(
+                    Bucket=storage.bucket_name,
+                    Delete={'Objects': [{'Key': key} for key in batch], 'Quiet': True},
+                )
+            except Exception as e:
+                errors.extend((key, str(e)) for key in batch)
+                continue
+            failed = {error['Key']: error.get('Message', error.get('Code', '')) for error in response.get('Errors', [])}
+            errors.extend(failed.items())
+            deleted.extend(key for key in batch if key not in failed)
+        return deleted, errors
+
+    for key in keys:
+        try:
+            storage.delete(name_from_key(key))
+            deleted.append(key)
+        except Exception as e:
+            errors.append((key, str(e)))
+    return deleted, errors
+
+
+# --- 5. 목록 조회 ---
+def list_prefixes(prefix, storage=None):
+    """prefix 바로 아래의 '디렉터리' 접두사 목록 (예: uploads/ -> ['uploads/1/', 'uploads/2/', ...])"""
+    storage = storage or default_storage
+    prefix = prefix.rstrip('/') + '/' if prefix.strip('/') else ''
+    if is_s3_storage(storage):
+        paginator = storage.connection.meta.client.get_paginator('list_objects_v2')
+        prefixes = []
+        for page in paginator.paginate(Bucket=storage.bucket_name, Prefix=prefix, Delimiter='/'):
+            prefixes.extend(item['Prefix'] for item in page.get('CommonPrefixes', []))
+        return prefixes
+
+    try:
+        directories, _ = storage.listdir(name_from_key(prefix).rstrip('/'))
+    except FileNotFoundError:
+        return []
+    return [f"{prefix}{directory}/" for directory in sorted(directories)]
+
+
+def iter_objects(prefix, storage=None, page_size=1000):
+    """
+    prefix 아래의 객체를 페이지 단위로 순회합니다. 전체 목록을 메모리에 올리지 않습니다.
+
+    Yields:
+        tuple: (객체 키, 마지막 수정 시각(aware datetime), 크기)
+    """
+    storage = storage or default_storage
+    if is_s3_storage(storage):
+        paginator = storage.connection.meta.client.get_paginator('list_objects_v2')
+        pages = paginator.paginate(Bucket=storage.bucket_name, Prefix=prefix, PaginationConfig={'PageSize': page_size})
+        for page in pages:
+            for item in page.get('Contents', []):
+                yield item['Key'], item['LastModified'], item['Size']
+        return
+
+    def walk(name):
+        try:
+            directories, files = storage.listdir(name)
+        except FileNotFoundError:
+            return
+        for filename in sorted(files):
+            path = f"{name}/{filename}" if name else filename
+            yield key_from_name(path), storage.get_modified_time(path), storage.size(path)
+        for directory in sorted(directories):
+            yield from walk(f"{name}/{directory}" if name else directory)
+
+    yield from walk(name_from_key(prefix).rstrip('/'))
+
+
+class StorageDeletionQueue:
+    """
+    요청 스레드에서 enqueue만 하고, 백그라운드 스레드가 모아서 일괄 삭제합니다.
+    실패한 키는 max_attempts까지 다시 시도합니다.
+    """
+
+    def __init__(self, batch_size=S3_DELETE_BATCH_SIZE, flush_interval=2.0, max_attempts=3):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_attempts = max_attempts
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def enqueue(self, keys, attempt=1):
+        keys = [key for key in keys if key]
+        if not keys:
+            return
+        self._ensure_worker()
+        for key in keys:
+            self._queue.put((key, attempt))
+
+    def _ensure_worker(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='photo-storage-deleter', daemon=True)
+                self._thread.start()
+
+    def _next_batch(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            attempts = dict(batch)
+            try:
+                deleted, errors = delete_objects(list(attempts))
+            except Exception as e:
+                deleted, errors = [], [(key, str(e)) for key in attempts]
+            if deleted:
+                forget_signed_urls(deleted)
+                print(f"[photos] 저장소 객체 {len(deleted)}개 삭제")
+            for key, message in errors:
+                attempt = attempts.get(key, self.max_attempts)
+                if attempt < self.max_attempts:
+                    # 지수 백오프 후 재시도
+                    timer = threading.Timer(2 ** attempt, self.enqueue, args=([key],), kwargs={'attempt': attempt + 1})
+                    timer.daemon = True
+                    timer.start()
+                else:
+                    print(f"[photos] 저장소 객체 삭제 실패 ({key}): {message}")
+            for _ in batch:
+                self._queue.task_done()
+
+    def join(self):
+        """대기 중인 삭제가 모두 끝날 때까지 기다립니다. (관리 명령/테스트용)"""
+        self._queue.join()
+
+
+deletion_queue = StorageDeletionQueue()
@@ -0,0 +1,123 @@
+"""
+저장소 정합성 검사 / 고아 객체 정리
+DB의 Photo가 더 이상 참조하지 않는 uploads/<user_id>/ 아래 객체를 찾아 삭제(또는 보고)합니다.
+(사진 원본, 파생 이미지, 합성 이미지 모두 사용자 접두사 아래에 있고 Photo에 기록됩니다.)
+
+- 사용자 ID 접두사(shard) 단위로 병렬 조회하고, shard마다 그 사용자의 Photo 키만 set으로 만들어
+  목록 페이지를 흘려보내며 차집합을 구하므로 버킷 전체를 메모리에 올리지 않습니다.
+- 업로드 중(finalize 전)이거나 파생 이미지 생성 중인 객체를 지우지 않도록 grace 기간을 둡니다.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import timedelta
+
+from django.db import close_old_connections
+from django.utils import timezone
+
+from .models import Photo
+from .storage import S3_DELETE_BATCH_SIZE, delete_objects, iter_objects, key_from_name, list_prefixes, photo_object_keys
+
+
+@dataclass
+class SweepReport:
+    shards: int = 0
+    scanned: int = 0
+    orphans: int = 0
+    orphan_bytes: int = 0
+    deleted: int = 0
+    errors: list = field(default_factory=list)
+    skipped_prefixes: list = field(default_factory=list)
+
+
+def referenced_keys(user_id):
+    """사용자의 Photo가 참조하는 객체 키 set (원본 + 파생 이미지)"""
+    keys = set()
+    rows = Photo.objects.filter(user_id_id=user_id).values_list('image_url', 'storage_key', 'derivatives')
+    for row in rows.iterator(chunk_size=2000):
+        keys.update(photo_object_keys(*row))
+    return keys
+
+
+def find_orphans(shard_prefix, user_id, cutoff):
+    """
+    shard 하나의 고아 객체를 찾습니다.
+
+    Returns:
+        tuple: (조회한 객체 수, [(키, 크기), ...])
+    """
+    close_old_connections()
+    try:
+        keys = referenced_keys(user_id)
+    finally:
+        close_old_connections()
+
+    scanned, orphans = 0, []
+    for key, last_modified, size in iter_objects(shard_prefix):
+        scanned += 1
+        if key not in keys and last_modified < cutoff:
+            orphans.append((key, size))
+    return scanned, orphans
+
+
+class RateLimiter:
+    """초당 max_per_second개를 넘지 않도록 대기합니다."""
+
+    def __init__(self, max_per_second):
+        self.max_per_second = max_per_second
+        self._next_at = time.monotonic()
+
+    def wait(self, count):
+        if not self.max_per_second:
+            return
+        now = time.monotonic()
+        if self._next_at > now:
+            time.sleep(self._next_at - now)
+        self._next_at = max(now, self._next_at) + count / self.max_per_second
+
+
+def sweep(delete=False, grace=timedelta(hours=48), workers=4, batch_size=S3_DELETE_BATCH_SIZE,
+          max_deletes_per_second=500, on_orphan=None):
+    """
+    uploads/ 아래의 고아 객체를 찾아 delete=True면 삭제합니다.
+    숫자(user_id)가 아닌 접두사는 건드리지 않고 skipped_prefixes로 보고합니다.
+    """
+    report = SweepReport()
+    cutoff = timezone.now() - grace
+    root = key_from_name('')
+
+    shards = []
+    for prefix in list_prefixes(root):
+        segment = prefix[len(root):].strip('/')
+        if segment.isdigit():
+            shards.append((prefix, int(segment)))
+        else:
+            report.skipped_prefixes.append(prefix)
+    report.shards = len(shards)
+
+    limiter = RateLimiter(max_deletes_per_second)
+    pending = []
+
+    def flush():
+        limiter.wait(len(pending))
+        deleted, errors = delete_objects(pending)
+        report.deleted += len(deleted)
+        report.errors.extend(errors)
+        pending.clear()
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='photo-sweeper') as executor:
+        results = executor.map(lambda shard: find_orphans(shard[0], shard[1], cutoff), shards)
+        for scanned, orphans in results:
+            report.scanned += scanned
+            for key, size in orphans:
+                report.orphans += 1
+                report.orphan_bytes += size
+                if on_orphan:
+                    on_orphan(key, size)
+                if delete:
+                    pending.append(key)
+                    if len(pending) >= batch_size:
+                        flush()
+    if pending:
+        flush()
+    return report
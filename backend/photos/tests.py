@@ -1,3 +1,508 @@
-from django.test import TestCase
+import base64
+import io
+import json
+import os
+import shutil
+import tempfile
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import IntegrityError
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from PIL import Image
+from rest_framework.test import APIClient
+from storages.backends.s3 import S3Storage
+
+from accounts.models import CustomUser
+from courses.models import Route, RouteSpot, UserRouteSpot
+from spots.models import Spot
+from .models import Photo
+from . import composites, derivatives, storage, sweeper, views
+
+
+def _local_storages(location):
+    return {
+        'default': {
+            'BACKEND': 'django.core.files.storage.FileSystemStorage',
+            'OPTIONS': {'location': location, 'base_url': '/media/'},
+        },
+        'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+    }
+
+
+class LocalStorageMixin:
+    """S3 대신 임시 디렉터리의 FileSystemStorage를 씁니다 (presigned URL은 local_upload로 대체됨)"""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        storage_override = override_settings(STORAGES=_local_storages(self.media_root))
+        storage_override.enable()
+        self.addCleanup(storage_override.disable)
+
+        self.user = CustomUser.objects.create_user(useremail='photo@example.com', username='photo')
+        self.other = CustomUser.objects.create_user(useremail='other@example.com', username='other')
+        self.route = Route.objects.create(user_region_name='내륙', total_spots=1)
+        self.spot = Spot.objects.create(name='홍예문', lat=37.47, lng=126.62, content_id='t-1')
+        route_spot = RouteSpot.objects.create(route_id=self.route, spot_id=self.spot, order=1)
+        UserRouteSpot.objects.create(user_id=self.user, route_id=self.route, route_spot_id=route_spot, order=1)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+
+class DirectUploadTests(LocalStorageMixin, TestCase):
+    def start_upload(self, **data):
+        body = {'route_id': self.route.id, 'spot_id': self.spot.id, **data}
+        return self.client.post('/v1/photos/uploads/', body, format='json')
+
+    def put_object(self, intent, body=b'\xff\xd8\xff\xe0jpeg'):
+        path = intent['url'].split('testserver', 1)[1]
+        return APIClient().put(path, body, content_type=intent['headers']['Content-Type'])
+
+    def finalize(self, upload_id, client=None):
+        return (client or self.client).post('/v1/photos/uploads/finalize/', {'upload_id': upload_id}, format='json')
+
+    def test_upload_then_finalize_creates_photo(self):
+        response = self.start_upload()
+        self.assertEqual(response.status_code, 201)
+        intent = response.data
+        self.assertEqual(intent['method'], 'PUT')
+        self.assertTrue(intent['key'].startswith(f"uploads/{self.user.id}/{self.route.id}/{self.spot.id}/"))
+
+        self.assertEqual(self.put_object(intent).status_code, 200)
+        response = self.finalize(intent['upload_id'])
+        self.assertEqual(response.status_code, 201)
+        photo = Photo.objects.get(id=response.data['id'])
+        self.assertEqual(photo.storage_key, intent['key'])
+        self.assertEqual(photo.user_id_id, self.user.id)
+
+    def test_finalize_is_idempotent(self):
+        intent = self.start_upload().data
+        self.put_object(intent)
+        first = self.finalize(intent['upload_id'])
+        second = self.finalize(intent['upload_id'])
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.data['id'], first.data['id'])
+        self.assertEqual(Photo.objects.filter(storage_key=intent['key']).count(), 1)
+
+    def test_concurrent_finalize_returns_existing_photo(self):
+        intent = self.start_upload().data
+        self.put_object(intent)
+        real_head_object = views.head_object
+
+        def head_object_after_race(key):
+            # 다른 요청이 HEAD 확인과 INSERT 사이에 같은 객체의 Photo를 먼저 만든 상황
+            Photo.objects.create(
+                user_id=self.user, route_id=self.route, spot_id=self.spot, storage_key=key, image_url='x'
+            )
+            return real_head_object(key)
+
+        with mock.patch.object(views, 'head_object', side_effect=head_object_after_race):
+            response = self.finalize(intent['upload_id'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Photo.objects.filter(storage_key=intent['key']).count(), 1)
+
+    def test_storage_key_is_unique(self):
+        Photo.objects.create(user_id=self.user, spot_id=self.spot, storage_key='uploads/1/1/1/a.jpg')
+        Photo.objects.create(user_id=self.user, spot_id=self.spot, storage_key='')
+        Photo.objects.create(user_id=self.user, spot_id=self.spot, storage_key='')
+        with self.assertRaises(IntegrityError):
+            Photo.objects.create(user_id=self.user, spot_id=self.spot, storage_key='uploads/1/1/1/a.jpg')
+
+    def test_finalize_without_object_conflicts(self):
+        intent = self.start_upload().data
+        self.assertEqual(self.finalize(intent['upload_id']).status_code, 409)
+        self.assertFalse(Photo.objects.exists())
+
+    def test_finalize_rejects_other_user_and_bad_id(self):
+        intent = self.start_upload().data
+        self.put_object(intent)
+        other = APIClient()
+        other.force_authenticate(self.other)
+        self.assertEqual(self.finalize(intent['upload_id'], client=other).status_code, 403)
+        self.assertEqual(self.finalize('not-a-token').status_code, 400)
+
+    def assert_finalize_404_after(self, remove):
+        intent = self.start_upload().data
+        self.put_object(intent)
+        remove()
+        self.assertEqual(self.finalize(intent['upload_id']).status_code, 404)
+        self.assertFalse(Photo.objects.exists())
+
+    def test_finalize_after_course_removed_is_404(self):
+        self.assert_finalize_404_after(lambda: UserRouteSpot.objects.filter(user_id=self.user).delete())
+
+    def test_finalize_after_route_deleted_is_404(self):
+        self.assert_finalize_404_after(lambda: Route.objects.filter(id=self.route.id).delete())
+
+    def test_finalize_after_spot_deleted_is_404(self):
+        self.assert_finalize_404_after(lambda: Spot.objects.filter(id=self.spot.id).delete())
+
+    def test_intent_requires_adopted_route(self):
+        UserRouteSpot.objects.filter(user_id=self.user).delete()
+        self.assertEqual(self.start_upload().status_code, 404)
+        self.assertEqual(self.start_upload(route_id=999999).status_code, 404)
+
+    def test_local_upload_rejects_bad_token(self):
+        response = APIClient().put('/v1/photos/uploads/local/bad/', b'data', content_type='image/jpeg')
+        self.assertEqual(response.status_code, 403)
+
+    def test_intent_rejects_unsupported_content_types(self):
+        for content_type in ('image/heic', 'text/plain'):
+            self.assertEqual(self.start_upload(content_type=content_type).status_code, 400)
+        self.assertNotIn('image/heic', storage.UPLOAD_CONTENT_TYPES)
+
+    def test_presign_upload_for_s3(self):
+        s3 = S3Storage(access_key='test', secret_key='test', bucket_name='bucket', region_name='ap-northeast-2')
+        upload = storage.presign_upload('uploads/1/2/3/a.jpg', 'image/jpeg', 100, 600, storage=s3)
+        self.assertEqual(upload['method'], 'POST')
+        self.assertEqual(upload['fields']['key'], 'uploads/1/2/3/a.jpg')
+        policy = json.loads(base64.b64decode(upload['fields']['policy']))
+        self.assertIn(['content-length-range', 1, 100], policy['conditions'])
+        self.assertIsNone(storage.presign_upload('uploads/a.jpg', 'image/jpeg', 100, 600))
+
+
+class SignedUrlCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.s3 = S3Storage(access_key='test', secret_key='test', bucket_name='bucket', region_name='ap-northeast-2')
+        self.signed = []
+
+        def sign(name, expire=None):
+            self.signed.append(name)
+            return f"https://bucket.s3.amazonaws.com/{name}?sig={len(self.signed)}"
+
+        for patcher in (
+            mock.patch.object(storage, '_signed_urls', OrderedDict()),
+            mock.patch.object(self.s3, 'url', side_effect=sign),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_reuses_url_until_refresh_margin(self):
+        with mock.patch.object(storage.time, 'monotonic', return_value=1000.0):
+            first = storage.signed_url('uploads/a.jpg', storage=self.s3)
+            self.assertEqual(storage.signed_url('uploads/a.jpg', storage=self.s3), first)
+        self.assertEqual(len(self.signed), 1)
+
+        expires_at = 1000.0 + storage.SIGNED_URL_EXPIRE - storage.SIGNED_URL_REFRESH_MARGIN
+        with mock.patch.object(storage.time, 'monotonic', return_value=expires_at):
+            self.assertNotEqual(storage.signed_url('uploads/a.jpg', storage=self.s3), first)
+        self.assertEqual(len(self.signed), 2)
+
+    def test_forget_and_lru_bound(self):
+        storage.signed_url('uploads/a.jpg', storage=self.s3)
+        storage.forget_signed_urls(['uploads/a.jpg'])
+        storage.signed_url('uploads/a.jpg', storage=self.s3)
+        self.assertEqual(len(self.signed), 2)
+
+        with mock.patch.object(storage, 'MAX_SIGNED_URLS', 2):
+            storage.signed_url('uploads/b.jpg', storage=self.s3)
+            storage.signed_url('uploads/a.jpg', storage=self.s3)  # a를 최근 사용으로 갱신
+            storage.signed_url('uploads/c.jpg', storage=self.s3)
+        self.assertEqual(list(storage._signed_urls), ['uploads/a.jpg', 'uploads/c.jpg'])
+
+    def test_local_storage_is_not_cached(self):
+        with mock.patch.object(storage, 'default_storage', mock.Mock(url=lambda name: f"/media/{name}", spec=['url'])):
+            self.assertEqual(storage.signed_url('uploads/a.jpg'), f"/media/{storage.name_from_key('uploads/a.jpg')}")
+        self.assertFalse(storage._signed_urls)
+
+
+class PhotoListTests(LocalStorageMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        created_at = timezone.now()
+        self.photos = [
+            Photo.objects.create(
+                user_id=self.user, route_id=self.route, spot_id=self.spot,
+                storage_key=f"uploads/{self.user.id}/p{i}.jpg", derivatives={'thumb': f"uploads/{self.user.id}/p{i}.thumb.webp"},
+            )
+            for i in range(5)
+        ]
+        # 같은 created_at에서도 id로 순서가 정해져야 함
+        Photo.objects.filter(user_id=self.user).update(created_at=created_at)
+        Photo.objects.create(user_id=self.other, spot_id=self.spot, image_url='https://example.com/other.jpg')
+
+    def test_pages_follow_cursor_without_gaps(self):
+        seen = []
+        cursor = None
+        while True:
+            params = {'limit': 2, **({'cursor': cursor} if cursor else {})}
+            response = self.client.get('/v1/photos/', params)
+            self.assertEqual(response.status_code, 200)
+            seen += [item['id'] for item in response.data]
+            cursor = response.get('X-Next-Cursor')
+            if not cursor:
+                break
+            self.assertIn('rel="next"', response['Link'])
+        self.assertEqual(seen, [photo.id for photo in reversed(self.photos)])
+
+    def test_size_selects_derivative_url(self):
+        newest = self.photos[-1]
+        media_url = lambda key: f"/media/{storage.name_from_key(key)}"
+        item = self.client.get('/v1/photos/', {'limit': 1}).data[0]
+        self.assertEqual(item['image_url'], media_url(newest.storage_key))
+        item = self.client.get('/v1/photos/', {'limit': 1, 'size': 'thumb'}).data[0]
+        self.assertEqual(item['image_url'], media_url(newest.derivatives['thumb']))
+        item = self.client.get('/v1/photos/', {'limit': 1, 'size': 'medium'}).data[0]
+        self.assertEqual(item['image_url'], media_url(newest.storage_key))
+
+    def test_bad_cursor_is_400(self):
+        self.assertEqual(self.client.get('/v1/photos/', {'cursor': 'nope'}).status_code, 400)
+
+
+class FinalizeRaceTests(LocalStorageMixin, TransactionTestCase):
+    # 외래 키는 커밋 시점에 검사되므로 finalize의 트랜잭션이 실제로 커밋되어야 함
+
+    def test_route_deleted_during_finalize_is_404(self):
+        intent = self.client.post(
+            '/v1/photos/uploads/', {'route_id': self.route.id, 'spot_id': self.spot.id}, format='json'
+        ).data
+        storage.put_object(intent['key'], b'\xff\xd8\xff\xe0jpeg', 'image/jpeg')
+        real_head_object = views.head_object
+
+        def head_object_after_delete(key):
+            # HEAD 확인과 INSERT 사이에 코스가 삭제된 상황
+            Route.objects.filter(id=self.route.id).delete()
+            return real_head_object(key)
+
+        with mock.patch.object(views, 'head_object', side_effect=head_object_after_delete):
+            response = self.client.post('/v1/photos/uploads/finalize/', {'upload_id': intent['upload_id']}, format='json')
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(Photo.objects.exists())
+
+
+class SweeperTests(LocalStorageMixin, TransactionTestCase):
+    # 스윕은 shard별 스레드에서 DB를 조회하므로 트랜잭션으로 감싸지 않는 테스트 케이스 사용
+
+    def write(self, key, age=timedelta(days=7)):
+        storage.put_object(key, b'data', 'image/jpeg')
+        mtime = (timezone.now() - age).timestamp()
+        os.utime(os.path.join(self.media_root, storage.name_from_key(key)), (mtime, mtime))
+        return key
+
+    def setUp(self):
+        super().setUp()
+        base = f"uploads/{self.user.id}/{self.route.id}/{self.spot.id}"
+        self.kept = self.write(f"{base}/kept.jpg")
+        self.kept_thumb = self.write(f"{base}/kept.thumb.webp")
+        Photo.objects.create(
+            user_id=self.user, route_id=self.route, spot_id=self.spot,
+            storage_key=self.kept, derivatives={'thumb': self.kept_thumb},
+        )
+        self.orphan = self.write(f"{base}/orphan.jpg")
+        self.fresh_orphan = self.write(f"{base}/fresh.jpg", age=timedelta(minutes=5))
+        self.deleted_user_object = self.write(f"uploads/{self.other.id}/1/1/gone.jpg")
+        self.unknown = self.write('uploads/misc/readme.txt')
+
+    def exists(self, key):
+        return os.path.exists(os.path.join(self.media_root, storage.name_from_key(key)))
+
+    def test_dry_run_reports_without_deleting(self):
+        found = []
+        report = sweeper.sweep(delete=False, on_orphan=lambda key, size: found.append(key))
+        self.assertEqual(report.shards, 2)
+        self.assertEqual(report.scanned, 5)
+        self.assertCountEqual(found, [self.orphan, self.deleted_user_object])
+        self.assertEqual(report.orphan_bytes, 8)
+        self.assertEqual(report.deleted, 0)
+        self.assertEqual(report.skipped_prefixes, ['uploads/misc/'])
+        for key in (self.kept, self.kept_thumb, self.orphan, self.fresh_orphan, self.deleted_user_object):
+            self.assertTrue(self.exists(key))
+
+    def test_delete_removes_only_old_unreferenced_objects(self):
+        report = sweeper.sweep(delete=True, batch_size=1, max_deletes_per_second=0)
+        self.assertEqual(report.deleted, 2)
+        self.assertEqual(report.errors, [])
+        self.assertFalse(self.exists(self.orphan))
+        self.assertFalse(self.exists(self.deleted_user_object))
+        for key in (self.kept, self.kept_thumb, self.fresh_orphan, self.unknown):
+            self.assertTrue(self.exists(key))
+
+    def test_command_defaults_to_dry_run(self):
+        out = io.StringIO()
+        call_command('sweep_photo_storage', stdout=out)
+        self.assertIn('2 orphans', out.getvalue())
+        self.assertIn('dry run', out.getvalue())
+        self.assertTrue(self.exists(self.orphan))
+
+
+def _jpeg(color, size=(64, 48)):
+    buffer = io.BytesIO()
+    Image.new('RGB', size, color).save(buffer, format='JPEG')
+    return buffer.getvalue()
+
+
+class CompositeTests(LocalStorageMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.spot.past_image_url = 'https://example.com/past.jpg'
+        self.spot.save()
+        self.photo_key = f"uploads/{self.user.id}/{self.route.id}/{self.spot.id}/abc.jpg"
+        storage.put_object(self.photo_key, _jpeg('red'), 'image/jpeg')
+        self.photo = Photo.objects.create(
+            user_id=self.user, route_id=self.route, spot_id=self.spot,
+            storage_key=self.photo_key, derivatives={'thumb': 'uploads/x.thumb.webp'},
+        )
+        pool = ThreadPoolExecutor(max_workers=1)
+        self.addCleanup(pool.shutdown)
+        for patcher in (
+            mock.patch.object(composites, 'process_pool', return_value=pool),
+            mock.patch.object(composites, 'fetch_past_image', return_value=_jpeg('blue')),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_composite_is_stored_under_photo_prefix_and_recorded(self):
+        response = self.client.get(f'/v1/photos/{self.photo.id}/composite/?layout=overlay')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.data['cached'])
+
+        self.photo.refresh_from_db()
+        key = self.photo.derivatives['composite_overlay']
+        self.assertTrue(key.startswith(f"uploads/{self.user.id}/{self.route.id}/{self.spot.id}/abc.composite-overlay-"))
+        self.assertEqual(self.photo.derivatives['thumb'], 'uploads/x.thumb.webp')
+        self.assertIsNotNone(storage.head_object(key))
+        # 사진/코스 삭제 경로가 지우는 키에 포함
+        self.assertIn(key, storage.photo_object_keys(self.photo.image_url, self.photo.storage_key, self.photo.derivatives))
+
+        response = self.client.get(f'/v1/photos/{self.photo.id}/composite/?layout=overlay')
+        self.assertTrue(response.data['cached'])
+
+    def test_regenerating_derivatives_keeps_composites(self):
+        derivatives.update_derivatives(self.photo.id, {'composite_overlay': 'uploads/c.jpg'})
+        derivatives.update_derivatives(
+            self.photo.id, {'thumb': 'uploads/new.thumb.webp'},
+            keep=lambda name: name.startswith(derivatives.COMPOSITE_PREFIX),
+        )
+        self.photo.refresh_from_db()
+        self.assertEqual(self.photo.derivatives, {'composite_overlay': 'uploads/c.jpg', 'thumb': 'uploads/new.thumb.webp'})
+
+
+def _jpeg_with_exif(size=(640, 480)):
+    exif = Image.Exif()
+    exif[0x010F] = 'TestCamera'  # Make
+    exif[0x0112] = 6  # Orientation: 시계 방향 90도 회전
+    buffer = io.BytesIO()
+    Image.new('RGB', size, 'green').save(buffer, format='JPEG', exif=exif.tobytes())
+    return buffer.getvalue()
+
+
+class LegacyUploadDerivativeTests(LocalStorageMixin, TestCase):
+    """image_url로 등록하는 기존 업로드 경로도 storage_key를 기록하고 파생 이미지를 만들어야 함"""
+
+    def setUp(self):
+        super().setUp()
+        self.key = f"uploads/{self.user.id}/{self.route.id}/{self.spot.id}/legacy.jpg"
+        storage.put_object(self.key, _jpeg_with_exif(), 'image/jpeg')
+        self.image_url = f"{settings.MEDIA_URL}{storage.name_from_key(self.key)}"
+        pool = ThreadPoolExecutor(max_workers=1)
+        self.addCleanup(pool.shutdown)
+        for patcher in (
+            mock.patch.object(derivatives, 'process_pool', return_value=pool),
+            # 디스패처 스레드 대신 커밋 직후 같은 스레드에서 생성
+            mock.patch.object(views, 'schedule_derivatives', side_effect=derivatives.generate_derivatives),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def register(self, image_url):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(f'/v1/photos/{self.route.id}/{self.spot.id}/', {'image_url': image_url}, format='json')
+
+    def test_registered_photo_gets_exif_free_derivatives(self):
+        response = self.register(self.image_url)
+        self.assertEqual(response.status_code, 201)
+        photo = Photo.objects.get(id=response.data['id'])
+        self.assertEqual(photo.storage_key, self.key)
+        self.assertIn('thumb', photo.derivatives)
+
+        item = self.client.get('/v1/photos/', {'size': 'thumb'}).data[0]
+        thumb_key = photo.derivatives['thumb']
+        self.assertEqual(item['image_url'], f"/media/{storage.name_from_key(thumb_key)}")
+        with default_storage.open(storage.name_from_key(thumb_key), 'rb') as f:
+            with Image.open(f) as served:
+                self.assertEqual(served.format, 'WEBP')
+                self.assertNotIn('exif', served.info)
+                self.assertEqual(len(served.getexif()), 0)
+                # 방향 태그는 픽셀에 반영된 뒤 제거됨 (640x480 -> 세로)
+                self.assertLess(served.width, served.height)
+
+    def test_registering_same_object_twice_returns_existing(self):
+        first = self.register(self.image_url)
+        second = self.register(self.image_url)
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.data['id'], first.data['id'])
+
+    def test_external_or_other_users_url_has_no_storage_key(self):
+        other_key = f"uploads/{self.other.id}/{self.route.id}/{self.spot.id}/theirs.jpg"
+        for image_url in ('https://example.com/photo.jpg', f"{settings.MEDIA_URL}{storage.name_from_key(other_key)}"):
+            response = self.register(image_url)
+            self.assertEqual(response.status_code, 201)
+            self.assertEqual(Photo.objects.get(id=response.data['id']).storage_key, '')
+        views.schedule_derivatives.assert_not_called()
+
+
+@override_settings(PHOTO_BATCH_MAX_FILES=3, PHOTO_UPLOAD_MAX_BYTES=10 * 1024)
+class BatchUploadTests(LocalStorageMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch.object(views, 'schedule_derivatives')
+        self.schedule_derivatives = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def upload(self, *files, route_id=None):
+        url = f'/v1/photos/{route_id or self.route.id}/{self.spot.id}/batch/'
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(url, {'photos': list(files)}, format='multipart')
+
+    def jpeg(self, name='a.jpg'):
+        return SimpleUploadedFile(name, _jpeg('red'), content_type='image/jpeg')
+
+    def test_all_stored_creates_photos_and_schedules_derivatives(self):
+        response = self.upload(self.jpeg('a.jpg'), self.jpeg('b.jpg'))
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['created_count'], 2)
+        self.assertEqual([result['filename'] for result in response.data['results']], ['a.jpg', 'b.jpg'])
+
+        photos = Photo.objects.filter(user_id=self.user).order_by('id')
+        self.assertEqual(len(photos), 2)
+        for photo in photos:
+            self.assertTrue(photo.storage_key.startswith(f"uploads/{self.user.id}/{self.route.id}/{self.spot.id}/"))
+            self.assertIsNotNone(storage.head_object(photo.storage_key))
+        self.assertCountEqual([c.args[0] for c in self.schedule_derivatives.call_args_list], [p.id for p in photos])
+
+    def test_partial_success_is_207_with_per_file_errors(self):
+        response = self.upload(
+            self.jpeg('ok.jpg'),
+            SimpleUploadedFile('notes.txt', b'text', content_type='text/plain'),
+            SimpleUploadedFile('huge.jpg', b'\xff' * (10 * 1024 + 1), content_type='image/jpeg'),
+        )
+        self.assertEqual(response.status_code, 207)
+        results = response.data['results']
+        self.assertTrue(results[0]['success'])
+        self.assertEqual(results[0]['photo']['id'], Photo.objects.get().id)
+        self.assertFalse(results[1]['success'])
+        self.assertIn('content_type', results[1]['error'])
+        self.assertFalse(results[2]['success'])
+        self.assertEqual(response.data['failed_count'], 2)
+
+    def test_storage_failure_is_reported_per_file(self):
+        with mock.patch.object(views, 'put_object', side_effect=OSError('disk full')):
+            response = self.upload(self.jpeg())
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['results'][0]['error'], "저장소에 사진을 저장하지 못했습니다.")
+        self.assertFalse(Photo.objects.exists())
+
+    def test_rejects_empty_oversized_batch_and_unknown_route(self):
+        self.assertEqual(self.client.post(f'/v1/photos/{self.route.id}/{self.spot.id}/batch/', {}).status_code, 400)
+        self.assertEqual(self.upload(*[self.jpeg(f'{i}.jpg') for i in range(4)]).status_code, 400)
+        self.assertEqual(self.upload(self.jpeg(), route_id=999999).status_code, 404)
+        self.assertFalse(Photo.objects.exists())
@@ -4,6 +4,11 @@ from . import views
 
 urlpatterns = [
     path('', views.photos, name='photos'),
+    path('uploads/', views.upload_intent, name='photo-upload-intent'),
+    path('uploads/finalize/', views.upload_finalize, name='photo-upload-finalize'),
+    path('uploads/local/<str:token>/', views.local_upload, name='photo-local-upload'),
     path('<int:route_id>/<int:spot_id>/', views.photo, name='photo'),
+    path('<int:route_id>/<int:spot_id>/batch/', views.photo_batch, name='photo-batch'),
     path('<int:photo_id>/', views.photo_detail, name='photo-detail'),
+    path('<int:photo_id>/composite/', views.photo_composite, name='photo-composite'),
 ]
\ No newline at end of file
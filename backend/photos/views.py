@@ -1,13 +1,34 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
 from django.shortcuts import render
 from .models import Photo
 from accounts.models import CustomUser
-from courses.models import Route
+from courses.models import Route, UserRouteSpot
 from spots.models import Spot
-from .serializers import PhotoSerializer, PhotoDetailSerializer
+from .serializers import PhotoSerializer, PhotoDetailSerializer, PHOTO_LIST_FIELDS, photo_list_item
 from rest_framework.response import Response
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, authentication_classes
 from rest_framework import status
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAuthenticated, AllowAny
+from django.conf import settings
+from django.core import signing
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import IntegrityError, transaction
+from django.urls import reverse
+from .derivatives import schedule_derivatives
+from .storage import (
+    UPLOAD_CONTENT_TYPES, upload_key, presign_upload, head_object, object_url, name_from_key, delete_objects,
+    is_s3_storage, put_object, deletion_queue, signed_url, storage_key_from_url, key_from_name,
+)
+from .composites import get_composite, record_composite, CompositeSourceError
+
+from courses.pagination import keyset_page, paginated_response, CursorError
+
+PHOTOS_PAGE_SIZE = 50
+UPLOAD_SALT = 'photos.upload'
+LOCAL_UPLOAD_SALT = 'photos.local-upload'
 
 # Create your views here.
 # get, api/v1/photos
@@ -15,10 +36,22 @@ from rest_framework.permissions import IsAuthenticated
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def photos(request):
+    """
+    사용자 사진 목록 API (최신순, 커서 페이지네이션)
+    다음 페이지가 있으면 X-Next-Cursor / Link 헤더로 전달합니다.
+
+    Query Parameters:
+        size: 화면별 파생 이미지 (thumb: 갤러리, medium: 스탬프/상세, *_avif: AVIF 버전)
+              없거나 아직 생성되지 않았으면 원본 URL
+    """
     user_id = request.user.id
-    photos = Photo.objects.filter(user_id=user_id)
-    serializer = PhotoSerializer(photos, many=True)
-    return Response(serializer.data, status=status.HTTP_200_OK)
+    photos = Photo.objects.filter(user_id=user_id).values(*PHOTO_LIST_FIELDS)
+    try:
+        rows, next_cursor = keyset_page(photos, request, fields=('created_at', 'id'), default_limit=PHOTOS_PAGE_SIZE)
+    except CursorError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    size = request.GET.get('size')
+    return paginated_response(request, [photo_list_item(row, size) for row in rows], next_cursor)
 
 # post, api/v1/photos/{route_id}/{spot_id}
 @api_view(['POST'])
@@ -67,31 +100,30 @@ def photo(request, route_id, spot_id):
         
         print(f"[photos] 받은 이미지 URL: {image_url}")
         print(f"[photos] 이미지 URL 길이: {len(image_url)}")
+
+        # 우리 버킷에 올린 본인 사진이면 객체 키를 기록해 파생 이미지 생성/삭제/정리 대상에 포함
+        storage_key = _own_storage_key(user_id, image_url)
+        if storage_key:
+            existing = Photo.objects.filter(user_id_id=user_id, storage_key=storage_key).first()
+            if existing:
+                return Response(_photo_response(existing), status=status.HTTP_200_OK)
         
         # Photo 객체 직접 생성
         try:
-            photo_instance = Photo.objects.create(
-                user_id=user,
-                route_id=route,
-                spot_id=spot,
-                image_url=image_url,
-                is_used=False
-            )
+            with transaction.atomic():
+                photo_instance = Photo.objects.create(
+                    user_id=user,
+                    route_id=route,
+                    spot_id=spot,
+                    image_url=image_url,
+                    storage_key=storage_key,
+                    is_used=False
+                )
+                if storage_key:
+                    transaction.on_commit(lambda: schedule_derivatives(photo_instance.id))
             print(f"[photos] 사진 저장 완료: ID={photo_instance.id}")
             
-            # 응답 데이터 구성
-            response_data = {
-                "id": photo_instance.id,
-                "image_url": photo_instance.image_url,
-                "is_used": photo_instance.is_used,
-                "created_at": photo_instance.created_at,
-                "used_at": photo_instance.used_at,
-                "route_id": photo_instance.route_id.id,
-                "spot_id": photo_instance.spot_id.id,
-                "user_id": photo_instance.user_id.id
-            }
-            
-            return Response(response_data, status=status.HTTP_201_CREATED)
+            return Response(_photo_response(photo_instance), status=status.HTTP_201_CREATED)
             
         except Exception as save_error:
             print(f"[photos] 사진 저장 실패: {str(save_error)}")
@@ -109,6 +141,338 @@ def photo(request, route_id, spot_id):
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
 
+def _own_storage_key(user_id, image_url):
+    """image_url이 이 사용자의 업로드 경로(uploads/<user>/...) 객체면 그 키, 아니면 빈 문자열"""
+    key = storage_key_from_url(image_url)
+    if key and key.startswith(key_from_name(f"{user_id}/")):
+        return key
+    return ''
+
+
+def _photo_response(photo_instance):
+    return {
+        "id": photo_instance.id,
+        "image_url": photo_instance.image_url,
+        "is_used": photo_instance.is_used,
+        "created_at": photo_instance.created_at,
+        "used_at": photo_instance.used_at,
+        "route_id": photo_instance.route_id_id,
+        "spot_id": photo_instance.spot_id_id,
+        "user_id": photo_instance.user_id_id
+    }
+
+
+_batch_upload_pool = None
+_batch_upload_pool_lock = threading.Lock()
+
+
+def _batch_upload_executor():
+    global _batch_upload_pool
+    with _batch_upload_pool_lock:
+        if _batch_upload_pool is None:
+            _batch_upload_pool = ThreadPoolExecutor(
+                max_workers=settings.PHOTO_BATCH_UPLOAD_WORKERS, thread_name_prefix='photo-batch-upload'
+            )
+        return _batch_upload_pool
+
+
+def _store_upload(key, upload):
+    put_object(key, upload, upload.content_type)
+    return key
+
+
+# post, api/v1/photos/{route_id}/{spot_id}/batch/
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def photo_batch(request, route_id, spot_id):
+    """
+    사진 일괄 업로드 API (multipart, 필드명 photos)
+    route/spot을 한 번만 검증하고, 파일들은 제한된 스레드 풀에서 동시에 저장소로 보낸 뒤
+    Photo 행을 bulk_create 한 번으로 생성합니다.
+
+    Response:
+        results: 파일 순서대로 {index, filename, success, photo | error}
+        모두 성공 201, 일부 성공 207, 모두 실패 400
+    """
+    uploads = request.FILES.getlist('photos')
+    if not uploads:
+        return Response({"error": "photos 필드에 사진 파일이 필요합니다."}, status=status.HTTP_400_BAD_REQUEST)
+    if len(uploads) > settings.PHOTO_BATCH_MAX_FILES:
+        return Response(
+            {"error": f"한 번에 최대 {settings.PHOTO_BATCH_MAX_FILES}장까지 업로드할 수 있습니다."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    if not Route.objects.filter(pk=route_id).exists():
+        return Response({"error": f"Route ID {route_id}가 존재하지 않습니다."}, status=status.HTTP_404_NOT_FOUND)
+    if not Spot.objects.filter(pk=spot_id).exists():
+        return Response({"error": f"Spot ID {spot_id}가 존재하지 않습니다."}, status=status.HTTP_404_NOT_FOUND)
+
+    results = [{'index': i, 'filename': upload.name, 'success': False} for i, upload in enumerate(uploads)]
+    futures = {}
+    executor = _batch_upload_executor()
+    for i, upload in enumerate(uploads):
+        if upload.content_type not in UPLOAD_CONTENT_TYPES:
+            results[i]['error'] = f"지원하지 않는 content_type입니다. ({upload.content_type})"
+        elif not 0 < upload.size <= settings.PHOTO_UPLOAD_MAX_BYTES:
+            results[i]['error'] = "파일 크기가 허용 범위를 벗어났습니다."
+        else:
+            key = upload_key(request.user.id, route_id, spot_id, upload.content_type)
+            futures[i] = executor.submit(_store_upload, key, upload)
+
+    stored = {}
+    for i, future in futures.items():
+        try:
+            stored[i] = future.result()
+        except Exception as e:
+            print(f"[photos] 일괄 업로드 저장 실패 ({uploads[i].name}): {str(e)}")
+            results[i]['error'] = "저장소에 사진을 저장하지 못했습니다."
+
+    if stored:
+        try:
+            with transaction.atomic():
+                created = Photo.objects.bulk_create([
+                    Photo(
+                        user_id_id=request.user.id,
+                        route_id_id=route_id,
+                        spot_id_id=spot_id,
+                        image_url=object_url(key),
+                        storage_key=key,
+                        is_used=False
+                    )
+                    for key in stored.values()
+                ])
+                photo_ids = [photo_instance.id for photo_instance in created]
+                transaction.on_commit(lambda: [schedule_derivatives(photo_id) for photo_id in photo_ids])
+        except Exception as save_error:
+            print(f"[photos] 사진 저장 실패: {str(save_error)}")
+            deletion_queue.enqueue(stored.values())
+            return Response(
+                {"error": f"사진 저장 중 오류가 발생했습니다: {str(save_error)}"},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+        for i, photo_instance in zip(stored, created):
+            results[i]['success'] = True
+            results[i]['photo'] = _photo_response(photo_instance)
+
+    if len(stored) == len(uploads):
+        response_status = status.HTTP_201_CREATED
+    elif stored:
+        response_status = status.HTTP_207_MULTI_STATUS
+    else:
+        response_status = status.HTTP_400_BAD_REQUEST
+    return Response(
+        {'created_count': len(stored), 'failed_count': len(uploads) - len(stored), 'results': results},
+        status=response_status
+    )
+
+
+# post, api/v1/photos/uploads/
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def upload_intent(request):
+    """
+    사진 직접 업로드 시작 API
+    클라이언트는 응답의 url로 저장소에 바로 업로드한 뒤 upload_id로 finalize를 호출합니다.
+    이미지 바이트는 Django 워커를 거치지 않습니다.
+
+    Request Body:
+        route_id, spot_id, content_type (기본 image/jpeg)
+    """
+    route_id = request.data.get('route_id')
+    spot_id = request.data.get('spot_id')
+    content_type = request.data.get('content_type', 'image/jpeg')
+
+    try:
+        route_id, spot_id = int(route_id), int(spot_id)
+    except (TypeError, ValueError):
+        return Response({"error": "route_id와 spot_id는 정수여야 합니다."}, status=status.HTTP_400_BAD_REQUEST)
+    if content_type not in UPLOAD_CONTENT_TYPES:
+        return Response(
+            {"error": f"지원하지 않는 content_type입니다. ({', '.join(UPLOAD_CONTENT_TYPES)})"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    missing = _missing_upload_target(request.user.id, route_id, spot_id)
+    if missing:
+        return missing
+
+    key = upload_key(request.user.id, route_id, spot_id, content_type)
+    expires_in = settings.PHOTO_UPLOAD_URL_EXPIRES
+    upload = presign_upload(key, content_type, settings.PHOTO_UPLOAD_MAX_BYTES, expires_in)
+    if upload is None:
+        # S3가 아닌 저장소(로컬 개발/테스트)는 서명된 로컬 업로드 URL로 대체
+        token = signing.dumps({'k': key, 'ct': content_type}, salt=LOCAL_UPLOAD_SALT)
+        upload = {
+            'method': 'PUT',
+            'url': request.build_absolute_uri(reverse('photo-local-upload', args=[token])),
+            'headers': {'Content-Type': content_type},
+        }
+
+    upload_id = signing.dumps(
+        {'u': request.user.id, 'r': route_id, 's': spot_id, 'k': key},
+        salt=UPLOAD_SALT
+    )
+    return Response(
+        {
+            'upload_id': upload_id,
+            'key': key,
+            'expires_in': expires_in,
+            'max_bytes': settings.PHOTO_UPLOAD_MAX_BYTES,
+            **upload,
+        },
+        status=status.HTTP_201_CREATED
+    )
+
+
+def _missing_upload_target(user_id, route_id, spot_id):
+    """코스/장소가 없거나 사용자가 채택한 코스가 아니면 404 응답, 문제없으면 None"""
+    if not Route.objects.filter(pk=route_id).exists():
+        return Response({"error": f"Route ID {route_id}가 존재하지 않습니다."}, status=status.HTTP_404_NOT_FOUND)
+    if not Spot.objects.filter(pk=spot_id).exists():
+        return Response({"error": f"Spot ID {spot_id}가 존재하지 않습니다."}, status=status.HTTP_404_NOT_FOUND)
+    if not UserRouteSpot.objects.filter(user_id=user_id, route_id=route_id).exists():
+        return Response({"error": f"Route ID {route_id}는 사용자의 코스가 아닙니다."}, status=status.HTTP_404_NOT_FOUND)
+    return None
+
+
+# post, api/v1/photos/uploads/finalize/
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def upload_finalize(request):
+    """
+    사진 직접 업로드 완료 API
+    저장소에 HEAD 한 번으로 객체를 확인한 뒤 Photo를 생성합니다.
+    같은 upload_id로 다시 호출하면 이미 생성된 Photo를 반환합니다.
+    """
+    try:
+        intent = signing.loads(
+            request.data.get('upload_id') or '',
+            salt=UPLOAD_SALT,
+            max_age=settings.PHOTO_UPLOAD_FINALIZE_MAX_AGE
+        )
+    except signing.SignatureExpired:
+        return Response({"error": "upload_id가 만료되었습니다."}, status=status.HTTP_400_BAD_REQUEST)
+    except signing.BadSignature:
+        return Response({"error": "upload_id가 올바르지 않습니다."}, status=status.HTTP_400_BAD_REQUEST)
+    if intent['u'] != request.user.id:
+        return Response({"error": "다른 사용자의 업로드입니다."}, status=status.HTTP_403_FORBIDDEN)
+
+    key = intent['k']
+    existing = Photo.objects.filter(user_id_id=request.user.id, storage_key=key).first()
+    if existing:
+        return Response(_photo_response(existing), status=status.HTTP_200_OK)
+    # 업로드 시작 후 코스/장소가 삭제됐을 수 있음
+    missing = _missing_upload_target(request.user.id, intent['r'], intent['s'])
+    if missing:
+        return missing
+
+    try:
+        meta = head_object(key)
+    except Exception as e:
+        print(f"[photos] 업로드 객체 확인 실패 ({key}): {str(e)}")
+        return Response({"error": "저장소에서 업로드를 확인할 수 없습니다."}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+    if meta is None:
+        return Response({"error": "업로드된 파일을 찾을 수 없습니다."}, status=status.HTTP_409_CONFLICT)
+    if not 0 < meta['size'] <= settings.PHOTO_UPLOAD_MAX_BYTES:
+        delete_objects([key])
+        return Response({"error": "파일 크기가 허용 범위를 벗어났습니다."}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        with transaction.atomic():
+            photo_instance = Photo.objects.create(
+                user_id_id=request.user.id,
+                route_id_id=intent['r'],
+                spot_id_id=intent['s'],
+                image_url=object_url(key),
+                storage_key=key,
+                is_used=False
+            )
+            transaction.on_commit(lambda: schedule_derivatives(photo_instance.id))
+    except IntegrityError:
+        # 같은 upload_id의 동시 finalize가 먼저 생성함 (storage_key 유니크 제약)
+        existing = Photo.objects.filter(user_id_id=request.user.id, storage_key=key).first()
+        if existing is not None:
+            return Response(_photo_response(existing), status=status.HTTP_200_OK)
+        # 확인 직후 코스/장소가 삭제된 경우 (외래 키 위반)
+        missing = _missing_upload_target(request.user.id, intent['r'], intent['s'])
+        if missing:
+            return missing
+        return Response({"error": "이미 등록된 업로드입니다."}, status=status.HTTP_409_CONFLICT)
+    except Exception as save_error:
+        print(f"[photos] 사진 저장 실패: {str(save_error)}")
+        return Response(
+            {"error": f"사진 저장 중 오류가 발생했습니다: {str(save_error)}"},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+    return Response(_photo_response(photo_instance), status=status.HTTP_201_CREATED)
+
+
+# put, api/v1/photos/uploads/local/{token}/
+@api_view(['PUT'])
+@authentication_classes([])
+@permission_classes([AllowAny])
+def local_upload(request, token):
+    """
+    S3가 아닌 저장소에서 presigned URL을 흉내 내는 업로드 API (로컬 개발/테스트용)
+    서명된 token이 인증을 대신합니다.
+    """
+    if is_s3_storage():
+        return Response(status=status.HTTP_404_NOT_FOUND)
+    try:
+        upload = signing.loads(token, salt=LOCAL_UPLOAD_SALT, max_age=settings.PHOTO_UPLOAD_URL_EXPIRES)
+    except signing.BadSignature:
+        return Response({"error": "업로드 URL이 만료되었거나 올바르지 않습니다."}, status=status.HTTP_403_FORBIDDEN)
+
+    body = request.body
+    if not 0 < len(body) <= settings.PHOTO_UPLOAD_MAX_BYTES:
+        return Response({"error": "파일 크기가 허용 범위를 벗어났습니다."}, status=status.HTTP_400_BAD_REQUEST)
+
+    name = name_from_key(upload['k'])
+    if default_storage.exists(name):
+        default_storage.delete(name)
+    default_storage.save(name, ContentFile(body))
+    return Response(status=status.HTTP_200_OK)
+
+
+# get, api/v1/photos/{photo_id}/composite/?layout=side_by_side|overlay
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def photo_composite(request, photo_id):
+    """
+    과거-현재 합성 이미지 API
+    사용자 사진과 스팟의 과거 사진을 서버에서 합성해 URL을 반환합니다.
+    같은 입력의 결과는 저장소 캐시를 재사용합니다.
+    """
+    layout = request.GET.get('layout', 'side_by_side')
+    photo_row = (Photo.objects
+                 .filter(id=photo_id, user_id_id=request.user.id)
+                 .values('storage_key', 'derivatives', 'spot_id__past_image_url')
+                 .first())
+    if photo_row is None:
+        return Response({"error": f"Photo ID {photo_id}가 존재하지 않습니다."}, status=status.HTTP_404_NOT_FOUND)
+    past_image_url = photo_row['spot_id__past_image_url']
+    if not past_image_url:
+        return Response({"error": "이 장소에는 과거 사진이 없습니다."}, status=status.HTTP_404_NOT_FOUND)
+    photo_key = photo_row['storage_key']
+    if not photo_key:
+        return Response({"error": "저장소에 업로드된 사진만 합성할 수 있습니다."}, status=status.HTTP_409_CONFLICT)
+    # 합성 결과는 1080px 높이라 중간 크기 파생 이미지가 있으면 그것을 입력으로 사용
+    source_key = (photo_row['derivatives'] or {}).get('medium') or photo_key
+
+    try:
+        key, rendered = get_composite(photo_key, past_image_url, layout, source_key=source_key)
+    except ValueError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    except CompositeSourceError as e:
+        print(f"[photos] 합성 실패 (photo={photo_id}): {str(e)}")
+        return Response({"error": str(e)}, status=status.HTTP_502_BAD_GATEWAY)
+    record_composite(photo_id, photo_row['derivatives'], layout, key)
+
+    return Response(
+        {'photo_id': photo_id, 'layout': layout, 'url': signed_url(key), 'cached': not rendered},
+        status=status.HTTP_200_OK
+    )
+
+
 # patch, api/v1/photos/{photo_id}
 @api_view(['PATCH', 'DELETE'])
 @permission_classes([IsAuthenticated])
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Spot, SpotPhoto
+from .models import Spot, SpotPhoto, SpotLinkCheck
 
 
 @admin.register(Spot)
@@ -17,7 +17,7 @@ class SpotAdmin(admin.ModelAdmin):
             'fields': ('content_id', 'content_type_id', 'category1', 'category2', 'category3', 'sigungu_code')
         }),
         ('이미지', {
-            'fields': ('first_image', 'first_image2', 'past_image_url')
+            'fields': ('first_image', 'first_image2', 'past_image_url', 'past_image_broken')
         }),
         ('운영 정보', {
             'fields': ('use_time',)
@@ -42,3 +42,10 @@ class SpotPhotoAdmin(admin.ModelAdmin):
     list_display = ['name', 'spot', 'image']
     list_filter = ['spot']
     search_fields = ['name', 'spot__name']
+
+
+@admin.register(SpotLinkCheck)
+class SpotLinkCheckAdmin(admin.ModelAdmin):
+    list_display = ['spot', 'field', 'ok', 'status_code', 'latency_ms', 'content_length', 'checked_at']
+    list_filter = ['ok', 'field']
+    search_fields = ['spot__name', 'url']
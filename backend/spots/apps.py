@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class SpotsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'spots'
+
+    def ready(self):
+        # 워커 시작 시 카탈로그 아티팩트를 미리 로드 (없으면 건너뜀)
+        from .catalog import get_catalog
+        get_catalog()
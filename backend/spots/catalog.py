@@ -0,0 +1,343 @@
+"""
+스팟 카탈로그 아티팩트
+build_catalog 명령이 스팟 테이블에서 파생 데이터(좌표, 태그 비트마스크,
+미션 마스크, geohash)를 한 번에 계산해 버전별 디렉터리에 저장하고,
+웹 워커는 시작할 때 이를 읽어 요청마다 다시 계산하지 않습니다.
+조회는 Catalog.nearest / distances_from (get_user_region, 챗봇 의도 라우터와 컨텍스트)에서 합니다.
+
+디렉터리 구조
+    <CATALOG_ARTIFACT_DIR>/
+        CURRENT                 # 현재 버전 이름
+        <version>/
+            manifest.json       # 버전, 생성 시각, 파일별 sha256, 전체 체크섬
+            spots.json          # 인덱스 순서의 스팟 메타데이터
+            *.npy               # 배열 아티팩트
+"""
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from datetime import datetime, timezone as dt_timezone
+
+import numpy as np
+from django.conf import settings
+
+
+CATALOG_FORMAT_VERSION = 2
+EARTH_RADIUS_KM = 6371
+
+# 비트 순서가 곧 아티팩트 포맷이므로 순서를 바꾸면 CATALOG_FORMAT_VERSION을 올려야 합니다.
+TAG_FIELDS = [
+    'public_transport',
+    'car_transport',
+    'walking_activity',
+    'with_children',
+    'with_pets',
+    'clean_facility',
+    'night_view',
+    'quiet_rest',
+    'famous',
+    'experience_info',
+    'fun_sightseeing',
+]
+
+SPOT_META_FIELDS = [
+    'id', 'name', 'address', 'lat', 'lng', 'sigungu_code', 'use_time',
+    'category1', 'category2', 'category3', 'first_image', 'past_image_url',
+]
+
+GEOHASH_PRECISION = 7
+_GEOHASH_BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+ARRAY_FILES = {
+    'coords': 'coords.npy',
+    'tag_bits': 'tag_bits.npy',
+    'mission': 'mission.npy',
+}
+META_FILE = 'spots.json'
+MANIFEST_FILE = 'manifest.json'
+CURRENT_FILE = 'CURRENT'
+
+
+# --- 1. 계산 함수 ---
+def geohash_encode(lat, lng, precision=GEOHASH_PRECISION):
+    """위경도를 geohash 문자열로 인코딩합니다."""
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    chars = []
+    bit = 0
+    ch = 0
+    even = True
+    while len(chars) < precision:
+        rng, value = (lng_range, lng) if even else (lat_range, lat)
+        mid = (rng[0] + rng[1]) / 2
+        if value >= mid:
+            ch = (ch << 1) | 1
+            rng[0] = mid
+        else:
+            ch = ch << 1
+            rng[1] = mid
+        even = not even
+        bit += 1
+        if bit == 5:
+            chars.append(_GEOHASH_BASE32[ch])
+            bit = 0
+            ch = 0
+    return ''.join(chars)
+
+
+def haversine_to_many(lat, lng, lats, lngs):
+    """한 지점에서 여러 지점까지의 거리를 km 단위 배열로 계산합니다."""
+    lat1, lng1 = np.radians(lat), np.radians(lng)
+    lat2, lng2 = np.radians(lats), np.radians(lngs)
+    a = np.sin((lat2 - lat1) / 2.0) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2.0) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def compute_catalog(spot_rows):
+    """
+    스팟 행(dict) 목록으로부터 모든 파생 아티팩트를 계산합니다.
+
+    Args:
+        spot_rows (list): SPOT_META_FIELDS와 TAG_FIELDS를 키로 가진 dict 목록
+
+    Returns:
+        tuple: (arrays dict, spots meta list)
+    """
+    n = len(spot_rows)
+    lats = np.array([row['lat'] for row in spot_rows], dtype=np.float64)
+    lngs = np.array([row['lng'] for row in spot_rows], dtype=np.float64)
+
+    # 태그 비트마스크: (N, T) 불리언 행렬과 비트 가중치의 내적
+    tag_matrix = np.array(
+        [[bool(row[tag]) for tag in TAG_FIELDS] for row in spot_rows], dtype=np.uint16
+    ).reshape(n, len(TAG_FIELDS))
+    tag_bits = (tag_matrix << np.arange(len(TAG_FIELDS), dtype=np.uint16)).sum(axis=1).astype(np.uint16)
+
+    mission = np.array(
+        [bool(row['past_image_url']) and not row.get('past_image_broken', False) for row in spot_rows], dtype=bool
+    )
+
+    meta = []
+    for row in spot_rows:
+        item = {field: row[field] for field in SPOT_META_FIELDS}
+        item['geohash'] = geohash_encode(row['lat'], row['lng'])
+        meta.append(item)
+
+    arrays = {
+        'coords': np.column_stack([lats, lngs]) if n else np.zeros((0, 2)),
+        'tag_bits': tag_bits,
+        'mission': mission,
+    }
+    return arrays, meta
+
+
+# --- 2. 저장 / 로드 ---
+def artifact_dir():
+    return str(getattr(settings, 'CATALOG_ARTIFACT_DIR', os.path.join(settings.BASE_DIR, 'catalog_artifacts')))
+
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _manifest_checksum(files):
+    digest = hashlib.sha256()
+    for name in sorted(files):
+        digest.update(f"{name}:{files[name]['sha256']}\n".encode())
+    return digest.hexdigest()
+
+
+def write_catalog(arrays, meta, base_dir=None, keep=3):
+    """
+    아티팩트를 새 버전 디렉터리에 쓰고 CURRENT 포인터를 원자적으로 교체합니다.
+
+    Returns:
+        str: 새 버전 이름
+    """
+    base_dir = base_dir or artifact_dir()
+    os.makedirs(base_dir, exist_ok=True)
+    created_at = datetime.now(dt_timezone.utc)
+    tmp_dir = os.path.join(base_dir, f".tmp-{os.getpid()}-{int(time.time() * 1000)}")
+    os.makedirs(tmp_dir)
+
+    try:
+        files = {}
+        for key, filename in ARRAY_FILES.items():
+            path = os.path.join(tmp_dir, filename)
+            np.save(path, arrays[key], allow_pickle=False)
+            files[filename] = {'sha256': _sha256(path), 'bytes': os.path.getsize(path)}
+
+        meta_path = os.path.join(tmp_dir, META_FILE)
+        with open(meta_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+        files[META_FILE] = {'sha256': _sha256(meta_path), 'bytes': os.path.getsize(meta_path)}
+
+        checksum = _manifest_checksum(files)
+        version = f"{created_at:%Y%m%d%H%M%S}-{checksum[:8]}"
+        manifest = {
+            'format_version': CATALOG_FORMAT_VERSION,
+            'version': version,
+            'created_at': created_at.isoformat(),
+            'spot_count': len(meta),
+            'tag_fields': TAG_FIELDS,
+            'geohash_precision': GEOHASH_PRECISION,
+            'files': files,
+            'checksum': checksum,
+        }
+        with open(os.path.join(tmp_dir, MANIFEST_FILE), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+        version_dir = os.path.join(base_dir, version)
+        if os.path.exists(version_dir):
+            shutil.rmtree(version_dir)
+        os.replace(tmp_dir, version_dir)
+    except Exception:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+    pointer_tmp = os.path.join(base_dir, f"{CURRENT_FILE}.tmp-{os.getpid()}")
+    with open(pointer_tmp, 'w', encoding='utf-8') as f:
+        f.write(version)
+    os.replace(pointer_tmp, os.path.join(base_dir, CURRENT_FILE))
+
+    _prune_versions(base_dir, keep=keep, current=version)
+    return version
+
+
+def _prune_versions(base_dir, keep, current):
+    versions = sorted(
+        name for name in os.listdir(base_dir)
+        if not name.startswith('.') and os.path.isdir(os.path.join(base_dir, name))
+    )
+    if keep <= 0:
+        return
+    for name in versions[:-keep]:
+        if name != current:
+            shutil.rmtree(os.path.join(base_dir, name), ignore_errors=True)
+
+
+class CatalogError(Exception):
+    pass
+
+
+class Catalog:
+    """로드된 카탈로그 아티팩트와 조회 헬퍼"""
+
+    def __init__(self, manifest, meta, arrays):
+        self.manifest = manifest
+        self.version = manifest['version']
+        self.spots = meta
+        self.coords = arrays['coords']
+        self.tag_bits = arrays['tag_bits']
+        self.mission = arrays['mission']
+        self.index_by_id = {spot['id']: i for i, spot in enumerate(meta)}
+
+    def __len__(self):
+        return len(self.spots)
+
+    def distances_from(self, lat, lng):
+        """한 위치에서 모든 스팟까지의 거리(km)"""
+        return haversine_to_many(lat, lng, self.coords[:, 0], self.coords[:, 1])
+
+    def nearest(self, lat, lng, k=1, mask=None):
+        """
+        위치에서 가까운 스팟 k개를 [(인덱스, 거리km), ...]로 반환합니다.
+        mask가 주어지면 해당 불리언 배열이 True인 스팟만 고려합니다.
+        """
+        if not len(self):
+            return []
+        dist = self.distances_from(lat, lng)
+        if mask is not None:
+            dist = np.where(mask, dist, np.inf)
+        k = min(k, len(self))
+        idx = np.argpartition(dist, k - 1)[:k]
+        idx = idx[np.argsort(dist[idx], kind='stable')]
+        return [(int(i), float(dist[i])) for i in idx if np.isfinite(dist[i])]
+
+
+def load_catalog(base_dir=None, verify=True):
+    """
+    CURRENT가 가리키는 버전을 로드합니다. 체크섬이 맞지 않으면 CatalogError를 냅니다.
+    아티팩트가 아직 없으면 None을 반환합니다.
+    """
+    base_dir = base_dir or artifact_dir()
+    pointer = os.path.join(base_dir, CURRENT_FILE)
+    if not os.path.exists(pointer):
+        return None
+    with open(pointer, encoding='utf-8') as f:
+        version = f.read().strip()
+    version_dir = os.path.join(base_dir, version)
+
+    with open(os.path.join(version_dir, MANIFEST_FILE), encoding='utf-8') as f:
+        manifest = json.load(f)
+    if manifest.get('format_version') != CATALOG_FORMAT_VERSION:
+        raise CatalogError(f"지원하지 않는 카탈로그 포맷입니다: {manifest.get('format_version')}")
+
+    if verify:
+        for name, info in manifest['files'].items():
+            if _sha256(os.path.join(version_dir, name)) != info['sha256']:
+                raise CatalogError(f"체크섬 불일치: {version}/{name}")
+        if _manifest_checksum(manifest['files']) != manifest['checksum']:
+            raise CatalogError(f"manifest 체크섬 불일치: {version}")
+
+    arrays = {
+        key: np.load(os.path.join(version_dir, filename), allow_pickle=False)
+        for key, filename in ARRAY_FILES.items()
+    }
+    with open(os.path.join(version_dir, META_FILE), encoding='utf-8') as f:
+        meta = json.load(f)
+    return Catalog(manifest, meta, arrays)
+
+
+# --- 3. 프로세스 단위 캐시 ---
+_catalog = None
+_catalog_pointer_mtime = None
+_catalog_checked_at = None
+_catalog_lock = threading.Lock()
+RELOAD_CHECK_INTERVAL = 30  # 초
+
+
+def get_catalog():
+    """
+    현재 프로세스에 로드된 카탈로그를 반환합니다. 없으면 None.
+    CURRENT 포인터가 바뀌면 (최대 RELOAD_CHECK_INTERVAL초 간격으로 확인) 새 버전을 다시 로드합니다.
+    """
+    global _catalog, _catalog_pointer_mtime, _catalog_checked_at
+
+    now = time.monotonic()
+    if _catalog_checked_at is not None and now - _catalog_checked_at < RELOAD_CHECK_INTERVAL:
+        return _catalog
+
+    with _catalog_lock:
+        if _catalog_checked_at is not None and now - _catalog_checked_at < RELOAD_CHECK_INTERVAL:
+            return _catalog
+        _catalog_checked_at = now
+        try:
+            mtime = os.stat(os.path.join(artifact_dir(), CURRENT_FILE)).st_mtime_ns
+        except OSError:
+            return _catalog
+        if mtime == _catalog_pointer_mtime:
+            return _catalog
+        try:
+            _catalog = load_catalog()
+            _catalog_pointer_mtime = mtime
+            print(f"[spots] 카탈로그 로드 완료: {_catalog.version} ({len(_catalog)} spots)")
+        except Exception as e:
+            print(f"[spots] 카탈로그 로드 실패: {e}")
+        return _catalog
+
+
+def reset_catalog():
+    """다음 get_catalog 호출에서 아티팩트를 다시 확인하도록 캐시를 비웁니다."""
+    global _catalog, _catalog_pointer_mtime, _catalog_checked_at
+    with _catalog_lock:
+        _catalog = None
+        _catalog_pointer_mtime = None
+        _catalog_checked_at = None
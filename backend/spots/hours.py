@@ -0,0 +1,147 @@
+"""
+스팟 운영시간(use_time) 해석
+관광공사 usetime 필드는 자유 형식 텍스트라서 자주 나오는 형태만 해석하고, 나머지는 '알 수 없음'으로 둡니다.
+    09:00~18:00 (입장마감 17:00)                 -> 09:00~18:00
+    11월~2월 09:00~17:00<br>3월, 4월 ... 09:00~18:00 -> 해당 월의 시간
+    상시 개방 / 24시간                           -> 항상 열림
+    매주 월요일 휴관 / 휴무일: 월·화요일          -> 해당 요일은 닫힘 (closed_days)
+"""
+import re
+from collections import namedtuple
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+SEOUL = ZoneInfo('Asia/Seoul')
+
+ALWAYS = 'always'
+HOURS = 'hours'
+UNKNOWN = 'unknown'
+
+ALWAYS_OPEN_MARKERS = ('상시', '24시간', '언제든')
+
+_TAG_RE = re.compile(r'<[^>]+>')
+_LINE_SPLIT_RE = re.compile(r'<br\s*/?>|\n', re.IGNORECASE)
+_RANGE_RE = re.compile(r'(\d{1,2}):(\d{2})\s*[~\-–]\s*(\d{1,2}):(\d{2})')
+_MONTH_RANGE_RE = re.compile(r'(\d{1,2})\s*월?\s*[~\-–]\s*(\d{1,2})월')
+_MONTH_RE = re.compile(r'(\d{1,2})월')
+
+WEEKDAYS = '월화수목금토일'  # datetime.weekday() 순서
+# "월요일", "월·화요일", "월요일, 화요일"
+_WEEKDAYS = r'((?:[월화수목금토일]\s*(?:요일)?\s*[,·/및]\s*)*[월화수목금토일])\s*요일'
+# '휴일'(공휴일/휴일 운영)과 '휴게시간'은 닫는 날이 아니므로 넣지 않음
+_CLOSED = r'(?:휴무|휴관|휴장|정기\s*휴|쉼|쉽니다|문\s*닫)'
+# "월요일 휴관", "매주 월요일(공휴일인 경우 다음날) 휴무" - 사이에 시간(숫자/~)이 끼면 다른 문장
+_CLOSED_AFTER_RE = re.compile(_WEEKDAYS + r'[^\n,\d~]{0,20}?' + _CLOSED)
+# "휴관일: 매주 월요일", "정기휴무 화요일"
+_CLOSED_BEFORE_RE = re.compile(_CLOSED + r'일?\s*[:：]?\s*(?:매주\s*)?' + _WEEKDAYS)
+_NTH_WEEK_MARKER = '째'  # "매월 셋째 월요일 휴관"은 매주 닫는 날이 아님
+
+OpenHours = namedtuple(
+    'OpenHours', ['kind', 'opens', 'closes', 'label', 'closed_days'], defaults=(frozenset(),)
+)  # opens/closes: 자정 기준 분, closed_days: 매주 닫는 요일 (0=월요일)
+
+
+def clean_text(use_time):
+    """<br> 등을 줄바꿈으로 바꾼 표시용 텍스트"""
+    lines = (_TAG_RE.sub('', line).strip() for line in _LINE_SPLIT_RE.split(use_time or ''))
+    return '\n'.join(line for line in lines if line)
+
+
+def _months(segment):
+    """구간에 적힌 월 집합 (월 표기가 없으면 빈 집합)"""
+    months = set()
+    for start, end in _MONTH_RANGE_RE.findall(segment):
+        start, end = int(start), int(end)
+        span = (end - start) % 12
+        months.update((start - 1 + i) % 12 + 1 for i in range(span + 1))
+    months.update(int(m) for m in _MONTH_RE.findall(segment))
+    return months
+
+
+def closed_weekdays(text):
+    """매주 닫는 요일 집합 (0=월요일). "월요일 휴무", "휴관일: 매주 월·화요일" 같은 표기만 봅니다."""
+    days = set()
+    for pattern in (_CLOSED_AFTER_RE, _CLOSED_BEFORE_RE):
+        for match in pattern.finditer(text):
+            start = match.start(1)
+            if _NTH_WEEK_MARKER in text[max(0, start - 4):start]:
+                continue
+            days.update(WEEKDAYS.index(day) for day in match.group(1).replace('요일', '') if day in WEEKDAYS)
+    return frozenset(days)
+
+
+def _minutes(hour, minute):
+    return min(int(hour), 24) * 60 + int(minute)
+
+
+def parse_use_time(use_time, month=None):
+    """
+    use_time 텍스트를 OpenHours로 해석합니다.
+    월별로 다른 시간이 적혀 있으면 month(기본값: 서울 기준 이번 달)에 해당하는 시간을 씁니다.
+    """
+    text = clean_text(use_time)
+    if not text:
+        return OpenHours(UNKNOWN, None, None, '')
+    month = month or local_now().month
+    closed_days = closed_weekdays(text)
+
+    # 시간 범위마다 바로 앞(이전 범위 이후)에 적힌 월을 그 범위의 적용 월로 봅니다.
+    candidates = []
+    previous_end = 0
+    for match in _RANGE_RE.finditer(text):
+        candidates.append((_months(text[previous_end:match.start()]), match))
+        previous_end = match.end()
+    if any(months for months, _ in candidates):
+        candidates = [(months, match) for months, match in candidates if month in months]
+
+    if candidates:
+        h1, m1, h2, m2 = candidates[0][1].groups()
+        label = f'{int(h1):02d}:{m1}~{int(h2):02d}:{m2}' + _closed_label(closed_days)
+        return OpenHours(HOURS, _minutes(h1, m1), _minutes(h2, m2), label, closed_days)
+    if any(marker in text for marker in ALWAYS_OPEN_MARKERS):
+        return OpenHours(ALWAYS, 0, 24 * 60, '상시 개방' + _closed_label(closed_days), closed_days)
+    return OpenHours(UNKNOWN, None, None, text.split('\n')[0][:40], closed_days)
+
+
+def _closed_label(closed_days):
+    return f" ({'·'.join(WEEKDAYS[day] for day in sorted(closed_days))} 휴무)" if closed_days else ''
+
+
+def is_open(hours, minute_of_day, weekday=None):
+    """
+    열려 있으면 True, 닫혀 있으면 False, 알 수 없으면 None
+    weekday(0=월요일)를 주면 매주 닫는 요일도 반영합니다.
+    """
+    if weekday is not None and weekday in hours.closed_days:
+        return False
+    if hours.kind == ALWAYS:
+        return True
+    if hours.kind != HOURS:
+        return None
+    if hours.closes > hours.opens:
+        return hours.opens <= minute_of_day < hours.closes
+    # 자정을 넘겨 닫는 경우 (예: 18:00~02:00)
+    return minute_of_day >= hours.opens or minute_of_day < hours.closes
+
+
+def local_now():
+    return datetime.now(SEOUL)
+
+
+def minute_of_day(moment=None):
+    moment = moment or local_now()
+    return moment.hour * 60 + moment.minute
+
+
+_catalog_hours = (None, [])
+
+
+def catalog_hours(catalog, month=None):
+    """카탈로그 스팟 순서대로 OpenHours 목록 (카탈로그 버전과 월마다 한 번만 해석)"""
+    global _catalog_hours
+    month = month or local_now().month
+    key, hours = _catalog_hours
+    if key != (catalog.version, month):
+        hours = [parse_use_time(spot.get('use_time'), month) for spot in catalog.spots]
+        _catalog_hours = ((catalog.version, month), hours)
+    return hours
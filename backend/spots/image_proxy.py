@@ -0,0 +1,260 @@
+"""
+스팟 이미지 프록시
+first_image / first_image2 / past_image_url은 외부(일부 http) 호스트를 가리키므로
+서버가 한 번만 받아 크기별 변형을 디스크 LRU 캐시에 보관하고 강한 캐시 헤더로 제공합니다.
+
+    variant = <source>[_<size>]
+    source: first (first_image), first2 (first_image2), past (past_image_url)
+    size:   thumb (320px), medium (1080px, 기본), full (원본 그대로)
+"""
+import hashlib
+import io
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+
+import requests
+from django.conf import settings
+from PIL import Image, ImageOps
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+SOURCES = {
+    'first': 'first_image',
+    'first2': 'first_image2',
+    'past': 'past_image_url',
+}
+SIZES = {
+    'thumb': 320,
+    'medium': 1080,
+    'full': None,
+}
+DEFAULT_SIZE = 'medium'
+PROXY_VERSION = 1  # 변형 방식이 바뀌면 올려서 캐시 무효화
+FETCH_TIMEOUT = (3, 10)  # (connect, read) 초
+MAX_SOURCE_BYTES = 10 * 1024 * 1024
+JPEG_QUALITY = 82
+EVICT_TARGET_RATIO = 0.9  # 한도를 넘으면 90%까지 비움
+
+
+class ImageProxyError(Exception):
+    """원본 이미지를 가져오거나 변환할 수 없을 때"""
+
+
+def parse_variant(variant):
+    """'past_thumb' -> ('past_image_url', 'thumb'). 알 수 없는 variant면 ValueError"""
+    source, _, size = variant.partition('_')
+    size = size or DEFAULT_SIZE
+    if source not in SOURCES or size not in SIZES:
+        raise ValueError(f"알 수 없는 이미지 variant입니다: {variant}")
+    return SOURCES[source], size
+
+
+# --- 1. HTTP 클라이언트 (연결 풀 재사용) ---
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    global _session
+    with _session_lock:
+        if _session is None:
+            retry = Retry(total=2, backoff_factor=0.3, status_forcelist=(502, 503, 504), allowed_methods=('GET',))
+            adapter = HTTPAdapter(pool_connections=8, pool_maxsize=32, max_retries=retry)
+            session = requests.Session()
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            session.headers['User-Agent'] = 'TimeTraveler-ImageProxy/1.0'
+            _session = session
+        return _session
+
+
+def _download(url):
+    if not url.startswith(('http://', 'https://')):
+        raise ImageProxyError("http(s) 이미지 URL만 지원합니다.")
+    try:
+        with get_session().get(url, timeout=FETCH_TIMEOUT, stream=True) as response:
+            response.raise_for_status()
+            chunks, total = [], 0
+            for chunk in response.iter_content(64 * 1024):
+                total += len(chunk)
+                if total > MAX_SOURCE_BYTES:
+                    raise ImageProxyError("원본 이미지가 너무 큽니다.")
+                chunks.append(chunk)
+    except requests.RequestException as e:
+        raise ImageProxyError(f"원본 이미지를 가져올 수 없습니다: {e}")
+    return b''.join(chunks)
+
+
+# --- 2. 디스크 LRU 캐시 ---
+class DiskLRUCache:
+    """
+    파일 하나가 항목 하나인 디스크 캐시. 조회 시 mtime을 갱신하고,
+    전체 크기가 max_bytes를 넘으면 mtime이 오래된 파일부터 지웁니다.
+    여러 워커 프로세스가 같은 디렉터리를 공유해도 쓰기는 원자적(os.replace)입니다.
+    """
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._size = None  # 프로세스 추정치, 정리할 때 실제 값으로 보정
+        self._lock = threading.Lock()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key)
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return data
+
+    def set(self, key, data):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            if self._size is None:
+                self._size = self._scan_size()
+            else:
+                self._size += len(data)
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _entries(self):
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.startswith('.tmp-'):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                yield path, stat.st_mtime, stat.st_size
+
+    def _scan_size(self):
+        return sum(size for _, _, size in self._entries())
+
+    def _evict(self):
+        entries = sorted(self._entries(), key=lambda entry: entry[1])
+        total = sum(size for _, _, size in entries)
+        target = self.max_bytes * EVICT_TARGET_RATIO
+        for path, _, size in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except FileNotFoundError:
+                pass
+        self._size = total
+
+
+_cache = None
+_cache_lock = threading.Lock()
+_fetch_locks = {}  # key -> [Lock, 잠금을 쥐었거나 기다리는 요청 수]
+
+
+def get_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = DiskLRUCache(settings.SPOT_IMAGE_CACHE_DIR, settings.SPOT_IMAGE_CACHE_MAX_BYTES)
+        return _cache
+
+
+@contextmanager
+def _key_lock(key):
+    """
+    키별 잠금. 기다리는 요청이 남아 있는 동안은 항목을 유지해 모두 같은 잠금을 쓰게 하고,
+    마지막 요청이 끝나면 지웁니다 (실패한 URL도 항목이 남지 않음).
+    """
+    with _cache_lock:
+        entry = _fetch_locks.setdefault(key, [threading.Lock(), 0])
+        entry[1] += 1
+    try:
+        with entry[0]:
+            yield
+    finally:
+        with _cache_lock:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del _fetch_locks[key]
+
+
+def cache_key(url, size):
+    return hashlib.sha256(f"{PROXY_VERSION}\n{size}\n{url}".encode()).hexdigest()
+
+
+# --- 3. 변형 생성 ---
+def _verify(data):
+    """원본이 실제 이미지인지 확인합니다 (오리진의 HTML 오류 페이지 등을 캐시하지 않도록)."""
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            image.verify()
+    except Exception as e:  # UnidentifiedImageError(OSError), 손상된 파일의 SyntaxError 등
+        raise ImageProxyError(f"원본이 이미지가 아닙니다: {e}")
+    return data
+
+
+def _resize(data, max_side):
+    try:
+        with Image.open(io.BytesIO(data)) as source:
+            image = ImageOps.exif_transpose(source).convert('RGB')
+    except OSError as e:  # PIL.UnidentifiedImageError 포함
+        raise ImageProxyError(f"이미지를 읽을 수 없습니다: {e}")
+    image.thumbnail((max_side, max_side), Image.Resampling.LANCZOS)
+    buffer = io.BytesIO()
+    image.save(buffer, format='JPEG', quality=JPEG_QUALITY, optimize=True)
+    return buffer.getvalue()
+
+
+def get_image(url, size=DEFAULT_SIZE):
+    """
+    url 이미지의 size 변형을 반환합니다. 캐시에 없으면 원본을 한 번 받아(원본도 캐시) 만듭니다.
+    같은 항목을 동시에 요청하면 한 요청만 원본을 받습니다.
+
+    Returns:
+        tuple: (bytes, etag)
+    """
+    key = cache_key(url, size)
+    cache = get_cache()
+    data = cache.get(key)
+    if data is not None:
+        return data, key
+
+    with _key_lock(key):
+        data = cache.get(key)
+        if data is None:
+            if SIZES[size] is None:
+                data = _verify(_download(url))
+            else:
+                original, _ = get_image(url, 'full')
+                data = _resize(original, SIZES[size])
+            cache.set(key, data)
+    return data, key
+
+
+def sniff_content_type(data):
+    if data[:3] == b'\xff\xd8\xff':
+        return 'image/jpeg'
+    if data[:8] == b'\x89PNG\r\n\x1a\n':
+        return 'image/png'
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+        return 'image/webp'
+    if data[:6] in (b'GIF87a', b'GIF89a'):
+        return 'image/gif'
+    return 'application/octet-stream'
@@ -0,0 +1,105 @@
+"""
+스팟 이미지 링크 점검
+모든 Spot 이미지 URL을 asyncio + httpx로 동시에 확인합니다.
+- 전체 연결 수 제한 (httpx.Limits) + 호스트별 동시 요청 제한 (asyncio.Semaphore)
+- HEAD를 먼저 보내고, HEAD를 지원하지 않는 서버면 GET으로 헤더만 확인 (본문은 받지 않음)
+- 실패는 확정 실패(4xx, 이미지가 아닌 성공 응답)와 일시 실패(연결 오류, 타임아웃, 5xx 등)로 나눕니다.
+"""
+import asyncio
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from urllib.parse import urlsplit
+
+import httpx
+
+LINK_FIELDS = ('first_image', 'first_image2', 'past_image_url')
+HEAD_FALLBACK_STATUSES = {403, 405, 501}
+TRANSIENT_CLIENT_STATUSES = {408, 425, 429}  # 4xx지만 다시 시도하면 성공할 수 있는 응답
+
+
+@dataclass
+class LinkResult:
+    spot_id: int
+    field: str
+    url: str
+    ok: bool = False
+    status_code: int = None
+    latency_ms: int = None
+    content_length: int = None
+    content_type: str = ''
+    error: str = ''
+
+    @property
+    def definitive_failure(self):
+        """링크가 확실히 깨졌는지 (4xx 또는 이미지가 아닌 성공 응답). 연결 오류/타임아웃/5xx는 False"""
+        if self.ok or self.status_code is None:
+            return False
+        if 400 <= self.status_code < 500:
+            return self.status_code not in TRANSIENT_CLIENT_STATUSES
+        return 200 <= self.status_code < 300
+
+
+def _apply_response(result, response):
+    result.status_code = response.status_code
+    result.content_type = response.headers.get('content-type', '').split(';')[0].strip()[:100]
+    length = response.headers.get('content-length')
+    result.content_length = int(length) if length and length.isdigit() else None
+    is_image = not result.content_type or result.content_type.startswith('image/')
+    result.ok = response.is_success and is_image
+    if response.is_success and not is_image:
+        result.error = f"이미지가 아닌 응답 ({result.content_type})"
+
+
+async def check_link(client, host_limits, spot_id, field, url):
+    result = LinkResult(spot_id=spot_id, field=field, url=url)
+    host = urlsplit(url).netloc.lower()
+    async with host_limits[host]:
+        started = time.monotonic()
+        try:
+            response = await client.head(url)
+            if response.status_code in HEAD_FALLBACK_STATUSES:
+                async with client.stream('GET', url) as response:
+                    pass
+            _apply_response(result, response)
+        except httpx.HTTPError as e:
+            result.error = f"{type(e).__name__}: {e}"[:255]
+        result.latency_ms = int((time.monotonic() - started) * 1000)
+    return result
+
+
+async def check_links(targets, concurrency=50, per_host=4, timeout=10.0, progress=None):
+    """
+    Args:
+        targets: [(spot_id, field, url), ...]
+        progress: 결과 하나가 끝날 때마다 호출할 함수 (선택)
+
+    Returns:
+        list[LinkResult]
+    """
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    host_limits = defaultdict(lambda: asyncio.Semaphore(per_host))
+    headers = {'User-Agent': 'TimeTraveler-LinkChecker/1.0'}
+
+    async with httpx.AsyncClient(
+        limits=limits, timeout=httpx.Timeout(timeout), follow_redirects=True, headers=headers
+    ) as client:
+        tasks = [asyncio.create_task(check_link(client, host_limits, *target)) for target in targets]
+        results = []
+        for task in asyncio.as_completed(tasks):
+            result = await task
+            results.append(result)
+            if progress:
+                progress(result)
+    return results
+
+
+def collect_targets(spot_rows, fields=LINK_FIELDS):
+    """values() 행에서 점검할 (spot_id, field, url) 목록을 만듭니다. http(s)가 아니면 제외"""
+    targets = []
+    for row in spot_rows:
+        for field in fields:
+            url = (row.get(field) or '').strip()
+            if url.startswith(('http://', 'https://')):
+                targets.append((row['id'], field, url))
+    return targets
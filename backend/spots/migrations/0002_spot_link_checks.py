@@ -0,0 +1,41 @@
+# Generated by Django 5.2.4 on 2026-10-19 11:29
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('spots', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='spot',
+            name='past_image_broken',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.CreateModel(
+            name='SpotLinkCheck',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('field', models.CharField(max_length=30)),
+                ('url', models.URLField(max_length=500)),
+                ('ok', models.BooleanField(default=False)),
+                ('status_code', models.IntegerField(blank=True, null=True)),
+                ('latency_ms', models.IntegerField(blank=True, null=True)),
+                ('content_length', models.BigIntegerField(blank=True, null=True)),
+                ('content_type', models.CharField(blank=True, max_length=100)),
+                ('error', models.CharField(blank=True, max_length=255)),
+                ('consecutive_failures', models.IntegerField(default=0)),
+                ('checked_at', models.DateTimeField()),
+                ('spot', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='link_checks', to='spots.spot')),
+            ],
+            options={
+                'db_table': 'spot_link_checks',
+                'indexes': [models.Index(fields=['ok', 'field'], name='spot_link_check_ok_idx')],
+                'constraints': [models.UniqueConstraint(fields=('spot', 'field'), name='spot_link_check_unique_field')],
+            },
+        ),
+    ]
@@ -21,6 +21,7 @@ class Spot(models.Model):
     first_image = models.URLField(blank=True)  # firstimage
     first_image2 = models.URLField(blank=True)  # firstimage2
     past_image_url = models.URLField(blank=True)  # past_image_url
+    past_image_broken = models.BooleanField(default=False)  # check_spot_links 결과, True면 미션 풀에서 제외
     
     # 특성 태그들
     public_transport = models.BooleanField(default=False)  # 이동_대중교통
@@ -46,6 +47,34 @@ class Spot(models.Model):
         return self.name
 
 
+class SpotLinkCheck(models.Model):
+    """check_spot_links 명령이 기록하는 스팟 이미지 URL별 최근 점검 결과"""
+    id = models.AutoField(primary_key=True)
+    spot = models.ForeignKey(Spot, on_delete=models.CASCADE, related_name='link_checks')
+    field = models.CharField(max_length=30)  # first_image, first_image2, past_image_url
+    url = models.URLField(max_length=500)
+    ok = models.BooleanField(default=False)
+    status_code = models.IntegerField(null=True, blank=True)
+    latency_ms = models.IntegerField(null=True, blank=True)
+    content_length = models.BigIntegerField(null=True, blank=True)
+    content_type = models.CharField(max_length=100, blank=True)
+    error = models.CharField(max_length=255, blank=True)
+    consecutive_failures = models.IntegerField(default=0)  # 같은 URL의 연속 확정 실패 횟수 (일시 실패는 세지 않음)
+    checked_at = models.DateTimeField()
+
+    class Meta:
+        db_table = 'spot_link_checks'
+        constraints = [
+            models.UniqueConstraint(fields=['spot', 'field'], name='spot_link_check_unique_field'),
+        ]
+        indexes = [
+            models.Index(fields=['ok', 'field'], name='spot_link_check_ok_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.spot_id} {self.field} {self.status_code or self.error}"
+
+
 class SpotPhoto(models.Model):
     id = models.AutoField(primary_key=True)
     spot = models.ForeignKey(Spot, on_delete=models.CASCADE, related_name='photos')
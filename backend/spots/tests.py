@@ -1,3 +1,284 @@
-from django.test import TestCase
+import io
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 
-# Create your tests here.
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from PIL import Image
+
+from . import catalog, hours, image_proxy
+from .models import Spot
+
+
+def _jpeg(size=(800, 600)):
+    buffer = io.BytesIO()
+    Image.new('RGB', size, 'green').save(buffer, format='JPEG')
+    return buffer.getvalue()
+
+
+class OriginServer:
+    """이미지 프록시 테스트용 로컬 오리진 (경로별 응답과 요청 횟수 기록)"""
+
+    def __init__(self, routes, delay=0.0):
+        self.routes = routes
+        self.hits = {}
+        origin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                path = self.path.split('?', 1)[0]
+                origin.hits[path] = origin.hits.get(path, 0) + 1
+                time.sleep(delay)
+                status, content_type, body = origin.routes.get(path, (404, 'text/html', b'<h1>Not Found</h1>'))
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def url(self, path):
+        return f"http://127.0.0.1:{self.server.server_port}{path}"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class ImageProxyTests(SimpleTestCase):
+    def setUp(self):
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir, ignore_errors=True)
+        cache_override = override_settings(SPOT_IMAGE_CACHE_DIR=cache_dir, SPOT_IMAGE_CACHE_MAX_BYTES=10 * 1024 * 1024)
+        cache_override.enable()
+        self.addCleanup(cache_override.disable)
+        image_proxy._cache = None
+        self.addCleanup(setattr, image_proxy, '_cache', None)
+        self.jpeg = _jpeg()
+
+    def test_concurrent_requests_download_once(self):
+        with OriginServer({'/a.jpg': (200, 'image/jpeg', self.jpeg)}, delay=0.2) as origin:
+            url = origin.url('/a.jpg')
+            results, errors = [], []
+
+            def fetch():
+                try:
+                    results.append(image_proxy.get_image(url, 'thumb'))
+                except Exception as e:
+                    errors.append(e)
+
+            threads = [threading.Thread(target=fetch) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+            self.assertEqual(errors, [])
+            self.assertEqual(origin.hits['/a.jpg'], 1)
+            self.assertEqual(len({data for data, _ in results}), 1)
+            with Image.open(io.BytesIO(results[0][0])) as thumb:
+                self.assertEqual(max(thumb.size), image_proxy.SIZES['thumb'])
+
+            # 이후 요청은 캐시에서 (원본 full 변형도 캐시됨)
+            image_proxy.get_image(url, 'medium')
+            self.assertEqual(origin.hits['/a.jpg'], 1)
+        self.assertEqual(image_proxy._fetch_locks, {})
+
+    def test_non_image_response_is_not_cached(self):
+        routes = {'/page.jpg': (200, 'text/html', b'<html>maintenance</html>')}
+        with OriginServer(routes) as origin:
+            url = origin.url('/page.jpg')
+            with self.assertRaises(image_proxy.ImageProxyError):
+                image_proxy.get_image(url, 'full')
+            self.assertIsNone(image_proxy.get_cache().get(image_proxy.cache_key(url, 'full')))
+
+            routes['/page.jpg'] = (200, 'image/jpeg', self.jpeg)
+            data, _ = image_proxy.get_image(url, 'full')
+            self.assertEqual(data, self.jpeg)
+            self.assertEqual(origin.hits['/page.jpg'], 2)
+
+    def test_failed_fetch_releases_lock(self):
+        with OriginServer({}) as origin:
+            for size in ('full', 'thumb'):
+                with self.assertRaises(image_proxy.ImageProxyError):
+                    image_proxy.get_image(origin.url('/missing.jpg'), size)
+        self.assertEqual(image_proxy._fetch_locks, {})
+
+    def test_waiters_keep_sharing_lock_after_holder_leaves(self):
+        key = 'same-key'
+        holder = image_proxy._key_lock(key)
+        holder.__enter__()
+        waiter_inside, release_waiter = threading.Event(), threading.Event()
+
+        def waiter():
+            with image_proxy._key_lock(key):
+                waiter_inside.set()
+                release_waiter.wait(5)
+
+        thread = threading.Thread(target=waiter, daemon=True)
+        thread.start()
+        deadline = time.monotonic() + 5
+        while image_proxy._fetch_locks[key][1] < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        holder.__exit__(None, None, None)
+        self.assertTrue(waiter_inside.wait(5))
+
+        # 새로 온 요청도 대기자와 같은 잠금을 기다려야 함 (항목을 지우면 새 잠금으로 동시에 실행됨)
+        lock, refs = image_proxy._fetch_locks[key]
+        self.assertEqual(refs, 1)
+        self.assertTrue(lock.locked())
+        release_waiter.set()
+        thread.join()
+        self.assertEqual(image_proxy._fetch_locks, {})
+
+    def test_parse_variant(self):
+        self.assertEqual(image_proxy.parse_variant('past_thumb'), ('past_image_url', 'thumb'))
+        self.assertEqual(image_proxy.parse_variant('first'), ('first_image', 'medium'))
+        with self.assertRaises(ValueError):
+            image_proxy.parse_variant('past_huge')
+
+
+class UseTimeTests(SimpleTestCase):
+    MONDAY, TUESDAY, SUNDAY = 0, 1, 6
+    CASES = [
+        # use_time, 월, (kind, opens, closes), 닫는 요일, label
+        ('09:00~18:00 (입장마감 17:00)', 5, (hours.HOURS, 540, 1080), set(), '09:00~18:00'),
+        ('09:00~18:00 (월요일 휴무)', 5, (hours.HOURS, 540, 1080), {MONDAY}, '09:00~18:00 (월 휴무)'),
+        ('화요일~일요일 09:00~18:00<br>(매주 월요일 휴관)', 5, (hours.HOURS, 540, 1080), {MONDAY}, None),
+        ('10:00~17:00<br>휴관일 : 매주 월·화요일', 5, (hours.HOURS, 600, 1020), {MONDAY, TUESDAY}, None),
+        ('10:00~17:00, 월요일, 화요일 휴무', 5, (hours.HOURS, 600, 1020), {MONDAY, TUESDAY}, None),
+        ('매주 월요일(공휴일인 경우 그 다음날) 휴관', 5, (hours.UNKNOWN, None, None), {MONDAY}, None),
+        ('정기휴무 일요일<br>11:00~21:00', 5, (hours.HOURS, 660, 1260), {SUNDAY}, None),
+        ('11월~2월 09:00~17:00<br>3월~10월 09:00~18:00', 12, (hours.HOURS, 540, 1020), set(), None),
+        ('11월~2월 09:00~17:00<br>3월~10월 09:00~18:00', 5, (hours.HOURS, 540, 1080), set(), None),
+        ('18:00~02:00', 5, (hours.HOURS, 1080, 120), set(), None),
+        ('상시 개방', 5, (hours.ALWAYS, 0, 1440), set(), '상시 개방'),
+        ('연중무휴 24시간', 5, (hours.ALWAYS, 0, 1440), set(), None),
+        # 닫는 날로 보면 안 되는 표기
+        ('평일 10:00~21:00<br>휴일 및 주말 13:00~21:00', 5, (hours.HOURS, 600, 1260), set(), None),
+        ('토요일/공휴일 11:00~23:00', 5, (hours.HOURS, 660, 1380), set(), None),
+        ('09:00~17:30 (휴게시간 12:00~13:00)', 5, (hours.HOURS, 540, 1050), set(), None),
+        ('09:00~18:00 (매월 셋째 월요일 휴관)', 5, (hours.HOURS, 540, 1080), set(), None),
+        ('', 5, (hours.UNKNOWN, None, None), set(), ''),
+        ('방문 전 문의', 5, (hours.UNKNOWN, None, None), set(), '방문 전 문의'),
+    ]
+
+    def test_parse_use_time(self):
+        for use_time, month, (kind, opens, closes), closed_days, label in self.CASES:
+            with self.subTest(use_time=use_time, month=month):
+                parsed = hours.parse_use_time(use_time, month)
+                self.assertEqual((parsed.kind, parsed.opens, parsed.closes), (kind, opens, closes))
+                self.assertEqual(parsed.closed_days, closed_days)
+                if label is not None:
+                    self.assertEqual(parsed.label, label)
+
+    def test_is_open(self):
+        closed_mondays = hours.parse_use_time('09:00~18:00 (월요일 휴무)', 5)
+        overnight = hours.parse_use_time('18:00~02:00', 5)
+        unknown = hours.parse_use_time('매주 월요일 휴관', 5)
+        cases = [
+            (closed_mondays, 600, self.TUESDAY, True),
+            (closed_mondays, 600, self.MONDAY, False),
+            (closed_mondays, 600, None, True),
+            (closed_mondays, 1100, self.TUESDAY, False),
+            (overnight, 60, self.TUESDAY, True),
+            (overnight, 600, self.TUESDAY, False),
+            (unknown, 600, self.MONDAY, False),
+            (unknown, 600, self.TUESDAY, None),
+        ]
+        for parsed, minute, weekday, expected in cases:
+            with self.subTest(label=parsed.label, minute=minute, weekday=weekday):
+                self.assertIs(hours.is_open(parsed, minute, weekday), expected)
+
+
+class CatalogTests(TestCase):
+    def setUp(self):
+        self.artifact_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.artifact_dir, ignore_errors=True)
+        catalog_override = override_settings(CATALOG_ARTIFACT_DIR=self.artifact_dir)
+        catalog_override.enable()
+        self.addCleanup(catalog_override.disable)
+        self.addCleanup(catalog.reset_catalog)
+        catalog.reset_catalog()
+
+        Spot.objects.create(
+            name='홍예문', lat=37.4737, lng=126.6216, content_id='t-1',
+            past_image_url='https://example.com/a.jpg', night_view=True, famous=True,
+        )
+        Spot.objects.create(name='월미도', lat=37.4753, lng=126.5973, content_id='t-2', with_pets=True)
+        Spot.objects.create(
+            name='송도', lat=37.3925, lng=126.6393, content_id='t-3',
+            past_image_url='https://example.com/c.jpg', past_image_broken=True,
+        )
+
+    def build(self):
+        out = io.StringIO()
+        call_command('build_catalog', stdout=out)
+        return out.getvalue()
+
+    def version_dir(self):
+        with open(os.path.join(self.artifact_dir, catalog.CURRENT_FILE), encoding='utf-8') as f:
+            return os.path.join(self.artifact_dir, f.read().strip())
+
+    def test_build_then_load(self):
+        self.assertIn('3 spots, missions=1', self.build())
+        loaded = catalog.get_catalog()
+        self.assertEqual(len(loaded), 3)
+        self.assertEqual(loaded.manifest['spot_count'], 3)
+
+        names = [spot['name'] for spot in loaded.spots]
+        self.assertEqual(loaded.mission.tolist(), [name == '홍예문' for name in names])
+        hongyemun = names.index('홍예문')
+        expected_bits = (1 << catalog.TAG_FIELDS.index('night_view')) | (1 << catalog.TAG_FIELDS.index('famous'))
+        self.assertEqual(int(loaded.tag_bits[hongyemun]), expected_bits)
+        self.assertEqual(loaded.spots[hongyemun]['geohash'], catalog.geohash_encode(37.4737, 126.6216))
+
+        (nearest, distance_km), = loaded.nearest(37.4740, 126.6220)
+        self.assertEqual(nearest, hongyemun)
+        self.assertLess(distance_km, 0.1)
+
+    def test_tampered_artifact_fails_checksum(self):
+        self.build()
+        with open(os.path.join(self.version_dir(), 'coords.npy'), 'r+b') as f:
+            f.seek(-8, os.SEEK_END)
+            f.write(b'\x00' * 8)
+        with self.assertRaisesRegex(catalog.CatalogError, '체크섬 불일치'):
+            catalog.load_catalog()
+        # 로드에 실패하면 워커는 카탈로그 없이 동작
+        self.assertIsNone(catalog.get_catalog())
+
+    def test_tampered_manifest_fails_checksum(self):
+        self.build()
+        manifest_path = os.path.join(self.version_dir(), catalog.MANIFEST_FILE)
+        with open(manifest_path, encoding='utf-8') as f:
+            manifest = json.load(f)
+        manifest['checksum'] = '0' * 64
+        with open(manifest_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f)
+        with self.assertRaisesRegex(catalog.CatalogError, 'manifest 체크섬 불일치'):
+            catalog.load_catalog()
+        self.assertIsNotNone(catalog.load_catalog(verify=False))
+
+    def test_rebuild_keeps_recent_versions(self):
+        versions = set()
+        for _ in range(4):
+            self.build()
+            versions.add(os.path.basename(self.version_dir()))
+            time.sleep(1.01)  # 버전 이름은 초 단위 시각
+        kept = {name for name in os.listdir(self.artifact_dir) if name != catalog.CURRENT_FILE}
+        self.assertEqual(len(kept), 3)
+        self.assertIn(os.path.basename(self.version_dir()), kept)
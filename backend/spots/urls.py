@@ -5,5 +5,6 @@ from . import views
 urlpatterns = [
     path('', views.spots, name='spots'),
     path('<int:spot_id>/', views.spot_detail, name='spot-detail'),
+    path('<int:spot_id>/image/<str:variant>/', views.spot_image, name='spot-image'),
     path('mission/<int:spot_id>/', views.get_mission_photos, name='mission-photos'),
 ]
\ No newline at end of file
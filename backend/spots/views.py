@@ -6,7 +6,12 @@ from rest_framework.decorators import api_view
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.decorators import permission_classes
+from django.http import HttpResponse, JsonResponse
+from django.views.decorators.http import require_GET
+from .image_proxy import parse_variant, get_image, cache_key, sniff_content_type, ImageProxyError
 import random
+
+SPOT_IMAGE_CACHE_CONTROL = 'public, max-age=604800'  # 7일, ETag로 재검증
 # Create your views here.
 @api_view(['GET'])
 @permission_classes([AllowAny])
@@ -61,6 +66,7 @@ def get_mission_photos(request, spot_id):
         # 정답 과거 사진 제외 다른 3개의 과거 사진 가져오기 (order_by '?'로 무작위 처리)
         other_spots = list(Spot.objects.exclude(id=spot_id)
                                     .exclude(past_image_url='')
+                                    .exclude(past_image_broken=True)
                                     .order_by('?')[:3])
         
         # 응답데이터
@@ -81,3 +87,40 @@ def get_mission_photos(request, spot_id):
             {'error': f'서버 오류가 발생했습니다: {str(e)}'}, 
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
+
+
+# get, api/v1/spots/{spot_id}/image/{variant}/
+@require_GET
+def spot_image(request, spot_id, variant):
+    """
+    스팟 이미지 프록시 API
+    외부 호스트의 스팟 이미지를 한 번만 받아 크기별로 캐시하고 강한 캐시 헤더로 제공합니다.
+    이미지 응답이라 DRF 콘텐츠 협상(Accept: image/*)을 거치지 않는 일반 Django 뷰입니다.
+
+    variant: first | first2 | past, 뒤에 _thumb | _medium | _full (기본 medium)
+    """
+    try:
+        field, size = parse_variant(variant)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=status.HTTP_404_NOT_FOUND)
+
+    image_url = Spot.objects.filter(id=spot_id).values_list(field, flat=True).first()
+    if image_url is None:
+        return JsonResponse({'error': '스팟을 찾을 수 없습니다.'}, status=status.HTTP_404_NOT_FOUND)
+    if not image_url:
+        return JsonResponse({'error': '이 스팟에는 해당 이미지가 없습니다.'}, status=status.HTTP_404_NOT_FOUND)
+
+    etag = f'"{cache_key(image_url, size)}"'
+    if etag in request.headers.get('If-None-Match', ''):
+        response = HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        try:
+            data, _ = get_image(image_url, size)
+        except ImageProxyError as e:
+            print(f"[spots] 이미지 프록시 실패 (spot={spot_id}, variant={variant}): {str(e)}")
+            return JsonResponse({'error': str(e)}, status=status.HTTP_502_BAD_GATEWAY)
+        response = HttpResponse(data, content_type=sniff_content_type(data))
+        response['Content-Length'] = len(data)
+    response['ETag'] = etag
+    response['Cache-Control'] = SPOT_IMAGE_CACHE_CONTROL
+    return response
@@ -110,6 +110,7 @@ SIMPLE_JWT = {
 }
 
 MIDDLEWARE = [
+    'timetraveler.tracing.TraceMiddleware',  # request id / traceparent, Server-Timing
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -125,6 +126,7 @@ AWS_ACCESS_KEY_ID = os.getenv('AWS_ACCESS_KEY_ID')
 AWS_SECRET_ACCESS_KEY = os.getenv('AWS_SECRET_ACCESS_KEY')
 AWS_STORAGE_BUCKET_NAME = os.getenv('AWS_STORAGE_BUCKET_NAME', 'timetraveler-prod-images')
 AWS_S3_REGION_NAME = os.getenv('AWS_S3_REGION_NAME', 'ap-northeast-2')
+AWS_S3_ENDPOINT_URL = os.getenv('AWS_S3_ENDPOINT_URL')  # 로컬 S3 대체(moto 등) 사용 시
 
 # 프로필 관련 문제 해결을 위해 명시적으로 None 설정
 # AWS_S3_SESSION_PROFILE = "timetraveler-dev"  # ← django-storages가 인식하는 설정
@@ -149,6 +151,14 @@ STORAGES = {
     },
 }
 
+# 사진 직접 업로드 (presigned) 설정
+PHOTO_UPLOAD_MAX_BYTES = int(os.getenv('PHOTO_UPLOAD_MAX_BYTES', 15 * 1024 * 1024))
+PHOTO_UPLOAD_URL_EXPIRES = int(os.getenv('PHOTO_UPLOAD_URL_EXPIRES', 600))  # 업로드 URL 유효 시간(초)
+PHOTO_UPLOAD_FINALIZE_MAX_AGE = int(os.getenv('PHOTO_UPLOAD_FINALIZE_MAX_AGE', 24 * 60 * 60))  # upload_id 유효 시간(초)
+PHOTO_BATCH_MAX_FILES = int(os.getenv('PHOTO_BATCH_MAX_FILES', 10))  # 일괄 업로드 한 번에 받을 최대 사진 수
+PHOTO_BATCH_UPLOAD_WORKERS = int(os.getenv('PHOTO_BATCH_UPLOAD_WORKERS', 4))  # 일괄 업로드 저장소 쓰기 동시성
+PHOTO_DERIVATIVE_WORKERS = int(os.getenv('PHOTO_DERIVATIVE_WORKERS', 2))  # 썸네일/WebP 생성 프로세스 수
+
 # 미디어 URL 설정
 MEDIA_URL = f'https://{AWS_STORAGE_BUCKET_NAME}.s3.{AWS_S3_REGION_NAME}.amazonaws.com/{AWS_LOCATION}/'
 
@@ -253,5 +263,55 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # Custom User Model
 AUTH_USER_MODEL = 'accounts.CustomUser'
 
+# 캐시 (사용자별 코스 캐시 버전 등). 사용자별 코스 응답 캐시는 공유 백엔드(Redis, DB, 파일)에서만 켜짐
+# (기본 LocMem은 워커마다 따로라 다른 워커의 무효화를 볼 수 없으므로 courses.cache가 캐시하지 않음)
+# 예) CACHE_BACKEND=django.core.cache.backends.redis.RedisCache, CACHE_LOCATION=redis://localhost:6379/1
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
+    }
+}
+
+# 스팟 카탈로그 아티팩트 (build_catalog 명령으로 생성)
+CATALOG_ARTIFACT_DIR = os.getenv('CATALOG_ARTIFACT_DIR', os.path.join(BASE_DIR, 'catalog_artifacts'))
+
+# 스팟 이미지 프록시 디스크 캐시 (/v1/spots/<id>/image/<variant>/)
+SPOT_IMAGE_CACHE_DIR = os.getenv('SPOT_IMAGE_CACHE_DIR', os.path.join(BASE_DIR, 'spot_image_cache'))
+SPOT_IMAGE_CACHE_MAX_BYTES = int(os.getenv('SPOT_IMAGE_CACHE_MAX_BYTES', 512 * 1024 * 1024))
+
 # FastAPI AI 서버 설정
-FASTAPI_AI_SERVER_URL = os.getenv('FASTAPI_AI_SERVER_URL')
\ No newline at end of file
+FASTAPI_AI_SERVER_URL = os.getenv('FASTAPI_AI_SERVER_URL')
+AI_SERVER_MAX_CONCURRENT = int(os.getenv('AI_SERVER_MAX_CONCURRENT', 32))  # 프로세스당 동시 요청 수
+AI_SERVER_MAX_QUEUE = int(os.getenv('AI_SERVER_MAX_QUEUE', 16))  # 자리를 기다릴 수 있는 요청 수
+AI_SERVER_QUEUE_TIMEOUT = float(os.getenv('AI_SERVER_QUEUE_TIMEOUT', 2.0))  # 대기 최대 시간(초)
+AI_SERVER_BREAKER_THRESHOLD = int(os.getenv('AI_SERVER_BREAKER_THRESHOLD', 5))  # 연속 실패 시 서킷 open
+AI_SERVER_BREAKER_RESET_SECONDS = float(os.getenv('AI_SERVER_BREAKER_RESET_SECONDS', 30.0))  # open 유지 시간
+AI_SERVER_MAX_RETRIES = int(os.getenv('AI_SERVER_MAX_RETRIES', 2))  # 멱등 요청 재시도 횟수
+AI_HEALTH_INTERVAL = float(os.getenv('AI_HEALTH_INTERVAL', 10.0))  # 백그라운드 /health 확인 간격(초)
+AI_HEALTH_TIMEOUT = float(os.getenv('AI_HEALTH_TIMEOUT', 3.0))  # /health 응답 대기 시간(초)
+AI_HEALTH_FAILURE_THRESHOLD = int(os.getenv('AI_HEALTH_FAILURE_THRESHOLD', 2))  # 연속 실패 시 챗봇 요청 바로 실패
+AI_HEALTH_HISTORY = int(os.getenv('AI_HEALTH_HISTORY', 60))  # 보관할 확인 결과 수
+
+# 요청 추적 (timetraveler/tracing.py)
+TRACE_SERVER_TIMING = os.getenv('TRACE_SERVER_TIMING', 'True').lower() == 'true'  # 응답에 Server-Timing 헤더
+TRACE_SLOW_REQUEST_MS = float(os.getenv('TRACE_SLOW_REQUEST_MS', 1000))  # 외부 호출이 없어도 이보다 느리면 로그
+
+# 카탈로그로 바로 답하는 챗봇 의도 (chatbot/intents.py), AI 서버 장애 시 대체 답변에도 사용
+CHATBOT_LOCAL_INTENTS = os.getenv('CHATBOT_LOCAL_INTENTS', 'True').lower() == 'true'
+
+# AI 서버 요청에 붙이는 주변 스팟/진행 코스 컨텍스트 (chatbot/context.py)
+CHATBOT_CONTEXT_ENABLED = os.getenv('CHATBOT_CONTEXT_ENABLED', 'True').lower() == 'true'
+CHATBOT_CONTEXT_SPOTS = int(os.getenv('CHATBOT_CONTEXT_SPOTS', 5))  # 가까운 스팟 개수
+
+# 챗봇 답변 캐시 (chatbot/answer_cache.py)
+CHATBOT_CACHE_ENABLED = os.getenv('CHATBOT_CACHE_ENABLED', 'True').lower() == 'true'
+CHATBOT_CACHE_TTL = int(os.getenv('CHATBOT_CACHE_TTL', 6 * 3600))  # 답변 유지 시간(초)
+CHATBOT_CACHE_MAX_ENTRIES = int(os.getenv('CHATBOT_CACHE_MAX_ENTRIES', 2000))  # 프로세스당 LRU 크기
+CHATBOT_CACHE_GEOHASH_PRECISION = int(os.getenv('CHATBOT_CACHE_GEOHASH_PRECISION', 5))  # 위치 셀 크기 (5자리 약 5km)
+CHATBOT_CACHE_MAX_QUESTION_CHARS = int(os.getenv('CHATBOT_CACHE_MAX_QUESTION_CHARS', 80))  # 더 긴 질문은 캐시하지 않음
+CHATBOT_CACHE_SIMILARITY = os.getenv('CHATBOT_CACHE_SIMILARITY', 'hashing')  # hashing | sentence-transformers | off
+CHATBOT_CACHE_EMBEDDING_MODEL = os.getenv('CHATBOT_CACHE_EMBEDDING_MODEL', 'jhgan/ko-sroberta-multitask')
+CHATBOT_CACHE_SIMILARITY_THRESHOLD = (
+    float(os.environ['CHATBOT_CACHE_SIMILARITY_THRESHOLD']) if os.getenv('CHATBOT_CACHE_SIMILARITY_THRESHOLD') else None
+)  # 비우면 임베더별 기본값
\ No newline at end of file
@@ -0,0 +1,177 @@
+import asyncio
+import re
+import threading
+from unittest import mock
+
+import httpx
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from chatbot import client
+
+from . import tracing
+
+TRACE_ID = '4bf92f3577b34da6a3ce929d0e0e4736'
+PARENT_ID = '00f067aa0ba902b7'
+TRACEPARENT = f'00-{TRACE_ID}-{PARENT_ID}-01'
+
+
+class TraceContextTests(SimpleTestCase):
+    def test_traceparent_is_continued(self):
+        trace = tracing.Trace('req-1', TRACEPARENT)
+        self.assertEqual((trace.trace_id, trace.parent_id, trace.flags), (TRACE_ID, PARENT_ID, '01'))
+        self.assertEqual(trace.request_id, 'req-1')
+        self.assertNotEqual(trace.span_id, PARENT_ID)
+
+    def test_invalid_traceparent_starts_new_trace(self):
+        for traceparent in (None, '', 'garbage', f'01-{TRACE_ID}-{PARENT_ID}-01', f'00-{"0" * 32}-{PARENT_ID}-01',
+                            f'00-{TRACE_ID.upper()}-{PARENT_ID}-01'):
+            with self.subTest(traceparent=traceparent):
+                trace = tracing.Trace(None, traceparent)
+                self.assertRegex(trace.trace_id, r'^[0-9a-f]{32}$')
+                self.assertNotEqual(trace.trace_id, TRACE_ID)
+                self.assertIsNone(trace.parent_id)
+                # request id가 없으면 trace id를 씀
+                self.assertEqual(trace.request_id, trace.trace_id)
+
+    def test_unsafe_request_id_is_replaced(self):
+        for request_id in ('a b', 'x' * 129, 'id\r\nSet-Cookie: a=b'):
+            with self.subTest(request_id=request_id):
+                trace = tracing.Trace(request_id, TRACEPARENT)
+                self.assertEqual(trace.request_id, TRACE_ID)
+
+    def test_outbound_headers_use_child_span(self):
+        trace = tracing.Trace('req-1', TRACEPARENT)
+        first, second = trace.outbound_headers(), trace.outbound_headers()
+        pattern = re.compile(rf'^00-{TRACE_ID}-([0-9a-f]{{16}})-01$')
+        spans = {pattern.match(headers['traceparent']).group(1) for headers in (first, second)}
+        self.assertEqual(len(spans), 2)
+        self.assertNotIn(PARENT_ID, spans)
+        self.assertEqual(first['X-Request-ID'], 'req-1')
+        self.assertEqual(tracing.outbound_headers(), {})  # 요청 밖에서는 헤더 없음
+
+    def test_server_timing_value(self):
+        trace = tracing.Trace()
+        trace.add_timing('ai-queue', 1.25)
+        trace.add_timing('ai-ttfb', 40.0)
+        trace.add_timing('ai', 50.0, '200')
+        self.assertEqual(
+            trace.server_timing(80.0),
+            'app;dur=30.0, ai-queue;dur=1.2, ai-ttfb;dur=40.0, ai;dur=50.0;desc="200", total;dur=80.0',
+        )
+        # 외부 호출이 전체보다 길게 잡혀도 app은 음수가 되지 않음
+        self.assertTrue(trace.server_timing(10.0).startswith('app;dur=0.0, '))
+
+    def test_hop_records_parts_and_retries(self):
+        trace = tracing.Trace()
+        token = tracing._current.set(trace)
+        self.addCleanup(tracing._current.reset, token)
+        with tracing.hop('ai') as hop:
+            hop.begin_attempt()
+            hop.begin_attempt()
+            hop.acquired()
+            hop.status = 200
+        with self.assertRaises(httpx.ConnectError):
+            with tracing.hop('ai'):
+                raise httpx.ConnectError('refused')
+        names = [(name, desc) for name, _, desc in trace.timings]
+        self.assertEqual(names, [('ai-queue', None), ('ai', '200 x2'), ('ai-queue', None), ('ai', 'ConnectError')])
+
+
+@override_settings(TRACE_SERVER_TIMING=True, TRACE_SLOW_REQUEST_MS=60_000)
+class TraceMiddlewareTests(SimpleTestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.seen = {}
+
+    def request(self):
+        return self.factory.get('/v1/spots/', HTTP_TRACEPARENT=TRACEPARENT, HTTP_X_REQUEST_ID='req-1')
+
+    def test_sync_response_headers_and_context_reset(self):
+        def view(request):
+            self.seen['trace'] = tracing.current()
+            self.seen['request_id'] = request.request_id
+            return HttpResponse('ok')
+
+        response = tracing.TraceMiddleware(view)(self.request())
+        self.assertEqual(self.seen['trace'].trace_id, TRACE_ID)
+        self.assertEqual(self.seen['request_id'], 'req-1')
+        self.assertEqual(response['X-Request-ID'], 'req-1')
+        self.assertRegex(response['Server-Timing'], r'^app;dur=\d+\.\d, total;dur=\d+\.\d$')
+        self.assertIsNone(tracing.current())
+
+    @override_settings(TRACE_SERVER_TIMING=False)
+    def test_server_timing_can_be_disabled(self):
+        response = tracing.TraceMiddleware(lambda request: HttpResponse('ok'))(self.request())
+        self.assertNotIn('Server-Timing', response)
+        self.assertEqual(response['X-Request-ID'], 'req-1')
+
+    def test_async_stream_sees_trace_until_end_then_resets(self):
+        async def chunks():
+            self.seen['in_stream'] = tracing.current()
+            with tracing.hop('ai') as hop:
+                hop.status = 200
+            yield b'data: 1\n\n'
+
+        async def view(request):
+            return StreamingHttpResponse(chunks(), content_type='text/event-stream')
+
+        middleware = tracing.TraceMiddleware(view)
+
+        async def run():
+            response = await middleware(self.request())
+            self.assertIsNone(tracing.current())
+            with mock.patch('builtins.print') as log:
+                body = [chunk async for chunk in response.streaming_content]
+            self.assertIsNone(tracing.current())
+            return response, body, log
+
+        response, body, log = asyncio.run(run())
+        self.assertEqual(body, [b'data: 1\n\n'])
+        self.assertEqual(self.seen['in_stream'].trace_id, TRACE_ID)
+        # Server-Timing은 헤더 시점까지, 스트림 전체 시간은 끝난 뒤 로그로
+        self.assertNotIn('ai;', response['Server-Timing'])
+        line = log.call_args.args[0]
+        self.assertTrue(line.startswith(f'[trace] req-1 trace={TRACE_ID} GET /v1/spots/ 200 total='))
+        self.assertIn('ai=', line)
+
+    def test_sync_stream_consumed_in_other_thread(self):
+        def view(request):
+            return StreamingHttpResponse(iter([b'a', b'b']))
+
+        response = tracing.TraceMiddleware(view)(self.request())
+        result = {}
+
+        def consume():
+            result['body'] = b''.join(response.streaming_content)
+            result['after'] = tracing.current()
+
+        thread = threading.Thread(target=consume)
+        thread.start()
+        thread.join()
+        self.assertEqual(result, {'body': b'ab', 'after': None})
+        self.assertIsNone(tracing.current())
+
+
+@override_settings(FASTAPI_AI_SERVER_URL='http://ai.test')
+class TracePropagationTests(SimpleTestCase):
+    def test_ai_request_carries_trace_headers(self):
+        sent = []
+
+        def handler(request):
+            sent.append(request.headers)
+            return httpx.Response(200, json={})
+
+        sync_client = httpx.Client(base_url='http://ai.test', transport=httpx.MockTransport(handler))
+        trace = tracing.Trace('req-1', TRACEPARENT)
+        token = tracing._current.set(trace)
+        self.addCleanup(tracing._current.reset, token)
+        with mock.patch.object(client, 'get_sync_client', return_value=sync_client), \
+                mock.patch.object(client, 'check_health'), \
+                mock.patch.object(client, 'breaker', client.CircuitBreaker()):
+            client.request('GET', '/health')
+
+        self.assertRegex(sent[0]['traceparent'], rf'^00-{TRACE_ID}-[0-9a-f]{{16}}-01$')
+        self.assertNotIn(PARENT_ID, sent[0]['traceparent'])
+        self.assertEqual(sent[0]['X-Request-ID'], 'req-1')
+        self.assertEqual([name for name, _, _ in trace.timings][-1], 'ai')
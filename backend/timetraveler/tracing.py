@@ -0,0 +1,242 @@
+"""
+요청 추적 (request id + W3C traceparent)
+요청마다 request id와 trace context를 만들고(들어온 X-Request-ID / traceparent가 있으면 이어받음)
+contextvar에 보관합니다. AI 서버 호출(chatbot.client)은 이 값을 헤더로 전달하고,
+구간별 시간(queue, connect, ttfb, total)을 기록합니다.
+
+응답에는 X-Request-ID와 Server-Timing 헤더를 붙이고, 외부 호출이 있었거나 느린 요청은 로그를 남깁니다.
+    [trace] 4f1c... POST /v1/chatbot/ 200 total=812.4ms app=10.3ms ai-queue=0.0ms ai-connect=1.2ms ai-ttfb=798.9ms ai=801.0ms
+
+스트리밍 응답은 헤더를 먼저 보내므로 Server-Timing에는 헤더 시점까지만 들어가고,
+전체 시간은 스트림이 끝난 뒤 로그로 남깁니다.
+"""
+import contextvars
+import re
+import secrets
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+_current = contextvars.ContextVar('trace', default=None)
+
+_TRACEPARENT_RE = re.compile(r'^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$')
+_REQUEST_ID_RE = re.compile(r'^[A-Za-z0-9._:-]{1,128}$')
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 1)
+
+
+class Trace:
+    def __init__(self, request_id=None, traceparent=None):
+        match = _TRACEPARENT_RE.match(traceparent or '')
+        if match and match.group(1) != '0' * 32:
+            self.trace_id, self.parent_id, self.flags = match.groups()
+        else:
+            self.trace_id, self.parent_id, self.flags = secrets.token_hex(16), None, '01'
+        self.span_id = secrets.token_hex(8)
+        self.request_id = request_id if request_id and _REQUEST_ID_RE.match(request_id) else self.trace_id
+        self.started = time.perf_counter()
+        self.timings = []  # (이름, ms, 설명)
+
+    def outbound_headers(self):
+        """외부 호출에 붙일 헤더 (호출마다 새 자식 span id)"""
+        return {
+            'traceparent': f'00-{self.trace_id}-{secrets.token_hex(8)}-{self.flags}',
+            'X-Request-ID': self.request_id,
+        }
+
+    def add_timing(self, name, ms, desc=None):
+        self.timings.append((name, ms, desc))
+
+    def elapsed_ms(self):
+        return _ms(time.perf_counter() - self.started)
+
+    def external_ms(self):
+        """외부 호출 전체 시간의 합 (이름에 '-'가 없는 항목이 호출 전체)"""
+        return sum(ms for name, ms, _ in self.timings if '-' not in name)
+
+    def server_timing(self, total_ms):
+        parts = [f'app;dur={max(total_ms - self.external_ms(), 0):.1f}']
+        for name, ms, desc in self.timings:
+            parts.append(f'{name};dur={ms:.1f}' + (f';desc="{desc}"' if desc else ''))
+        parts.append(f'total;dur={total_ms:.1f}')
+        return ', '.join(parts)
+
+    def summary(self, total_ms):
+        parts = [f'total={total_ms}ms', f'app={round(max(total_ms - self.external_ms(), 0), 1)}ms']
+        parts.extend(f'{name}={ms}ms' + (f'({desc})' if desc else '') for name, ms, desc in self.timings)
+        return ' '.join(parts)
+
+
+def current():
+    return _current.get()
+
+
+def _reset(token):
+    # 스트림이 다른 컨텍스트에서 닫히면(예: 동기 이터레이터를 스레드에서 소비) reset할 수 없음
+    try:
+        _current.reset(token)
+    except ValueError:
+        pass
+
+
+def outbound_headers():
+    trace = current()
+    return trace.outbound_headers() if trace is not None else {}
+
+
+class Hop:
+    """
+    외부 호출 한 번의 구간별 시간 (httpx의 trace 확장 이벤트 사용)
+        queue    벌크헤드 자리를 기다린 시간 (재시도마다 합산)
+        connect  TCP/TLS 연결 (keep-alive 연결을 재사용하면 0)
+        ttfb     요청 헤더 전송 시작 ~ 응답 헤더 수신
+        total    호출 시작 ~ 종료 (스트리밍이면 본문을 다 읽을 때까지, 재시도 포함)
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.status = None
+        self.attempts = 0
+        self.queue = 0.0
+        self._started = time.perf_counter()
+        self._attempt_started = None
+        self._marks = {}
+
+    def begin_attempt(self):
+        self.attempts += 1
+        self._attempt_started = time.perf_counter()
+        self._marks = {}
+
+    def acquired(self):
+        """벌크헤드 자리를 얻은 시점"""
+        if self._attempt_started is not None:
+            self.queue += time.perf_counter() - self._attempt_started
+
+    def trace(self, event, info):
+        now = time.perf_counter()
+        if event.endswith('connect_tcp.started'):
+            self._marks['connect_start'] = now
+        elif event.endswith(('connect_tcp.complete', 'start_tls.complete')):
+            self._marks['connect_end'] = now
+        elif event.endswith('send_request_headers.started'):
+            self._marks['send'] = now
+        elif event.endswith('receive_response_headers.complete'):
+            self._marks['headers'] = now
+
+    async def atrace(self, event, info):
+        self.trace(event, info)
+
+    def timings(self):
+        marks = self._marks
+        result = {'queue': _ms(self.queue)}
+        if 'connect_start' in marks and 'connect_end' in marks:
+            result['connect'] = _ms(marks['connect_end'] - marks['connect_start'])
+        elif 'send' in marks:
+            result['connect'] = 0.0
+        if 'send' in marks and 'headers' in marks:
+            result['ttfb'] = _ms(marks['headers'] - marks['send'])
+        result['total'] = _ms(time.perf_counter() - self._started)
+        return result
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        trace = current()
+        if trace is None:
+            return False
+        timings = self.timings()
+        for part in ('queue', 'connect', 'ttfb'):
+            if part in timings:
+                trace.add_timing(f'{self.name}-{part}', timings[part])
+        if exc is not None:
+            desc = exc.__class__.__name__
+        else:
+            desc = f'{self.status}' if self.status is not None else None
+        if self.attempts > 1:
+            desc = f'{desc or ""} x{self.attempts}'.strip()
+        trace.add_timing(self.name, timings['total'], desc)
+        return False
+
+
+def hop(name):
+    return Hop(name)
+
+
+class TraceMiddleware:
+    """요청마다 Trace를 만들고 응답에 X-Request-ID / Server-Timing을 붙입니다 (동기/비동기 모두 지원)"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        trace = self._start(request)
+        token = _current.set(trace)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, trace)
+
+    async def __acall__(self, request):
+        trace = self._start(request)
+        token = _current.set(trace)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, trace)
+
+    def _start(self, request):
+        trace = Trace(request.headers.get('X-Request-ID'), request.headers.get('traceparent'))
+        request.request_id = trace.request_id
+        return trace
+
+    def _finish(self, request, response, trace):
+        total_ms = trace.elapsed_ms()
+        response['X-Request-ID'] = trace.request_id
+        if settings.TRACE_SERVER_TIMING:
+            response['Server-Timing'] = trace.server_timing(total_ms)
+        if response.streaming:
+            response.streaming_content = self._log_after_stream(request, response, trace)
+        else:
+            self._log(request, response, trace, total_ms)
+        return response
+
+    def _log_after_stream(self, request, response, trace):
+        content = response.streaming_content
+
+        if response.is_async:
+            async def stream():
+                token = _current.set(trace)
+                try:
+                    async for chunk in content:
+                        yield chunk
+                finally:
+                    _reset(token)
+                    self._log(request, response, trace, trace.elapsed_ms())
+        else:
+            def stream():
+                token = _current.set(trace)
+                try:
+                    yield from content
+                finally:
+                    _reset(token)
+                    self._log(request, response, trace, trace.elapsed_ms())
+        return stream()
+
+    def _log(self, request, response, trace, total_ms):
+        if trace.timings or total_ms >= settings.TRACE_SLOW_REQUEST_MS:
+            print(
+                f"[trace] {trace.request_id} trace={trace.trace_id} {request.method} {request.path} "
+                f"{response.status_code} {trace.summary(total_ms)}"
+            )